@@ -0,0 +1,7 @@
+"""Entry point for ``python -m api_refresh_builder``."""
+
+import sys
+
+from .cli import main
+
+sys.exit(main())
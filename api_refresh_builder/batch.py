@@ -0,0 +1,243 @@
+"""Generate refresh SQL for a whole directory of code files in parallel.
+
+Each input file is parsed and turned into SQL inside a worker process of a
+:class:`~concurrent.futures.ProcessPoolExecutor`, so throughput scales with
+the number of cores.  Workers write their ``.sql`` file directly and send
+back only a small :class:`FileResult`; the (potentially large) code lists
+and SQL never cross the process boundary.  A JSON summary of every file's
+:class:`~.parsing.ParseResult` stats is written next to the SQL.
+"""
+
+from __future__ import annotations
+
+import glob
+import json
+import logging
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Sequence
+
+from .constants import OUTPUT_SINGLE, SQL_BATCH_MAX_CODES
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS: frozenset[str] = frozenset({".csv", ".xlsx", ".xls"})
+SUMMARY_FILENAME = "summary.json"
+
+
+@dataclass
+class FileResult:
+    """Outcome for one input file (one entry in the JSON summary)."""
+
+    input: str
+    output: str | None = None
+    total_found: int = 0
+    valid_count: int = 0
+    invalid_count: int = 0
+    duplicates_removed: int = 0
+    elapsed_s: float = 0.0
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class BatchSummary:
+    """All per-file results plus run-level totals."""
+
+    files: list[FileResult] = field(default_factory=list)
+    workers: int = 1
+    elapsed_s: float = 0.0
+
+    @property
+    def failed(self) -> list[FileResult]:
+        return [f for f in self.files if not f.ok]
+
+    def to_dict(self) -> dict:
+        totals = {
+            "files": len(self.files),
+            "failed": len(self.failed),
+            "total_found": sum(f.total_found for f in self.files),
+            "valid_count": sum(f.valid_count for f in self.files),
+            "invalid_count": sum(f.invalid_count for f in self.files),
+            "duplicates_removed": sum(f.duplicates_removed for f in self.files),
+        }
+        return {
+            "workers": self.workers,
+            "elapsed_s": round(self.elapsed_s, 3),
+            "totals": totals,
+            "files": [asdict(f) for f in self.files],
+        }
+
+
+def discover_inputs(source: str | os.PathLike[str]) -> list[Path]:
+    """Return the supported code files in a directory or matching a glob.
+
+    A directory is scanned non-recursively; a glob may use ``**``.  Results
+    are sorted so output is reproducible.
+    """
+    path = Path(source)
+    if path.is_dir():
+        candidates = path.iterdir()
+    else:
+        candidates = (Path(p) for p in glob.glob(str(source), recursive=True))
+    return sorted(
+        p for p in candidates
+        if p.is_file() and p.suffix.lower() in SUPPORTED_EXTENSIONS
+    )
+
+
+def _output_names(inputs: Sequence[Path]) -> list[str]:
+    """``<stem>.sql`` per input, disambiguated when stems collide."""
+    stems = Counter(p.stem for p in inputs)
+    names: list[str] = []
+    seen: set[str] = set()
+    for p in inputs:
+        base = p.stem if stems[p.stem] == 1 else f"{p.stem}.{p.suffix.lstrip('.').lower()}"
+        name, n = f"{base}.sql", 1
+        while name in seen:
+            n += 1
+            name = f"{base}_{n}.sql"
+        seen.add(name)
+        names.append(name)
+    return names
+
+
+def _process_file(
+    input_path: str,
+    output_path: str,
+    refresh_family: str,
+    target_types: Sequence[str],
+    output_mode: str,
+    debug: bool,
+    dedupe: bool,
+    validation_pattern: str | None,
+    strict: bool,
+    max_codes: int | None,
+) -> FileResult:
+    """Parse one file and write its SQL.  Runs in a worker process."""
+    from .parsing import parse_codes
+    from .sql_builder import iter_sql_for_mode
+    from .sql_writer import write_sql
+
+    start = time.perf_counter()
+    result = FileResult(input=input_path)
+    try:
+        parsed = parse_codes(
+            Path(input_path).read_bytes(),
+            input_path,
+            dedupe=dedupe,
+            validation_pattern=validation_pattern,
+        )
+        result.total_found = parsed.total_found
+        result.valid_count = parsed.valid_count
+        result.invalid_count = parsed.invalid_count
+        result.duplicates_removed = parsed.duplicates_removed
+        if strict and parsed.invalid_codes:
+            raise ValueError(f"{parsed.invalid_count} invalid code(s) with strict validation")
+        fragments = iter_sql_for_mode(
+            parsed.valid_codes,
+            refresh_family,
+            target_types,
+            output_mode=output_mode,
+            debug=debug,
+            max_codes=max_codes,
+        )
+        with open(output_path, "w", encoding="utf-8", newline="\n") as fp:
+            write_sql(fragments, fp)
+            fp.write("\n")
+        result.output = output_path
+    except Exception as exc:
+        result.error = f"{type(exc).__name__}: {exc}"
+    result.elapsed_s = round(time.perf_counter() - start, 4)
+    return result
+
+
+def run_batch(
+    inputs: Sequence[str | os.PathLike[str]],
+    out_dir: str | os.PathLike[str],
+    *,
+    refresh_family: str,
+    target_types: Sequence[str],
+    output_mode: str = OUTPUT_SINGLE,
+    debug: bool = False,
+    dedupe: bool = True,
+    validation_pattern: str | None = None,
+    strict: bool = False,
+    max_codes: int | None = SQL_BATCH_MAX_CODES,
+    workers: int | None = None,
+    summary_path: str | os.PathLike[str] | None = None,
+) -> BatchSummary:
+    """Write one ``.sql`` per input file into *out_dir*, plus a JSON summary.
+
+    A file that fails to parse or build is recorded with its error and does
+    not stop the others.
+
+    Parameters
+    ----------
+    inputs:
+        Code files (see :func:`discover_inputs`).
+    out_dir:
+        Created if missing.
+    refresh_family, target_types, output_mode, debug, max_codes:
+        As for :func:`sql_builder.iter_sql_for_mode`.
+    dedupe, validation_pattern:
+        As for :func:`parsing.parse_codes`.
+    strict:
+        Fail a file (no ``.sql`` written) if it has any invalid code.
+    workers:
+        Process count; defaults to ``os.cpu_count()``.  Never more than the
+        number of inputs, and a single worker runs in-process.
+    summary_path:
+        Defaults to ``<out_dir>/summary.json``.
+    """
+    paths = [Path(p) for p in inputs]
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    n_workers = max(1, min(workers or os.cpu_count() or 1, len(paths) or 1))
+
+    jobs = [
+        (
+            str(p),
+            str(out / name),
+            refresh_family,
+            list(target_types),
+            output_mode,
+            debug,
+            dedupe,
+            validation_pattern,
+            strict,
+            max_codes,
+        )
+        for p, name in zip(paths, _output_names(paths))
+    ]
+
+    start = time.perf_counter()
+    if n_workers == 1:
+        results = [_process_file(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            results = list(pool.map(_process_file, *zip(*jobs)))
+    summary = BatchSummary(
+        files=results,
+        workers=n_workers,
+        elapsed_s=time.perf_counter() - start,
+    )
+
+    summary_file = Path(summary_path) if summary_path else out / SUMMARY_FILENAME
+    summary_file.write_text(json.dumps(summary.to_dict(), indent=2), encoding="utf-8")
+
+    logger.info(
+        "Batch: %d file(s), %d failed, %d worker(s), %.2fs",
+        len(results),
+        len(summary.failed),
+        n_workers,
+        summary.elapsed_s,
+    )
+    return summary
@@ -0,0 +1,426 @@
+"""Command-line interface: ``python -m api_refresh_builder``.
+
+Generates the same SQL as the dashboard without starting Streamlit, for
+scheduled jobs and shell pipelines.  Input files may be ``-`` for stdin;
+SQL goes to stdout unless ``-o`` is given, and parse statistics go to
+stderr.
+
+Exit codes: ``0`` success, ``1`` invalid input (unreadable file, no valid
+codes, strict validation failure, ...), ``2`` bad command-line usage.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator, Sequence, TextIO
+
+from . import __version__
+from .constants import (
+    CRM_REF_TABLE,
+    CRM_REF_TABLE_THRESHOLD,
+    DEFAULT_TARGET_TYPES,
+    OUTPUT_BATCHED,
+    OUTPUT_SINGLE,
+    OUTPUT_TEMP_TABLE,
+    REFRESH_FAMILIES,
+    SQL_BATCH_MAX_CODES,
+)
+from .sql_writer import write_sql
+
+logger = logging.getLogger(__name__)
+
+EXIT_OK = 0
+EXIT_INVALID = 1
+EXIT_USAGE = 2
+
+# --mode choices -> sql_builder output modes
+OUTPUT_MODE_CHOICES: dict[str, str] = {
+    "single": OUTPUT_SINGLE,
+    "batched": OUTPUT_BATCHED,
+    "temp-table": OUTPUT_TEMP_TABLE,
+}
+
+
+class CLIError(Exception):
+    """Invalid input; reported on stderr with exit code ``EXIT_INVALID``."""
+
+
+# ---------------------------------------------------------------------------
+# I/O helpers
+# ---------------------------------------------------------------------------
+
+def _read_input(path: str, fmt: str | None) -> tuple[bytes, str]:
+    """Return (bytes, filename) for *path*; ``-`` reads stdin.
+
+    The filename's extension picks the reader, so *fmt* overrides it (and
+    is required in practice for stdin, which defaults to CSV).
+    """
+    if path == "-":
+        return sys.stdin.buffer.read(), f"stdin.{fmt or 'csv'}"
+    try:
+        data = Path(path).read_bytes()
+    except OSError as exc:
+        raise CLIError(f"cannot read {path}: {exc.strerror}") from exc
+    return data, f"{path}.{fmt}" if fmt else path
+
+
+@contextmanager
+def _open_output(path: str | None) -> Iterator[TextIO]:
+    if path is None or path == "-":
+        yield sys.stdout
+        return
+    try:
+        fp = open(path, "w", encoding="utf-8", newline="\n")
+    except OSError as exc:
+        raise CLIError(f"cannot write {path}: {exc.strerror}") from exc
+    with fp:
+        yield fp
+
+
+def _emit(fragments: Iterable[str], output: str | None) -> None:
+    """Stream *fragments* to *output*, ending with a newline."""
+    with _open_output(output) as fp:
+        write_sql(fragments, fp)
+        fp.write("\n")
+
+
+def _split_csv(value: str) -> list[str]:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+# ---------------------------------------------------------------------------
+# refresh
+# ---------------------------------------------------------------------------
+
+def _cmd_refresh(args: argparse.Namespace) -> int:
+    from .parsing import parse_codes
+    from .sql_builder import iter_sql_for_mode
+
+    data, filename = _read_input(args.input, args.format)
+    try:
+        result = parse_codes(
+            data,
+            filename,
+            dedupe=args.dedupe,
+            validation_pattern=args.pattern,
+        )
+    except Exception as exc:
+        raise CLIError(f"failed to parse {args.input}: {exc}") from exc
+
+    print(
+        f"{result.total_found} found, {result.valid_count} valid, "
+        f"{result.invalid_count} invalid, {result.duplicates_removed} duplicates removed",
+        file=sys.stderr,
+    )
+    if args.strict and result.invalid_codes:
+        raise CLIError(
+            f"strict validation: {result.invalid_count} invalid code(s), "
+            f"e.g. {', '.join(result.invalid_codes[:10])}"
+        )
+    if not result.valid_codes:
+        raise CLIError("no valid codes found")
+
+    fragments = iter_sql_for_mode(
+        result.valid_codes,
+        args.family,
+        _split_csv(args.types),
+        output_mode=OUTPUT_MODE_CHOICES[args.mode],
+        debug=args.debug,
+        max_codes=args.batch_size,
+    )
+    _emit(fragments, args.output)
+    return EXIT_OK
+
+
+# ---------------------------------------------------------------------------
+# mapping
+# ---------------------------------------------------------------------------
+
+def _cmd_mapping(args: argparse.Namespace) -> int:
+    from .mapping_builder import build_bulk_all_steps, iter_all_steps
+
+    if args.file is not None:
+        if args.source_id or args.mapping_code or args.existing:
+            raise CLIError("--file cannot be combined with SOURCE_ID/MAPPING_CODE/--existing")
+        from .parsing import parse_mapping_pairs
+
+        data, filename = _read_input(args.file, args.format)
+        try:
+            pairs = parse_mapping_pairs(data, filename)
+        except Exception as exc:
+            raise CLIError(f"failed to parse {args.file}: {exc}") from exc
+        print(f"{len(pairs)} mapping pair(s)", file=sys.stderr)
+        _emit([build_bulk_all_steps(pairs)], args.output)
+        return EXIT_OK
+
+    if not args.source_id or not args.mapping_code:
+        raise CLIError("give SOURCE_ID and MAPPING_CODE, or --file")
+    _emit(
+        iter_all_steps(args.source_id, args.mapping_code, args.existing),
+        args.output,
+    )
+    return EXIT_OK
+
+
+# ---------------------------------------------------------------------------
+# crm
+# ---------------------------------------------------------------------------
+
+def _parse_assignments(assignments: Sequence[str]) -> dict[str, str]:
+    fields: dict[str, str] = {}
+    for item in assignments:
+        name, sep, value = item.partition("=")
+        if not sep:
+            raise CLIError(f"--set expects FIELD=VALUE, got {item!r}")
+        fields[name.strip()] = value.strip()
+    return fields
+
+
+def _iter_crm_bulk(
+    refs: Sequence[str],
+    update: Iterator[str],
+    use_ref_table: bool,
+) -> Iterator[str]:
+    """Pre-check, bulk UPDATE and post-check, laid out like ``iter_full_flow``."""
+    from .crm_builder import build_post_check, build_pre_check, build_ref_table_load
+
+    if use_ref_table:
+        yield f"-- Load refs into {CRM_REF_TABLE}\n"
+        yield build_ref_table_load(refs)
+        yield "\n\n"
+    yield "-- Pre-check: inspect current state\n"
+    yield build_pre_check(refs, use_ref_table=use_ref_table)
+    yield "\n\n-- UPDATE: apply amendments\n"
+    yield from update
+    yield "\n\n-- Post-check: verify changes\n"
+    yield build_post_check(refs, use_ref_table=use_ref_table)
+    if use_ref_table:
+        yield f"\n\nDROP TABLE {CRM_REF_TABLE};"
+
+
+def _cmd_crm(args: argparse.Namespace) -> int:
+    from .crm_builder import iter_bulk_update, iter_full_flow
+
+    if args.file is not None:
+        if args.refs is not None or args.set:
+            raise CLIError("--file cannot be combined with --refs/--set")
+        from .parsing import parse_amendments
+
+        data, filename = _read_input(args.file, args.format)
+        try:
+            amendments = parse_amendments(data, filename)
+        except Exception as exc:
+            raise CLIError(f"failed to parse {args.file}: {exc}") from exc
+        print(f"{len(amendments)} amendment row(s)", file=sys.stderr)
+        update = iter_bulk_update(amendments)
+        refs = list(amendments)
+        _emit(
+            _iter_crm_bulk(refs, update, len(refs) > CRM_REF_TABLE_THRESHOLD),
+            args.output,
+        )
+        return EXIT_OK
+
+    if args.refs is None or not args.set:
+        raise CLIError("give --refs and at least one --set FIELD=VALUE, or --file")
+    raw, _ = _read_input(args.refs, None)
+    refs = [r.strip() for r in raw.decode("utf-8-sig").splitlines() if r.strip()]
+    fields = _parse_assignments(args.set)
+    use_ref_table = (
+        len(refs) > CRM_REF_TABLE_THRESHOLD if args.ref_table is None else args.ref_table
+    )
+    _emit(iter_full_flow(refs, fields, use_ref_table=use_ref_table), args.output)
+    return EXIT_OK
+
+
+# ---------------------------------------------------------------------------
+# batch
+# ---------------------------------------------------------------------------
+
+def _cmd_batch(args: argparse.Namespace) -> int:
+    from .batch import discover_inputs, run_batch
+
+    inputs = discover_inputs(args.source)
+    if not inputs:
+        raise CLIError(f"no .csv/.xlsx/.xls files found for {args.source}")
+    summary = run_batch(
+        inputs,
+        args.out_dir,
+        refresh_family=args.family,
+        target_types=_split_csv(args.types),
+        output_mode=OUTPUT_MODE_CHOICES[args.mode],
+        debug=args.debug,
+        dedupe=args.dedupe,
+        validation_pattern=args.pattern,
+        strict=args.strict,
+        max_codes=args.batch_size,
+        workers=args.workers,
+        summary_path=args.summary,
+    )
+    for failed in summary.failed:
+        print(f"failed: {failed.input}: {failed.error}", file=sys.stderr)
+    print(
+        f"{len(summary.files) - len(summary.failed)}/{len(summary.files)} file(s) "
+        f"written to {args.out_dir} in {summary.elapsed_s:.2f}s "
+        f"({summary.workers} worker(s))",
+        file=sys.stderr,
+    )
+    return EXIT_INVALID if summary.failed else EXIT_OK
+
+
+# ---------------------------------------------------------------------------
+# serve
+# ---------------------------------------------------------------------------
+
+def _cmd_serve(args: argparse.Namespace) -> int:
+    try:
+        import uvicorn
+    except ImportError as exc:
+        raise CLIError(
+            "the HTTP service needs the 'service' extra: pip install .[service]"
+        ) from exc
+    uvicorn.run(
+        "api_refresh_builder.service:create_app",
+        factory=True,
+        host=args.host,
+        port=args.port,
+        log_level="info" if args.verbose else "warning",
+    )
+    return EXIT_OK
+
+
+# ---------------------------------------------------------------------------
+# Argument parsing
+# ---------------------------------------------------------------------------
+
+def _add_refresh_options(parser: argparse.ArgumentParser) -> None:
+    """Options shared by ``refresh`` and ``batch``."""
+    parser.add_argument("--family", choices=REFRESH_FAMILIES, required=True)
+    parser.add_argument(
+        "--types",
+        default=",".join(DEFAULT_TARGET_TYPES),
+        help="comma-separated target types (default: %(default)s)",
+    )
+    parser.add_argument("--debug", action="store_true", help="add @debug = 1")
+    parser.add_argument(
+        "--no-dedupe", dest="dedupe", action="store_false", help="keep duplicate codes"
+    )
+    parser.add_argument(
+        "--strict", action="store_true", help="fail if any code is invalid"
+    )
+    parser.add_argument("--pattern", help="override the code validation regex")
+    parser.add_argument(
+        "--mode",
+        choices=list(OUTPUT_MODE_CHOICES),
+        default="single",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=SQL_BATCH_MAX_CODES,
+        help="codes per EXEC in batched and temp-table mode (default: %(default)s)",
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m api_refresh_builder",
+        description="Generate API refresh, mapping and CRM amendment SQL.",
+    )
+    parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log to stderr")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    io_parent = argparse.ArgumentParser(add_help=False)
+    io_parent.add_argument(
+        "-o", "--output", help="write SQL to this file instead of stdout"
+    )
+    io_parent.add_argument(
+        "--format",
+        choices=["csv", "xlsx", "xls"],
+        help="input format (default: from the file extension; csv for stdin)",
+    )
+
+    refresh = sub.add_parser(
+        "refresh", parents=[io_parent], help="EXEC statement(s) for an entity-code file"
+    )
+    refresh.add_argument("input", help="codes file (.csv/.xlsx/.xls) or - for stdin")
+    _add_refresh_options(refresh)
+    refresh.set_defaults(func=_cmd_refresh)
+
+    batch = sub.add_parser(
+        "batch", help="refresh SQL for every code file in a directory, in parallel"
+    )
+    batch.add_argument("source", help="directory or glob of .csv/.xlsx/.xls files")
+    batch.add_argument("-d", "--out-dir", required=True, help="directory for the .sql files")
+    batch.add_argument(
+        "-j", "--workers", type=int, help="worker processes (default: CPU count)"
+    )
+    batch.add_argument(
+        "--summary", help="JSON summary path (default: OUT_DIR/summary.json)"
+    )
+    _add_refresh_options(batch)
+    batch.set_defaults(func=_cmd_batch)
+
+    mapping = sub.add_parser(
+        "mapping", parents=[io_parent], help="transaction-type mapping SQL"
+    )
+    mapping.add_argument("source_id", nargs="?", metavar="SOURCE_ID")
+    mapping.add_argument("mapping_code", nargs="?", metavar="MAPPING_CODE")
+    mapping.add_argument(
+        "--existing", help="existing config code to clone when MAPPING_CODE is missing"
+    )
+    mapping.add_argument(
+        "--file", help="bulk mode: sheet of source ID, mapping code rows (- for stdin)"
+    )
+    mapping.set_defaults(func=_cmd_mapping)
+
+    crm = sub.add_parser("crm", parents=[io_parent], help="CRM amendment SQL")
+    crm.add_argument("--refs", help="file of transaction refs, one per line (- for stdin)")
+    crm.add_argument(
+        "--set",
+        action="append",
+        default=[],
+        metavar="FIELD=VALUE",
+        help="field to update; repeat for several fields",
+    )
+    crm.add_argument(
+        "--ref-table",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help=f"join a #refs temp table (default: on above {CRM_REF_TABLE_THRESHOLD} refs)",
+    )
+    crm.add_argument(
+        "--file", help="bulk mode: sheet of ref, field columns (- for stdin)"
+    )
+    crm.set_defaults(func=_cmd_crm)
+
+    serve = sub.add_parser("serve", help="run the JSON HTTP service (ASGI)")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8000)
+    serve.set_defaults(func=_cmd_serve)
+
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Run the CLI and return the process exit code."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(levelname)s %(name)s: %(message)s",
+        stream=sys.stderr,
+    )
+    try:
+        return args.func(args)
+    except (CLIError, ValueError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return EXIT_INVALID
+    except BrokenPipeError:
+        # Downstream closed the pipe (e.g. ``| head``); not an error for us.
+        sys.stderr.close()
+        return EXIT_OK
@@ -0,0 +1,152 @@
+"""Compact storage for long lists of codes.
+
+A :class:`CodeList` keeps its codes in one ``str`` pool plus an offsets
+array instead of one ``str`` object per code (about 50 bytes of object
+header) and an 8-byte list slot.  Several lists can share a pool and pick
+their codes with an index array, so a parse result stores each code's text
+once however many views refer to it.
+
+numpy is imported only by the functions that build or read a pool, so
+importing this module stays cheap.
+"""
+
+from __future__ import annotations
+
+import sys
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, Iterable, Iterator, overload
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Codes materialised per step while iterating.
+_ITER_BLOCK: int = 65_536
+
+
+def index_dtype(size: int) -> np.dtype:
+    """Smallest signed integer dtype (int32 or int64) holding values up to *size*."""
+    import numpy as np
+
+    return np.dtype(np.int32 if size < 2**31 else np.int64)
+
+
+class CodeList(Sequence[str]):
+    """Read-only sequence of codes backed by a shared string pool.
+
+    Code ``j`` of the pool is ``pool[offsets[j]:offsets[j + 1]]``; the list
+    holds the pool codes named by *index* (all of them, in order, when
+    *index* is ``None``).
+
+    Supports ``len``, indexing, iteration and ``==`` with any list or tuple.
+    Slicing returns a plain ``list[str]``.  Use ``list()`` or :meth:`tolist`
+    when a real list is needed.
+    """
+
+    __slots__ = ("_pool", "_offsets", "_index")
+
+    def __init__(self, pool: str, offsets: np.ndarray, index: np.ndarray | None = None) -> None:
+        self._pool = pool
+        self._offsets = offsets
+        self._index = index
+
+    @classmethod
+    def from_strings(cls, codes: Iterable[str]) -> CodeList:
+        """Pack *codes* into a new pool."""
+        import numpy as np
+
+        values = codes if isinstance(codes, list) else list(codes)
+        pool = "".join(values)
+        offsets = np.zeros(len(values) + 1, dtype=index_dtype(len(pool)))
+        np.cumsum(
+            np.fromiter(map(len, values), dtype=np.int64, count=len(values)),
+            out=offsets[1:],
+        )
+        return cls(pool, offsets)
+
+    def select(self, index: np.ndarray) -> CodeList:
+        """A view of this list's codes at positions *index* (same pool)."""
+        if self._index is not None:
+            index = self._index[index]
+        return CodeList(self._pool, self._offsets, index)
+
+    # -- Sequence protocol ---------------------------------------------------
+
+    def __len__(self) -> int:
+        if self._index is not None:
+            return len(self._index)
+        return len(self._offsets) - 1
+
+    @overload
+    def __getitem__(self, i: int) -> str: ...
+
+    @overload
+    def __getitem__(self, i: slice) -> list[str]: ...
+
+    def __getitem__(self, i: int | slice) -> str | list[str]:
+        if isinstance(i, slice):
+            start, stop, step = i.indices(len(self))
+            if step != 1:
+                return [self[k] for k in range(start, stop, step)]
+            return self._materialize(start, stop)
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("CodeList index out of range")
+        j = int(self._index[i]) if self._index is not None else i
+        return self._pool[int(self._offsets[j]):int(self._offsets[j + 1])]
+
+    def __iter__(self) -> Iterator[str]:
+        n = len(self)
+        for start in range(0, n, _ITER_BLOCK):
+            yield from self._materialize(start, min(start + _ITER_BLOCK, n))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, (CodeList, list, tuple)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        head = self[:5]
+        more = f", ... ({len(self):,} codes)" if len(self) > 5 else ""
+        return f"CodeList({head!r}{more})"
+
+    # -- Helpers ---------------------------------------------------------------
+
+    def _materialize(self, start: int, stop: int) -> list[str]:
+        if start >= stop:
+            return []
+        pool = self._pool
+        if self._index is None:
+            bounds = self._offsets[start:stop + 1].tolist()
+            return [pool[a:b] for a, b in zip(bounds, bounds[1:])]
+        sel = self._index[start:stop]
+        starts = self._offsets[sel].tolist()
+        ends = self._offsets[sel + 1].tolist()
+        return [pool[a:b] for a, b in zip(starts, ends)]
+
+    def tolist(self) -> list[str]:
+        return self._materialize(0, len(self))
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the pool, offsets and index (shared parts included)."""
+        size = sys.getsizeof(self._pool) + self._offsets.nbytes
+        if self._index is not None:
+            size += self._index.nbytes
+        return size
+
+
+def shared_nbytes(*code_lists: CodeList) -> int:
+    """Bytes held by *code_lists* together, counting shared buffers once."""
+    parts: dict[int, object] = {}
+    for codes in code_lists:
+        for part in (codes._pool, codes._offsets, codes._index):
+            if part is not None:
+                parts[id(part)] = part
+    return sum(
+        sys.getsizeof(part) if isinstance(part, str) else part.nbytes
+        for part in parts.values()
+    )
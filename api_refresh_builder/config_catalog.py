@@ -0,0 +1,180 @@
+"""Local catalog of the IMIX transaction-type Config table.
+
+Loaded from a CSV/XLSX export of ``MAPPING_CONFIG_TABLE`` and kept as an
+in-memory index keyed on ``TransactionTypeExternal``.  The catalog can be
+persisted to a small SQLite file so it survives app restarts without
+re-uploading the export.
+
+SQL Server compares codes case-insensitively under the default collation,
+so lookups here do too.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator, Mapping
+
+from .constants import (
+    CONFIG_CATALOG_PATH,
+    CONFIG_COLUMNS,
+    SUGGEST_DESCRIPTION_WEIGHT,
+    SUGGEST_TOP_K,
+)
+from .parsing import read_table
+
+if TYPE_CHECKING:
+    from .similarity import TrigramIndex
+
+logger = logging.getLogger(__name__)
+
+_KEY_COLUMN = CONFIG_COLUMNS[0]  # TransactionTypeExternal
+_DESCRIPTION_COLUMN = "TDW_Description"
+
+
+class ConfigCatalog:
+    """Indexed, read-only view of Config-table rows."""
+
+    def __init__(self, rows: Iterable[Mapping[str, str]]) -> None:
+        self._rows: dict[str, dict[str, str]] = {}
+        for row in rows:
+            code = (row.get(_KEY_COLUMN) or "").strip()
+            if not code:
+                continue
+            self._rows.setdefault(
+                code.casefold(),
+                {col: (row.get(col) or "").strip() for col in CONFIG_COLUMNS},
+            )
+        self._index_rows: list[dict[str, str]] = []
+        self._code_index: TrigramIndex | None = None
+        self._description_index: TrigramIndex | None = None
+        logger.info("Config catalog holds %d code(s)", len(self._rows))
+
+    # -- Lookup ------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, code: object) -> bool:
+        return isinstance(code, str) and code.strip().casefold() in self._rows
+
+    def __iter__(self) -> Iterator[dict[str, str]]:
+        return iter(self._rows.values())
+
+    def get(self, code: str) -> dict[str, str] | None:
+        """Return the Config row for *code*, or ``None`` if it is not present."""
+        return self._rows.get(code.strip().casefold())
+
+    def missing(self, codes: Iterable[str]) -> list[str]:
+        """Return the codes from *codes* that are not in the catalog, in order."""
+        unique = dict.fromkeys(c.strip() for c in codes if c and c.strip())
+        return [c for c in unique if c not in self]
+
+    # -- Similarity ----------------------------------------------------------
+
+    def suggest(
+        self,
+        code: str,
+        k: int = SUGGEST_TOP_K,
+    ) -> list[tuple[str, float]]:
+        """Return up to *k* ``(existing_code, score)`` pairs most similar to *code*.
+
+        *code* is compared by trigram similarity against every
+        ``TransactionTypeExternal`` and ``TDW_Description``; description
+        matches are down-weighted by ``SUGGEST_DESCRIPTION_WEIGHT``.  The
+        trigram indexes are built on first use.  An exact match for *code*
+        itself is never suggested.
+        """
+        if not code or not code.strip() or not self._rows:
+            return []
+
+        import numpy as np
+
+        from .similarity import TrigramIndex
+
+        if self._code_index is None or self._description_index is None:
+            self._index_rows = list(self._rows.values())
+            self._code_index = TrigramIndex(r[_KEY_COLUMN] for r in self._index_rows)
+            self._description_index = TrigramIndex(
+                r[_DESCRIPTION_COLUMN] for r in self._index_rows
+            )
+        rows = self._index_rows
+
+        scores = np.maximum(
+            self._code_index.scores(code),
+            self._description_index.scores(code) * SUGGEST_DESCRIPTION_WEIGHT,
+        )
+        # One spare candidate in case the exact match is among the top k.
+        target = code.strip().casefold()
+        n = min(k + 1, len(rows))
+        top = np.argpartition(-scores, n - 1)[:n]
+        ranked = sorted(
+            (
+                (rows[i][_KEY_COLUMN], float(scores[i]))
+                for i in top
+                if scores[i] > 0 and rows[i][_KEY_COLUMN].casefold() != target
+            ),
+            key=lambda item: (-item[1], item[0]),
+        )
+        return ranked[:k]
+
+    # -- Loading / persistence ---------------------------------------------
+
+    @classmethod
+    def from_file(cls, file_bytes: bytes, filename: str) -> ConfigCatalog:
+        """Build a catalog from a CSV/XLSX export of the Config table.
+
+        Only ``CONFIG_COLUMNS`` are kept; the ``TransactionTypeExternal``
+        column is required.
+        """
+        df = read_table(file_bytes, filename)
+        if _KEY_COLUMN not in df.columns:
+            raise ValueError(
+                f"Config export must contain a '{_KEY_COLUMN}' column."
+            )
+        keep = [c for c in CONFIG_COLUMNS if c in df.columns]
+        return cls(df[keep].to_dict(orient="records"))
+
+    def save(self, path: str | os.PathLike[str] = CONFIG_CATALOG_PATH) -> Path:
+        """Write the catalog to a SQLite file (atomically replaced)."""
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(target.name + ".tmp")
+        tmp.unlink(missing_ok=True)
+
+        col_defs = ", ".join(
+            f"{c} TEXT NOT NULL" + (" COLLATE NOCASE PRIMARY KEY" if c == _KEY_COLUMN else "")
+            for c in CONFIG_COLUMNS
+        )
+        placeholders = ", ".join("?" for _ in CONFIG_COLUMNS)
+        conn = sqlite3.connect(tmp)
+        try:
+            with conn:
+                conn.execute(f"CREATE TABLE config ({col_defs})")
+                conn.executemany(
+                    f"INSERT INTO config ({', '.join(CONFIG_COLUMNS)}) VALUES ({placeholders})",
+                    ([row[c] for c in CONFIG_COLUMNS] for row in self),
+                )
+        finally:
+            conn.close()
+        os.replace(tmp, target)
+        logger.info("Saved config catalog (%d codes) to %s", len(self), target)
+        return target
+
+    @classmethod
+    def load(cls, path: str | os.PathLike[str] = CONFIG_CATALOG_PATH) -> ConfigCatalog | None:
+        """Load a catalog saved with :meth:`save`; ``None`` if no file exists."""
+        source = Path(path)
+        if not source.is_file():
+            return None
+        # as_uri() percent-encodes '?', '#' and '%' that would otherwise be
+        # read as URI syntax.
+        conn = sqlite3.connect(f"{source.resolve().as_uri()}?mode=ro", uri=True)
+        try:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(f"SELECT {', '.join(CONFIG_COLUMNS)} FROM config").fetchall()
+        finally:
+            conn.close()
+        return cls(dict(r) for r in rows)
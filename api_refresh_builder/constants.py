@@ -18,6 +18,20 @@ STORED_PROCEDURES: dict[str, str] = {
 
 REFRESH_FAMILIES: list[str] = list(STORED_PROCEDURES.keys())
 
+# Batched EXEC generation (one statement per batch, separated by GO)
+SQL_BATCH_MAX_CODES: int = 5_000
+SQL_BATCH_SEPARATOR: str = "GO"
+
+# Temp-table load mode (SQL Server caps a VALUES list at 1000 rows)
+TEMP_TABLE_NAME: str = "#codes"
+SQL_VALUES_MAX_ROWS: int = 1_000
+
+# API Refresh output modes
+OUTPUT_SINGLE: str = "Single EXEC"
+OUTPUT_BATCHED: str = "Batched EXECs (GO-separated)"
+OUTPUT_TEMP_TABLE: str = "Temp table load (#codes)"
+OUTPUT_MODES: list[str] = [OUTPUT_SINGLE, OUTPUT_BATCHED, OUTPUT_TEMP_TABLE]
+
 # ---------------------------------------------------------------------------
 # Default TargetTypes (order matters – custom types appended after these)
 # ---------------------------------------------------------------------------
@@ -34,6 +48,22 @@ DEFAULT_TARGET_TYPES: list[str] = [
 # ---------------------------------------------------------------------------
 CODE_PATTERN: re.Pattern[str] = re.compile(r"^[A-Za-z0-9_\-]+$")
 
+# ---------------------------------------------------------------------------
+# Parsing
+# ---------------------------------------------------------------------------
+CSV_CHUNK_ROWS: int = 100_000
+
+# Parse cache (content-addressed, shared across Streamlit reruns)
+PARSE_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+PARSE_CACHE_MAX_ENTRIES: int = 16
+
+# Background parse worker
+PARSE_WORKERS: int = 2
+PARSE_POLL_SECONDS: float = 0.5
+# How long a rerun waits for a fresh job before showing progress, so small
+# uploads come back in the same run.
+PARSE_WAIT_SECONDS: float = 0.25
+
 # ---------------------------------------------------------------------------
 # Mapping workflow
 # ---------------------------------------------------------------------------
@@ -43,6 +73,9 @@ MAPPING_CONFIG_TABLE: str = (
 )
 MAPPING_PROC: str = "Aurora.IMIX.TransactionTypes_InsertMap"
 
+# Bulk mapping: EXECs per transaction (each chunk is committed and GO-separated)
+MAPPING_BULK_CHUNK: int = 500
+
 CONFIG_COLUMNS: list[str] = [
     "TransactionTypeExternal",
     "TransactionType",
@@ -52,12 +85,27 @@ CONFIG_COLUMNS: list[str] = [
     "TDW_SourceTable",
 ]
 
+# Local SQLite cache of a Config-table export (see config_catalog.py)
+CONFIG_CATALOG_PATH: str = ".cache/config_catalog.sqlite"
+
+# Closest-code suggestions for config cloning
+SUGGEST_TOP_K: int = 5
+SUGGEST_DESCRIPTION_WEIGHT: float = 0.8
+
 # ---------------------------------------------------------------------------
 # CRM Amendments workflow
 # ---------------------------------------------------------------------------
 CRM_TRANSACTIONS_TABLE: str = "ClientTransactions.mba.transactions"
 CRM_CONTRIBUTIONS_TABLE: str = "ClientTransactions.mba.transactions_contribution"
 
+# Temp table joined instead of IN (...) lists; the page defaults to it above
+# the threshold.
+CRM_REF_TABLE: str = "#refs"
+CRM_REF_TABLE_THRESHOLD: int = 100
+# Width of #refs.ref (an indexed key, so it cannot be NVARCHAR(MAX)); longer
+# refs are rejected up front rather than failing the load script.
+CRM_REF_MAX_LEN: int = 100
+
 CRM_UPDATABLE_FIELDS: list[str] = [
     "Narrative2",
     "TransactionTypeExternal",
@@ -67,3 +115,21 @@ CRM_UPDATABLE_FIELDS: list[str] = [
 # UI defaults
 # ---------------------------------------------------------------------------
 PREVIEW_COUNT: int = 25
+
+# Generated SQL kept per builder so fragment reruns skip unchanged builds.
+SQL_MEMO_ENTRIES: int = 8
+
+# SQL larger than this is shown as a head/tail preview with a download
+# button instead of a full code block and an inline JS clipboard payload.
+SQL_LARGE_OUTPUT_CHARS: int = 200_000
+SQL_PREVIEW_HEAD_CHARS: int = 20_000
+SQL_PREVIEW_TAIL_CHARS: int = 5_000
+
+# ---------------------------------------------------------------------------
+# Rerun profiling (opt-in, see profiling.py)
+# ---------------------------------------------------------------------------
+PROFILE_DIR: str = ".cache/profiles"
+# Only the most recent profiled reruns are kept on disk.
+PROFILE_KEEP: int = 50
+# Functions listed in each hotspot table.
+PROFILE_TOP_N: int = 30
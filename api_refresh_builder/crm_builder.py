@@ -1,52 +1,164 @@
 """SQL generators for the CRM Amendments workflow.
 
 Generates pre-check SELECTs, UPDATE statements, and post-check SELECTs
-for ClientTransactions.mba transaction amendments.
+for ClientTransactions.mba transaction amendments.  :func:`iter_full_flow`
+streams the full flow as string fragments for very long ref lists.
 """
 
 from __future__ import annotations
 
 import logging
-from typing import Mapping, Sequence
+import re
+from typing import Iterator, Mapping, Sequence
 
-from .constants import CRM_CONTRIBUTIONS_TABLE, CRM_TRANSACTIONS_TABLE
+from .constants import (
+    CRM_CONTRIBUTIONS_TABLE,
+    CRM_REF_MAX_LEN,
+    CRM_REF_TABLE,
+    CRM_TRANSACTIONS_TABLE,
+    SQL_VALUES_MAX_ROWS,
+)
+from .instrumentation import instrumented
 
 logger = logging.getLogger(__name__)
 
 
-def _clean_refs(refs: Sequence[str]) -> list[str]:
-    """Strip whitespace and drop blanks. Raises on empty result."""
+def _clean_refs(refs: Sequence[str], *, ref_table: bool = False) -> list[str]:
+    """Strip whitespace and drop blanks. Raises on empty result.
+
+    With *ref_table* the refs are going into ``#refs``, so any longer than
+    its key column (``CRM_REF_MAX_LEN``) also raise.
+    """
     cleaned = [r.strip() for r in refs if r and r.strip()]
     if not cleaned:
         raise ValueError("At least one transaction reference is required.")
+    if not ref_table:
+        return cleaned
+    too_long = [r for r in cleaned if len(r) > CRM_REF_MAX_LEN]
+    if too_long:
+        raise ValueError(
+            f"{len(too_long)} transaction reference(s) longer than "
+            f"{CRM_REF_MAX_LEN} characters, e.g. {too_long[0][:40]}..."
+        )
     return cleaned
 
 
-def _ref_in_clause(refs: Sequence[str]) -> str:
-    """Build a SQL ``IN (...)`` value list from refs."""
-    return ", ".join(f"'{r}'" for r in refs)
+# Refs quoted per yielded fragment when streaming an IN list.
+_FRAGMENT_REFS: int = 1_000
 
 
-def _build_select_block(refs: Sequence[str]) -> str:
-    """Two SELECT statements: one against transactions, one against contributions."""
-    in_clause = _ref_in_clause(refs)
-    return (
-        f"SELECT *\n"
-        f"FROM {CRM_TRANSACTIONS_TABLE}\n"
-        f"WHERE ref IN ({in_clause});\n"
-        f"\n"
-        f"SELECT *\n"
-        f"FROM {CRM_CONTRIBUTIONS_TABLE}\n"
-        f"WHERE ref IN ({in_clause});"
+def _iter_ref_in_clause(refs: Sequence[str]) -> Iterator[str]:
+    """Yield the ``IN (...)`` value list in pieces of ``_FRAGMENT_REFS`` refs."""
+    for start in range(0, len(refs), _FRAGMENT_REFS):
+        piece = ", ".join(f"'{r}'" for r in refs[start:start + _FRAGMENT_REFS])
+        yield piece if start == 0 else ", " + piece
+
+
+# ---------------------------------------------------------------------------
+# Ref table: load refs once into #refs and join against it
+# ---------------------------------------------------------------------------
+
+def _iter_ref_table_load(refs: Sequence[str]) -> Iterator[str]:
+    table = CRM_REF_TABLE
+    yield (
+        f"IF OBJECT_ID('tempdb..{table}') IS NOT NULL DROP TABLE {table};\n"
+        f"CREATE TABLE {table} "
+        f"(ref NVARCHAR({CRM_REF_MAX_LEN}) COLLATE DATABASE_DEFAULT NOT NULL PRIMARY KEY);\n"
     )
+    unique = list(dict.fromkeys(refs))
+    for start in range(0, len(unique), SQL_VALUES_MAX_ROWS):
+        rows = ",\n".join(
+            f"    ('{r}')" for r in unique[start:start + SQL_VALUES_MAX_ROWS]
+        )
+        yield f"\nINSERT INTO {table} (ref) VALUES\n{rows};"
+
+
+@instrumented(rows_arg=0)
+def build_ref_table_load(refs: Sequence[str]) -> str:
+    """Generate the SQL that loads *refs* into the ``#refs`` temp table.
+
+    Run this once in the SSMS session before any statement built with
+    ``use_ref_table=True``.  Duplicate refs are dropped (the column is the
+    primary key) and inserts are batched at the 1000-row VALUES limit.
+    The column takes the current database's collation rather than tempdb's,
+    so the joins compare refs the same way the ``ref`` columns do.
+    """
+    return "".join(_iter_ref_table_load(_clean_refs(refs, ref_table=True)))
+
 
+def _iter_select_block(refs: Sequence[str], use_ref_table: bool = False) -> Iterator[str]:
+    """Two SELECT statements: one against transactions, one against contributions."""
+    if use_ref_table:
+        for i, table in enumerate((CRM_TRANSACTIONS_TABLE, CRM_CONTRIBUTIONS_TABLE)):
+            if i:
+                yield "\n\n"
+            yield (
+                f"SELECT t.*\n"
+                f"FROM {table} t\n"
+                f"JOIN {CRM_REF_TABLE} r ON r.ref = t.ref;"
+            )
+        return
+    yield f"SELECT *\nFROM {CRM_TRANSACTIONS_TABLE}\nWHERE ref IN ("
+    yield from _iter_ref_in_clause(refs)
+    yield f");\n\nSELECT *\nFROM {CRM_CONTRIBUTIONS_TABLE}\nWHERE ref IN ("
+    yield from _iter_ref_in_clause(refs)
+    yield ");"
 
-def build_pre_check(refs: Sequence[str]) -> str:
-    """Generate pre-check SELECT queries for the given transaction refs."""
-    return _build_select_block(_clean_refs(refs))
+
+def _build_select_block(refs: Sequence[str], use_ref_table: bool = False) -> str:
+    """Two SELECT statements: one against transactions, one against contributions."""
+    return "".join(_iter_select_block(refs, use_ref_table))
+
+
+@instrumented(rows_arg=0)
+def build_pre_check(refs: Sequence[str], *, use_ref_table: bool = False) -> str:
+    """Generate pre-check SELECT queries for the given transaction refs.
+
+    With *use_ref_table* the queries join ``#refs`` (see
+    :func:`build_ref_table_load`) instead of inlining an ``IN`` list.
+    """
+    return _build_select_block(_clean_refs(refs), use_ref_table)
 
 
-def build_update(refs: Sequence[str], fields: Mapping[str, str]) -> str:
+def _clean_fields(fields: Mapping[str, str]) -> dict[str, str]:
+    """Strip column names and values, drop blanks. Raises on empty result."""
+    cleaned_fields: dict[str, str] = {}
+    for col, val in fields.items():
+        c = col.strip()
+        v = val.strip()
+        if c and v:
+            cleaned_fields[c] = v
+    if not cleaned_fields:
+        raise ValueError("At least one field/value pair is required.")
+    return cleaned_fields
+
+
+def _iter_update(
+    refs: Sequence[str],
+    fields: Mapping[str, str],
+    use_ref_table: bool = False,
+) -> Iterator[str]:
+    set_clauses = ",\n    ".join(f"{col} = '{val}'" for col, val in fields.items())
+    if use_ref_table:
+        yield (
+            f"UPDATE t\n"
+            f"SET {set_clauses}\n"
+            f"FROM {CRM_TRANSACTIONS_TABLE} t\n"
+            f"JOIN {CRM_REF_TABLE} r ON r.ref = t.ref;"
+        )
+        return
+    yield f"UPDATE {CRM_TRANSACTIONS_TABLE}\nSET {set_clauses}\nWHERE ref IN ("
+    yield from _iter_ref_in_clause(refs)
+    yield ");"
+
+
+@instrumented(rows_arg=0)
+def build_update(
+    refs: Sequence[str],
+    fields: Mapping[str, str],
+    *,
+    use_ref_table: bool = False,
+) -> str:
     """Generate an UPDATE statement setting *fields* on the given refs.
 
     Parameters
@@ -56,46 +168,181 @@ def build_update(refs: Sequence[str], fields: Mapping[str, str]) -> str:
     fields:
         Column-name -> value pairs to SET
         (e.g. ``{"Narrative2": "Employer Contribution"}``).
+    use_ref_table:
+        Join ``#refs`` instead of inlining an ``IN`` list.
     """
     cleaned_refs = _clean_refs(refs)
+    cleaned_fields = _clean_fields(fields)
+    return "".join(_iter_update(cleaned_refs, cleaned_fields, use_ref_table))
 
-    cleaned_fields: dict[str, str] = {}
-    for col, val in fields.items():
-        c = col.strip()
-        v = val.strip()
-        if c and v:
-            cleaned_fields[c] = v
-    if not cleaned_fields:
-        raise ValueError("At least one field/value pair is required.")
 
-    set_clauses = ",\n    ".join(
-        f"{col} = '{val}'" for col, val in cleaned_fields.items()
+@instrumented(rows_arg=0)
+def build_post_check(refs: Sequence[str], *, use_ref_table: bool = False) -> str:
+    """Generate post-check SELECT queries (identical SQL to pre-check)."""
+    return _build_select_block(_clean_refs(refs), use_ref_table)
+
+
+def _iter_full_flow(
+    refs: Sequence[str],
+    fields: Mapping[str, str],
+    use_ref_table: bool = False,
+) -> Iterator[str]:
+    if use_ref_table:
+        yield f"-- Load refs into {CRM_REF_TABLE}\n"
+        yield from _iter_ref_table_load(refs)
+        yield "\n\n"
+    yield "-- Pre-check: inspect current state\n"
+    yield from _iter_select_block(refs, use_ref_table)
+    yield "\n\n-- UPDATE: apply amendments\n"
+    yield from _iter_update(refs, fields, use_ref_table)
+    yield "\n\n-- Post-check: verify changes\n"
+    yield from _iter_select_block(refs, use_ref_table)
+    if use_ref_table:
+        yield f"\n\nDROP TABLE {CRM_REF_TABLE};"
+
+
+def iter_full_flow(
+    refs: Sequence[str],
+    fields: Mapping[str, str],
+    *,
+    use_ref_table: bool = False,
+) -> Iterator[str]:
+    """Stream the :func:`build_full_flow` script as string fragments.
+
+    Inputs are validated eagerly, before the first fragment is requested.
+    """
+    return _iter_full_flow(
+        _clean_refs(refs, ref_table=use_ref_table), _clean_fields(fields), use_ref_table
     )
-    in_clause = _ref_in_clause(cleaned_refs)
 
-    return (
-        f"UPDATE {CRM_TRANSACTIONS_TABLE}\n"
-        f"SET {set_clauses}\n"
-        f"WHERE ref IN ({in_clause});"
+
+@instrumented(rows_arg=0)
+def build_full_flow(
+    refs: Sequence[str],
+    fields: Mapping[str, str],
+    *,
+    use_ref_table: bool = False,
+) -> str:
+    """Concatenate pre-check, UPDATE, and post-check with comment headers.
+
+    With *use_ref_table* the refs are loaded once into ``#refs`` at the top
+    of the script, every statement joins against it, and the table is
+    dropped at the end.  Statement text no longer grows with the ref count,
+    so SQL Server compile time stays flat.
+    """
+    return "".join(iter_full_flow(refs, fields, use_ref_table=use_ref_table))
+
+
+# ---------------------------------------------------------------------------
+# Bulk amendments: per-ref values via UPDATE ... FROM (VALUES ...)
+# ---------------------------------------------------------------------------
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _sql_value(val: str | None) -> str:
+    """Quote *val* as an N'...' literal (doubling quotes), or ``NULL``."""
+    if val is None:
+        return "NULL"
+    escaped = val.replace("'", "''")
+    return f"N'{escaped}'"
+
+
+def _clean_amendments(
+    amendments: Mapping[str, Mapping[str, str]],
+) -> tuple[dict[str, dict[str, str]], list[str]]:
+    """Strip refs/fields/values, drop blanks; return (rows, field order)."""
+    rows: dict[str, dict[str, str]] = {}
+    columns: dict[str, None] = {}
+    for ref, fields in amendments.items():
+        r = ref.strip() if ref else ""
+        if not r:
+            continue
+        cleaned = {
+            col.strip(): val.strip()
+            for col, val in fields.items()
+            if col and col.strip() and val and val.strip()
+        }
+        if not cleaned:
+            continue
+        rows[r] = cleaned
+        columns.update(dict.fromkeys(cleaned))
+
+    if not rows:
+        raise ValueError("At least one transaction reference with a field value is required.")
+
+    bad = [c for c in columns if not _IDENTIFIER.match(c) or c.lower() == "ref"]
+    if bad:
+        raise ValueError(f"Invalid field name(s): {', '.join(bad)}")
+    return rows, list(columns)
+
+
+def _iter_bulk_update(
+    rows: dict[str, dict[str, str]],
+    columns: Sequence[str],
+    chunk_size: int,
+) -> Iterator[str]:
+    set_clauses = ",\n    ".join(
+        f"t.{col} = COALESCE(CAST(v.{col} AS NVARCHAR(MAX)), t.{col})"
+        for col in columns
     )
+    col_list = ", ".join(["ref", *columns])
+    items = list(rows.items())
+    for start in range(0, len(items), chunk_size):
+        if start:
+            yield "\n\n"
+        values = ",\n".join(
+            "    ("
+            + ", ".join([_sql_value(ref), *(_sql_value(f.get(c)) for c in columns)])
+            + ")"
+            for ref, f in items[start:start + chunk_size]
+        )
+        yield (
+            f"UPDATE t\n"
+            f"SET {set_clauses}\n"
+            f"FROM {CRM_TRANSACTIONS_TABLE} t\n"
+            f"JOIN (VALUES\n"
+            f"{values}\n"
+            f") v ({col_list})\n"
+            f"    ON t.ref = v.ref;"
+        )
 
 
-def build_post_check(refs: Sequence[str]) -> str:
-    """Generate post-check SELECT queries (identical SQL to pre-check)."""
-    return _build_select_block(_clean_refs(refs))
-
-
-def build_full_flow(refs: Sequence[str], fields: Mapping[str, str]) -> str:
-    """Concatenate pre-check, UPDATE, and post-check with comment headers."""
-    cleaned = _clean_refs(refs)
-    parts: list[str] = [
-        "-- Pre-check: inspect current state",
-        build_pre_check(cleaned),
-        "",
-        "-- UPDATE: apply amendments",
-        build_update(cleaned, fields),
-        "",
-        "-- Post-check: verify changes",
-        build_post_check(cleaned),
-    ]
-    return "\n".join(parts)
+def iter_bulk_update(
+    amendments: Mapping[str, Mapping[str, str]],
+    *,
+    chunk_size: int = SQL_VALUES_MAX_ROWS,
+) -> Iterator[str]:
+    """Stream the :func:`build_bulk_update` statements as string fragments."""
+    if not 1 <= chunk_size <= SQL_VALUES_MAX_ROWS:
+        raise ValueError(f"chunk_size must be between 1 and {SQL_VALUES_MAX_ROWS}.")
+    rows, columns = _clean_amendments(amendments)
+    return _iter_bulk_update(rows, columns, chunk_size)
+
+
+@instrumented(rows_arg=0)
+def build_bulk_update(
+    amendments: Mapping[str, Mapping[str, str]],
+    *,
+    chunk_size: int = SQL_VALUES_MAX_ROWS,
+) -> str:
+    """Generate set-based UPDATEs applying different values to each ref.
+
+    Each statement joins the transactions table to a ``VALUES`` table of
+    at most *chunk_size* rows (SQL Server allows 1000).  A ref that has no
+    value for a field gets ``NULL`` in the VALUES row and keeps its current
+    value via ``COALESCE``.  The ``CAST`` guards against SQL Server typing an
+    all-``NULL`` VALUES column as ``INT``.  Values are emitted as ``N'...'``
+    literals with embedded quotes doubled.
+
+    Parameters
+    ----------
+    amendments:
+        Ref -> {column-name: value} (e.g. from
+        :func:`parsing.parse_amendments`).
+    chunk_size:
+        Maximum VALUES rows per UPDATE statement.
+    """
+    sql = "".join(iter_bulk_update(amendments, chunk_size=chunk_size))
+    logger.info("Generated bulk UPDATE for %d ref(s)", len(amendments))
+    return sql
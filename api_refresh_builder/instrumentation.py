@@ -0,0 +1,292 @@
+"""Opt-in per-stage timing and memory instrumentation.
+
+Off by default.  Set ``API_REFRESH_PERF=1`` to record stage durations and
+row counts, or ``API_REFRESH_PERF=memory`` to also record the tracemalloc
+peak of each stage (this slows every allocation, so use it only while
+diagnosing).  :func:`configure` does the same at runtime.
+
+When disabled, :func:`new_timings` and :func:`collect` give ``None``,
+:func:`stage` returns a shared no-op context manager and
+:func:`instrumented` functions call straight through, so nothing is timed,
+stored or logged.
+
+Recorded stages are emitted as one structured log record per
+:class:`Timings` on the ``api_refresh_builder.perf`` logger; the record's
+``perf`` attribute holds the label and stage list for log formatters that
+serialise extras.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import functools
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, ContextManager, Iterable, Iterator, TypeVar
+
+ENV_VAR = "API_REFRESH_PERF"
+
+perf_logger = logging.getLogger("api_refresh_builder.perf")
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+_T = TypeVar("_T")
+
+_enabled: bool = False
+_memory: bool = False
+
+# Timings that instrumented functions record into (set by :func:`collect`).
+_current: contextvars.ContextVar[Timings | None] = contextvars.ContextVar(
+    "perf_timings", default=None
+)
+
+# Per-thread running peaks of the enclosing stages, so nested stages do not
+# lose their parent's peak when they reset the tracemalloc high-water mark.
+_peaks = threading.local()
+
+
+@dataclass
+class StageTiming:
+    """Accumulated cost of one named stage."""
+
+    name: str
+    seconds: float = 0.0
+    calls: int = 0
+    rows: int | None = None
+    peak_bytes: int | None = None
+
+
+# Handed out by ``stage`` when instrumentation is off; writes are discarded.
+_DISCARD = StageTiming("discard")
+_NOOP: ContextManager[StageTiming] = nullcontext(_DISCARD)
+
+
+class Timings:
+    """Ordered per-stage totals.  Entering a stage again adds to its totals."""
+
+    def __init__(self) -> None:
+        self.stages: dict[str, StageTiming] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.stages)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(s.seconds for s in self.stages.values())
+
+    @contextmanager
+    def stage(self, name: str, rows: int | None = None) -> Iterator[StageTiming]:
+        """Time the ``with`` body as *name*, counting *rows* towards it.
+
+        The yielded :class:`StageTiming` may be updated in the body, e.g.
+        to add rows that are only known afterwards.
+        """
+        entry = self.stages.get(name)
+        if entry is None:
+            entry = self.stages[name] = StageTiming(name)
+        if rows is not None:
+            entry.rows = (entry.rows or 0) + rows
+
+        base = _enter_peak() if _memory else 0
+        start = time.perf_counter()
+        try:
+            yield entry
+        finally:
+            entry.seconds += time.perf_counter() - start
+            entry.calls += 1
+            if _memory:
+                peak = _exit_peak() - base
+                entry.peak_bytes = max(entry.peak_bytes or 0, peak)
+
+    def merge(self, other: Timings | None, *, prefix: str = "") -> Timings:
+        """Add *other*'s stages (names prefixed) into this one; return ``self``."""
+        if other is None:
+            return self
+        for src in other.stages.values():
+            name = prefix + src.name
+            entry = self.stages.get(name)
+            if entry is None:
+                self.stages[name] = StageTiming(**{**asdict(src), "name": name})
+                continue
+            entry.seconds += src.seconds
+            entry.calls += src.calls
+            if src.rows is not None:
+                entry.rows = (entry.rows or 0) + src.rows
+            if src.peak_bytes is not None:
+                entry.peak_bytes = max(entry.peak_bytes or 0, src.peak_bytes)
+        return self
+
+    def to_dicts(self) -> list[dict[str, Any]]:
+        return [asdict(s) for s in self.stages.values()]
+
+
+def _enter_peak() -> int:
+    stack: list[int] = _peaks.__dict__.setdefault("stack", [])
+    current, peak = tracemalloc.get_traced_memory()
+    if stack:
+        stack[-1] = max(stack[-1], peak)
+    tracemalloc.reset_peak()
+    stack.append(current)
+    return current
+
+
+def _exit_peak() -> int:
+    stack: list[int] = _peaks.stack
+    peak = max(stack.pop(), tracemalloc.get_traced_memory()[1])
+    if stack:
+        stack[-1] = max(stack[-1], peak)
+    return peak
+
+
+# ---------------------------------------------------------------------------
+# Switches
+# ---------------------------------------------------------------------------
+
+def configure(enabled: bool, *, memory: bool = False) -> None:
+    """Turn instrumentation on or off; *memory* adds tracemalloc peaks.
+
+    Starts tracemalloc when memory tracking is requested and it is not
+    already tracing.  It is left running when tracking is turned off.
+    """
+    global _enabled, _memory
+    _enabled = enabled
+    _memory = enabled and memory
+    if _memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def _configure_from_env() -> None:
+    value = os.environ.get(ENV_VAR, "").strip().lower()
+    if value in ("", "0", "false", "no", "off"):
+        return
+    configure(True, memory=value in ("memory", "mem", "tracemalloc"))
+
+
+_configure_from_env()
+
+
+# ---------------------------------------------------------------------------
+# Recording helpers
+# ---------------------------------------------------------------------------
+
+def new_timings() -> Timings | None:
+    """A fresh :class:`Timings`, or ``None`` when instrumentation is off."""
+    return Timings() if _enabled else None
+
+
+def stage(
+    timings: Timings | None,
+    name: str,
+    rows: int | None = None,
+) -> ContextManager[StageTiming]:
+    """``timings.stage(name, rows)``, or a no-op when *timings* is ``None``."""
+    if timings is None:
+        return _NOOP
+    return timings.stage(name, rows)
+
+
+def timed_iter(
+    timings: Timings | None,
+    name: str,
+    items: Iterable[_T],
+) -> Iterable[_T]:
+    """Time each ``next()`` on *items* as *name*, adding ``len(item)`` rows.
+
+    Returns *items* unchanged when *timings* is ``None``.
+    """
+    if timings is None:
+        return items
+    return _timed_iter(timings, name, iter(items))
+
+
+def _timed_iter(timings: Timings, name: str, it: Iterator[_T]) -> Iterator[_T]:
+    while True:
+        with timings.stage(name) as entry:
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            entry.rows = (entry.rows or 0) + len(item)
+        yield item
+
+
+@contextmanager
+def collect(label: str) -> Iterator[Timings | None]:
+    """Record :func:`instrumented` calls made in the ``with`` body.
+
+    Yields ``None`` when instrumentation is off.  On a clean exit the
+    recorded stages are logged under *label*.
+    """
+    if not _enabled:
+        yield None
+        return
+    timings = Timings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+    log_timings(label, timings)
+
+
+def include(timings: Timings | None, *, prefix: str = "") -> None:
+    """Merge *timings* (e.g. a :class:`ParseResult`'s) into the current
+    :func:`collect` block; a no-op outside one or when *timings* is ``None``.
+    """
+    current = _current.get()
+    if current is not None:
+        current.merge(timings, prefix=prefix)
+
+
+def instrumented(name: str | None = None, *, rows_arg: int | None = None) -> Callable[[_F], _F]:
+    """Record calls to the decorated function as a stage.
+
+    Calls are recorded only inside :func:`collect`; elsewhere the wrapper
+    calls straight through.  *rows_arg* is the index of a positional
+    argument whose ``len()`` is counted as the stage's rows.
+    """
+    def decorator(func: _F) -> _F:
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            timings = _current.get()
+            if timings is None:
+                return func(*args, **kwargs)
+            rows = None
+            if rows_arg is not None and rows_arg < len(args):
+                rows = len(args[rows_arg])
+            with timings.stage(stage_name, rows):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def log_timings(label: str, timings: Timings | None, **context: Any) -> None:
+    """Emit one structured INFO record for *timings* (no-op if empty).
+
+    *context* (e.g. ``filename``) is added to the record's ``perf`` dict.
+    """
+    if not timings:
+        return
+    summary = ", ".join(
+        f"{s.name}={s.seconds * 1000:.1f}ms" + (f"/{s.rows}" if s.rows is not None else "")
+        for s in timings.stages.values()
+    )
+    perf_logger.info(
+        "%s: %.1fms (%s)",
+        label,
+        timings.total_seconds * 1000,
+        summary,
+        extra={"perf": {"label": label, **context, "stages": timings.to_dicts()}},
+    )
@@ -3,14 +3,21 @@
 from __future__ import annotations
 
 import logging
-from typing import Sequence
+from typing import TYPE_CHECKING, Iterator, Sequence
 
 from .constants import (
     CONFIG_COLUMNS,
+    MAPPING_BULK_CHUNK,
     MAPPING_CONFIG_TABLE,
     MAPPING_PROC,
     MAPPING_TABLE,
+    SQL_BATCH_SEPARATOR,
+    SQL_VALUES_MAX_ROWS,
 )
+from .instrumentation import instrumented
+
+if TYPE_CHECKING:
+    from .config_catalog import ConfigCatalog
 
 logger = logging.getLogger(__name__)
 
@@ -115,6 +122,54 @@ def build_clone_config_row(new_code: str, existing_code: str) -> str:
     )
 
 
+def iter_all_steps(
+    source_id: str,
+    mapping_code: str,
+    existing_code: str | None = None,
+) -> Iterator[str]:
+    """Stream the :func:`build_all_steps` script as string fragments.
+
+    Every block is built up front, so invalid input raises before the first
+    fragment is requested.
+    """
+    blocks: list[tuple[str, str]] = [
+        ("-- Step 1: Lookup current mapping", build_lookup_query(source_id)),
+        ("-- Step 2: Insert / update mapping", build_insert_map(source_id, mapping_code)),
+    ]
+
+    if existing_code and existing_code.strip():
+        ec = existing_code.strip()
+        blocks += [
+            (
+                "-- Error-Recovery Step 1: Check if new code exists in config",
+                build_config_check(mapping_code),
+            ),
+            (
+                "-- Error-Recovery Step 2: Lookup existing reference row",
+                build_config_lookup_existing(ec),
+            ),
+            (
+                "-- Error-Recovery Step 3: Clone config row for new code",
+                build_clone_config_row(mapping_code, ec),
+            ),
+            (
+                "-- Error-Recovery Step 4: Re-run mapping insert",
+                build_insert_map(source_id, mapping_code),
+            ),
+        ]
+
+    return _iter_blocks(blocks)
+
+
+def _iter_blocks(blocks: list[tuple[str, str]]) -> Iterator[str]:
+    for i, (header, sql) in enumerate(blocks):
+        if i:
+            yield "\n\n"
+        yield f"{header}\n"
+        yield sql
+
+
+@instrumented()
 def build_all_steps(
     source_id: str,
     mapping_code: str,
@@ -132,31 +187,268 @@ def build_all_steps(
         If provided, also generates the error-recovery SQL blocks
         (config check, clone row, re-run insert).
     """
-    parts: list[str] = []
+    return "".join(iter_all_steps(source_id, mapping_code, existing_code))
 
-    parts.append("-- Step 1: Lookup current mapping")
-    parts.append(build_lookup_query(source_id))
 
-    parts.append("")
-    parts.append("-- Step 2: Insert / update mapping")
-    parts.append(build_insert_map(source_id, mapping_code))
+def build_guarded_clone_config_row(new_code: str, existing_code: str) -> str:
+    """:func:`build_clone_config_row` wrapped in ``IF NOT EXISTS``.
 
-    if existing_code and existing_code.strip():
-        ec = existing_code.strip()
-        parts.append("")
-        parts.append("-- Error-Recovery Step 1: Check if new code exists in config")
-        parts.append(build_config_check(mapping_code))
+    Safe to run even if the new code was added since the local catalog was
+    exported.
+    """
+    clone = build_clone_config_row(new_code, existing_code)
+    return (
+        f"IF NOT EXISTS (\n"
+        f"    SELECT 1\n"
+        f"    FROM {MAPPING_CONFIG_TABLE}\n"
+        f"    WHERE TransactionTypeExternal = '{new_code.strip()}'\n"
+        f")\n"
+        f"{clone}"
+    )
+
+
+@instrumented()
+def build_resolved_steps(
+    source_id: str,
+    mapping_code: str,
+    catalog: ConfigCatalog,
+    existing_code: str | None = None,
+) -> str:
+    """Build the mapping script using a local Config catalog.
+
+    If *mapping_code* is already in *catalog* this is the plain lookup and
+    insert.  Otherwise the config row is cloned from *existing_code*
+    **before** the insert, so the ``InsertMap`` call does not fail.
+
+    Raises
+    ------
+    ValueError
+        If the code is missing and *existing_code* is blank or is itself
+        not in the catalog.
+    """
+    lookup_sql = build_lookup_query(source_id)
+    insert_sql = build_insert_map(source_id, mapping_code)
+
+    if mapping_code.strip() in catalog:
+        return "".join(_iter_blocks([
+            ("-- Step 1: Lookup current mapping", lookup_sql),
+            ("-- Step 2: Insert / update mapping", insert_sql),
+        ]))
+
+    if not existing_code or not existing_code.strip():
+        raise ValueError(
+            f"Mapping code '{mapping_code.strip()}' is not in the config catalog; "
+            "an existing reference code is required to clone it."
+        )
+    if existing_code.strip() not in catalog:
+        raise ValueError(
+            f"Existing reference code '{existing_code.strip()}' is not in the config catalog."
+        )
+
+    return "".join(_iter_blocks([
+        ("-- Step 1: Lookup current mapping", lookup_sql),
+        (
+            "-- Step 2: Clone config row for new code (missing from config catalog)",
+            build_guarded_clone_config_row(mapping_code, existing_code),
+        ),
+        ("-- Step 3: Insert / update mapping", insert_sql),
+    ]))
+
+
+# ---------------------------------------------------------------------------
+# Bulk mapping (many source_id -> mapping_code pairs)
+# ---------------------------------------------------------------------------
+
+def _clean_pairs(pairs: Sequence[tuple[str, str]]) -> list[tuple[str, str]]:
+    """Strip both values and drop incomplete pairs. Raises on empty result."""
+    cleaned = [
+        (sid.strip(), code.strip())
+        for sid, code in pairs
+        if sid and sid.strip() and code and code.strip()
+    ]
+    if not cleaned:
+        raise ValueError("At least one source ID / mapping code pair is required.")
+    return cleaned
+
+
+def _quoted_list(values: Sequence[str]) -> str:
+    return ", ".join(f"'{v}'" for v in values)
+
+
+@instrumented(rows_arg=0)
+def build_bulk_lookup_query(source_ids: Sequence[str]) -> str:
+    """Bulk Step 1 -- look up the current mapping of every source ID at once."""
+    ids = list(dict.fromkeys(s.strip() for s in source_ids if s and s.strip()))
+    if not ids:
+        raise ValueError("At least one source ID is required.")
+    return f"SELECT *\nFROM {MAPPING_TABLE}\nWHERE id IN ({_quoted_list(ids)});"
+
+
+@instrumented(rows_arg=0)
+def build_bulk_config_check(mapping_codes: Sequence[str]) -> str:
+    """List the mapping codes that are missing from the config table.
+
+    Run this before the bulk insert: any code it returns would make
+    ``TransactionTypes_InsertMap`` fail and needs a cloned config row first.
+    """
+    codes = list(dict.fromkeys(c.strip() for c in mapping_codes if c and c.strip()))
+    if not codes:
+        raise ValueError("At least one mapping code is required.")
+
+    parts: list[str] = []
+    for start in range(0, len(codes), SQL_VALUES_MAX_ROWS):
+        values = ",\n".join(
+            f"    ('{c}')" for c in codes[start:start + SQL_VALUES_MAX_ROWS]
+        )
+        parts.append(
+            f"SELECT v.code AS MissingTransactionTypeExternal\n"
+            f"FROM (VALUES\n{values}\n) v (code)\n"
+            f"WHERE NOT EXISTS (\n"
+            f"    SELECT 1\n"
+            f"    FROM {MAPPING_CONFIG_TABLE} c\n"
+            f"    WHERE c.TransactionTypeExternal = v.code\n"
+            f");"
+        )
+    return "\n\n".join(parts)
+
+
+def _clean_clone_pairs(pairs: Sequence[tuple[str, str]]) -> list[tuple[str, str]]:
+    """Strip, drop incomplete pairs and collapse repeats of the same new code."""
+    cleaned: dict[str, str] = {}
+    conflicts: list[str] = []
+    for new, existing in pairs:
+        n = new.strip() if new else ""
+        e = existing.strip() if existing else ""
+        if not n or not e:
+            continue
+        if cleaned.setdefault(n, e) != e:
+            conflicts.append(n)
+    if conflicts:
+        raise ValueError(
+            "New code(s) paired with more than one existing code: "
+            f"{', '.join(dict.fromkeys(conflicts))}"
+        )
+    if not cleaned:
+        raise ValueError("At least one new code / existing code pair is required.")
+    return list(cleaned.items())
+
+
+@instrumented(rows_arg=0)
+def build_bulk_clone_config_rows(
+    pairs: Sequence[tuple[str, str]],
+    *,
+    chunk_size: int = SQL_VALUES_MAX_ROWS,
+) -> str:
+    """Clone many config rows with one set-based ``INSERT ... SELECT`` per chunk.
+
+    Each statement joins the config table to a ``VALUES`` list of
+    ``(new_code, existing_code)`` pairs and skips new codes that already
+    exist (``NOT EXISTS``), so it is safe to re-run.
+
+    Parameters
+    ----------
+    pairs:
+        ``(new_code, existing_code)`` tuples.
+    chunk_size:
+        Maximum VALUES rows per statement (SQL Server allows 1000).
+    """
+    if not 1 <= chunk_size <= SQL_VALUES_MAX_ROWS:
+        raise ValueError(f"chunk_size must be between 1 and {SQL_VALUES_MAX_ROWS}.")
+    cleaned = _clean_clone_pairs(pairs)
 
-        parts.append("")
-        parts.append("-- Error-Recovery Step 2: Lookup existing reference row")
-        parts.append(build_config_lookup_existing(ec))
+    insert_cols = ",\n    ".join(CONFIG_COLUMNS)
+    select_cols = ", ".join(f"c.{col}" for col in CONFIG_COLUMNS[1:])
+
+    statements: list[str] = []
+    for start in range(0, len(cleaned), chunk_size):
+        values = ",\n".join(
+            f"        ('{new}', '{existing}')"
+            for new, existing in cleaned[start:start + chunk_size]
+        )
+        statements.append(
+            f"INSERT INTO {MAPPING_CONFIG_TABLE}\n"
+            f"    ({insert_cols})\n"
+            f"SELECT\n"
+            f"    v.new_code, {select_cols}\n"
+            f"FROM\n"
+            f"    {MAPPING_CONFIG_TABLE} c\n"
+            f"    JOIN (VALUES\n"
+            f"{values}\n"
+            f"    ) v (new_code, existing_code)\n"
+            f"        ON c.TransactionTypeExternal = v.existing_code\n"
+            f"WHERE\n"
+            f"    NOT EXISTS (\n"
+            f"        SELECT 1\n"
+            f"        FROM {MAPPING_CONFIG_TABLE} x\n"
+            f"        WHERE x.TransactionTypeExternal = v.new_code\n"
+            f"    );"
+        )
+    logger.info("Generated bulk config clone (%d code(s))", len(cleaned))
+    return "\n\n".join(statements)
+
+
+def _iter_bulk_insert_map(
+    pairs: Sequence[tuple[str, str]],
+    chunk_size: int,
+) -> Iterator[str]:
+    for start in range(0, len(pairs), chunk_size):
+        if start:
+            yield "\n\n"
+        yield "SET XACT_ABORT ON;\nBEGIN TRANSACTION;\n\n"
+        for sid, code in pairs[start:start + chunk_size]:
+            yield f"EXEC {MAPPING_PROC} '{sid}', '{code}', 1;\n"
+        yield f"\nCOMMIT TRANSACTION;\n{SQL_BATCH_SEPARATOR}"
+
+
+def iter_bulk_insert_map(
+    pairs: Sequence[tuple[str, str]],
+    *,
+    chunk_size: int = MAPPING_BULK_CHUNK,
+) -> Iterator[str]:
+    """Stream the :func:`build_bulk_insert_map` script as string fragments."""
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be a positive integer.")
+    return _iter_bulk_insert_map(_clean_pairs(pairs), chunk_size)
+
+
+@instrumented(rows_arg=0)
+def build_bulk_insert_map(
+    pairs: Sequence[tuple[str, str]],
+    *,
+    chunk_size: int = MAPPING_BULK_CHUNK,
+) -> str:
+    """Bulk Step 2 -- create / update many mappings in one script.
 
-        parts.append("")
-        parts.append("-- Error-Recovery Step 3: Clone config row for new code")
-        parts.append(build_clone_config_row(mapping_code, ec))
+    Each chunk of *chunk_size* ``TransactionTypes_InsertMap`` calls runs
+    inside one transaction with ``XACT_ABORT`` on, so a failing EXEC (e.g.
+    a code missing from the config table) rolls its whole chunk back.
+    Every chunk, the last included, ends with ``GO`` so ``XACT_ABORT`` and
+    any failure stay scoped to their own batch.
+    """
+    sql = "".join(iter_bulk_insert_map(pairs, chunk_size=chunk_size))
+    logger.info("Generated bulk mapping insert (%d pair(s))", len(pairs))
+    return sql
 
-        parts.append("")
-        parts.append("-- Error-Recovery Step 4: Re-run mapping insert")
-        parts.append(build_insert_map(source_id, mapping_code))
 
-    return "\n".join(parts)
+@instrumented(rows_arg=0)
+def build_bulk_all_steps(
+    pairs: Sequence[tuple[str, str]],
+    *,
+    chunk_size: int = MAPPING_BULK_CHUNK,
+) -> str:
+    """Concatenate the bulk lookup, config check and insert with headers."""
+    cleaned = _clean_pairs(pairs)
+    return "".join(_iter_blocks([
+        (
+            "-- Step 1: Lookup current mappings",
+            build_bulk_lookup_query([sid for sid, _ in cleaned]),
+        ),
+        (
+            "-- Step 2: Mapping codes missing from config (must be empty)",
+            build_bulk_config_check([code for _, code in cleaned]),
+        ),
+        (
+            "-- Step 3: Insert / update mappings",
+            build_bulk_insert_map(cleaned, chunk_size=chunk_size),
+        ),
+    ]))
@@ -1 +1,18 @@
-"""Dashboard page modules."""
+"""Dashboard page modules.
+
+Pages are imported on first use through :func:`get_renderer`, so a cold
+start only pays for the page being shown.
+"""
+
+from __future__ import annotations
+
+import importlib
+from functools import cache
+from typing import Callable
+
+
+@cache
+def get_renderer(page: str) -> Callable[[], None]:
+    """Import ``api_refresh_builder.pages.<page>`` and return its ``render``."""
+    module = importlib.import_module(f"{__name__}.{page}")
+    return module.render
@@ -3,33 +3,89 @@
 from __future__ import annotations
 
 import logging
+from typing import Sequence
 
 import streamlit as st
 
 from api_refresh_builder.constants import (
     DEFAULT_TARGET_TYPES,
+    OUTPUT_BATCHED,
+    OUTPUT_MODES,
+    OUTPUT_TEMP_TABLE,
+    PARSE_POLL_SECONDS,
+    PARSE_WAIT_SECONDS,
     PREVIEW_COUNT,
     REFRESH_FAMILIES,
+    SQL_BATCH_MAX_CODES,
+    SQL_MEMO_ENTRIES,
 )
-from api_refresh_builder.parsing import ParseResult, parse_codes
-from api_refresh_builder.sql_builder import build_sql
-from api_refresh_builder.ui_helpers import copy_buttons
+from api_refresh_builder.instrumentation import Timings, include, instrumented
+from api_refresh_builder.parse_worker import ParseCancelled, ParseJob, submit_parse
+from api_refresh_builder.parsing import ParseResult
+from api_refresh_builder.sql_builder import iter_sql_for_mode
+from api_refresh_builder.ui_helpers import performance_section, sql_output
 
 logger = logging.getLogger(__name__)
 
 
-def _sidebar() -> tuple[str, list[str], bool, bool, bool]:
-    """Render sidebar options and return selections."""
-    refresh_family: str = st.selectbox(
-        "Refresh family",
-        options=REFRESH_FAMILIES,
-        index=0,
+def _sidebar() -> tuple[bool, bool]:
+    """Render parse options in the sidebar and return (dedupe, strict).
+
+    Only options that change the parse live here; SQL options are rendered
+    inside the Generated SQL fragment so toggling them does not rerun the
+    whole page.
+    """
+    dedupe: bool = st.checkbox("Deduplicate codes", value=True)
+    strict: bool = st.checkbox(
+        "Strict validation",
+        value=False,
+        help="Block SQL generation when invalid codes exist.",
     )
+    return dedupe, strict
+
+
+def _sql_options() -> tuple[str, list[str], bool, str, int]:
+    """Render SQL options and return
+    (refresh_family, target_types, debug, output_mode, batch_size)."""
+    col_a, col_b = st.columns(2)
+    with col_a:
+        refresh_family: str = st.selectbox(
+            "Refresh family",
+            options=REFRESH_FAMILIES,
+            index=0,
+        )
+        debug: bool = st.checkbox(
+            "Debug (@debug=1)",
+            value=False,
+            help="If there are issues add @debug=1 to begin troubleshooting",
+        )
+    with col_b:
+        output_mode: str = st.radio(
+            "Output mode",
+            options=OUTPUT_MODES,
+            index=0,
+            horizontal=True,
+            help=(
+                "Batched: one EXEC per batch of codes, separated by GO. "
+                "Temp table: load codes into #codes, then one EXEC per batch "
+                "of rows."
+            ),
+        )
+        batch_size = SQL_BATCH_MAX_CODES
+        if output_mode in (OUTPUT_BATCHED, OUTPUT_TEMP_TABLE):
+            batch_size = int(
+                st.number_input(
+                    "Max codes per EXEC",
+                    min_value=1,
+                    value=SQL_BATCH_MAX_CODES,
+                    step=500,
+                )
+            )
 
-    st.subheader("Target Types")
+    st.markdown("**Target types**")
     selected_defaults: list[str] = []
-    for tt in DEFAULT_TARGET_TYPES:
-        if st.checkbox(tt, value=True, key=f"tt_{tt}"):
+    for col, tt in zip(st.columns(len(DEFAULT_TARGET_TYPES)), DEFAULT_TARGET_TYPES):
+        if col.checkbox(tt, value=True, key=f"tt_{tt}"):
             selected_defaults.append(tt)
 
     custom_types_raw: str = st.text_input(
@@ -40,23 +96,123 @@ def _sidebar() -> tuple[str, list[str], bool, bool, bool]:
     custom_types: list[str] = [
         t.strip() for t in custom_types_raw.split(",") if t.strip()
     ]
-    all_target_types: list[str] = selected_defaults + custom_types
+    return refresh_family, selected_defaults + custom_types, debug, output_mode, batch_size
 
-    st.divider()
 
-    dedupe: bool = st.checkbox("Deduplicate codes", value=True)
-    strict: bool = st.checkbox(
-        "Strict validation",
-        value=False,
-        help="Block SQL generation when invalid codes exist.",
-    )
-    debug: bool = st.checkbox(
-        "Debug (@debug=1)",
-        value=False,
-        help="If there are issues add @debug=1 to begin troubleshooting",
+@st.cache_resource(max_entries=SQL_MEMO_ENTRIES, show_spinner=False)
+@instrumented("build_sql_for_mode", rows_arg=0)
+def _build_sql(
+    _codes: Sequence[str],
+    codes_token: tuple,
+    refresh_family: str,
+    target_types: list[str],
+    debug: bool,
+    output_mode: str,
+    batch_size: int,
+) -> tuple[str, int]:
+    """Build the SQL for the selected mode; return (sql, EXEC statement count).
+
+    *_codes* is not hashed (a large list would cost as much as the build);
+    *codes_token* identifies it instead.
+    """
+    sql = "".join(
+        iter_sql_for_mode(
+            _codes,
+            refresh_family,
+            target_types,
+            output_mode=output_mode,
+            debug=debug,
+            max_codes=batch_size,
+        )
     )
+    return sql, sql.startswith("EXEC ") + sql.count("\nEXEC ")
+
+
+@st.fragment
+@performance_section("api_refresh.sql")
+def _sql_section(
+    codes: Sequence[str],
+    codes_token: tuple,
+    parse_timings: Timings | None = None,
+) -> None:
+    """SQL options and the Generated SQL block, rerun on their own."""
+    include(parse_timings, prefix="parse.")
+    st.subheader("Generated SQL")
+    refresh_family, target_types, debug, output_mode, batch_size = _sql_options()
+
+    if not target_types:
+        st.warning("Select at least one target type.")
+        return
+
+    try:
+        sql, n_statements = _build_sql(
+            codes,
+            codes_token,
+            refresh_family,
+            target_types,
+            debug,
+            output_mode,
+            batch_size,
+        )
+    except ValueError as exc:
+        st.error(str(exc))
+        return
+
+    if n_statements > 1:
+        separator = "reading #codes" if output_mode == OUTPUT_TEMP_TABLE else "separated by GO"
+        st.caption(f"{n_statements} EXEC statements, {separator}.")
+    sql_output(sql, key_suffix="_api")
+
+
+_JOB_KEY = "parse_job"
+_JOB_TOKEN_KEY = "parse_job_token"
+
 
-    return refresh_family, all_target_types, dedupe, strict, debug
+def _cancel_job() -> None:
+    job: ParseJob | None = st.session_state.pop(_JOB_KEY, None)
+    st.session_state.pop(_JOB_TOKEN_KEY, None)
+    if job is not None:
+        job.cancel()
+
+
+def _parse_in_background(uploaded, dedupe: bool) -> ParseResult | None:
+    """Return the parse result once the background job finishes.
+
+    The job gets ``PARSE_WAIT_SECONDS`` to finish first, so small files
+    return in the same run.  While it is still running this shows the rows
+    read so far and a cancel button, waits up to ``PARSE_POLL_SECONDS`` more
+    and reruns the script to poll again.  A new upload
+    (or a changed dedupe option) cancels the stale job before starting a
+    fresh one.  Returns ``None`` while parsing or after a cancel.
+    """
+    token = (uploaded.file_id, uploaded.name, dedupe)
+    job: ParseJob | None = st.session_state.get(_JOB_KEY)
+    if job is None or st.session_state.get(_JOB_TOKEN_KEY) != token:
+        _cancel_job()
+        job = submit_parse(uploaded.getvalue(), uploaded.name, dedupe=dedupe)
+        st.session_state[_JOB_KEY] = job
+        st.session_state[_JOB_TOKEN_KEY] = token
+
+    if job.cancelled:
+        st.info("Parsing cancelled. Upload the file again to restart.")
+        return None
+
+    if not job.wait(PARSE_WAIT_SECONDS):
+        st.info(f"Reading {uploaded.name}\u2026 {job.rows_read:,} rows so far")
+        if st.button("Cancel parsing", key="cancel_parse"):
+            job.cancel()
+            st.rerun()
+        job.wait(PARSE_POLL_SECONDS)
+        st.rerun()
+
+    try:
+        return job.result()
+    except ParseCancelled:
+        st.info("Parsing cancelled. Upload the file again to restart.")
+    except Exception as exc:
+        st.error(f"Failed to parse file: {exc}")
+        logger.exception("Parsing error", exc_info=exc)
+    return None
 
 
 def render() -> None:
@@ -69,7 +225,7 @@ def render() -> None:
 
     # -- Sidebar options --
     with st.sidebar:
-        refresh_family, all_target_types, dedupe, strict, debug = _sidebar()
+        dedupe, strict = _sidebar()
 
     # -- File upload --
     uploaded = st.file_uploader(
@@ -78,19 +234,13 @@ def render() -> None:
     )
 
     if uploaded is None:
+        _cancel_job()
         st.info("Upload a file to get started.")
         return
 
-    # -- Parse --
-    try:
-        result: ParseResult = parse_codes(
-            uploaded.getvalue(),
-            uploaded.name,
-            dedupe=dedupe,
-        )
-    except Exception as exc:
-        st.error(f"Failed to parse file: {exc}")
-        logger.exception("Parsing error")
+    # -- Parse (background worker) --
+    result = _parse_in_background(uploaded, dedupe)
+    if result is None:
         return
 
     # -- Stats --
@@ -127,25 +277,8 @@ def render() -> None:
         st.error("No valid codes available to build SQL.")
         return
 
-    if not all_target_types:
-        st.warning("Select at least one target type in the sidebar.")
-        return
-
-    # -- Build SQL --
-    try:
-        sql: str = build_sql(
-            result.valid_codes,
-            refresh_family,
-            all_target_types,
-            debug=debug,
-        )
-    except ValueError as exc:
-        st.error(str(exc))
-        return
-
-    st.subheader("Generated SQL")
-    st.code(sql, language="sql")
-    copy_buttons(sql, key_suffix="_api")
+    # -- Build SQL (fragment) --
+    _sql_section(result.valid_codes, st.session_state[_JOB_TOKEN_KEY], result.timings)
 
     st.divider()
     st.caption(
@@ -6,17 +6,44 @@ import logging
 
 import streamlit as st
 
-from api_refresh_builder.constants import CRM_UPDATABLE_FIELDS
+from api_refresh_builder.constants import (
+    CRM_REF_TABLE,
+    CRM_REF_TABLE_THRESHOLD,
+    CRM_UPDATABLE_FIELDS,
+    SQL_MEMO_ENTRIES,
+)
 from api_refresh_builder.crm_builder import (
+    build_bulk_update,
     build_full_flow,
     build_post_check,
     build_pre_check,
+    build_ref_table_load,
     build_update,
 )
-from api_refresh_builder.ui_helpers import copy_buttons
+from api_refresh_builder.instrumentation import Timings, collect, include
+from api_refresh_builder.parsing import parse_amendments
+from api_refresh_builder.ui_helpers import performance_section, sql_output
 
 logger = logging.getLogger(__name__)
 
+_MODE_MANUAL = "Manual (same values for every ref)"
+_MODE_BULK = "Spreadsheet (per-ref values)"
+
+# Memoized builders: fragment reruns that leave the inputs unchanged reuse
+# the previous SQL instead of rebuilding it.
+_memo = st.cache_resource(max_entries=SQL_MEMO_ENTRIES, show_spinner=False)
+_build_ref_table_load = _memo(build_ref_table_load)
+_build_pre_check = _memo(build_pre_check)
+_build_update = _memo(build_update)
+_build_post_check = _memo(build_post_check)
+_build_full_flow = _memo(build_full_flow)
+_build_bulk_update = _memo(build_bulk_update)
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def _parse_amendments(file_bytes: bytes, filename: str) -> dict[str, dict[str, str]]:
+    return parse_amendments(file_bytes, filename)
+
 
 # ---------------------------------------------------------------------------
 # Sidebar
@@ -41,25 +68,107 @@ def _sidebar() -> list[str]:
 
 
 # ---------------------------------------------------------------------------
-# Page renderer
+# Ref table
 # ---------------------------------------------------------------------------
 
-def render() -> None:
-    """Render the CRM Amendments page."""
-    st.header("CRM Amendments")
-    st.caption(
-        "Generate pre-check, UPDATE, and post-check SQL for "
-        "ClientTransactions.mba transaction amendments."
+def _ref_table_block(refs: list[str], *, key_suffix: str) -> bool:
+    """Render the ``#refs`` load script that the following blocks join against.
+
+    Returns ``False`` (after showing the error) when the refs are rejected.
+    """
+    try:
+        load_sql = _build_ref_table_load(refs)
+    except ValueError as exc:
+        st.error(str(exc))
+        return False
+    st.markdown(f"**Load refs into `{CRM_REF_TABLE}`** (run first, same session)")
+    sql_output(load_sql, key_suffix=key_suffix)
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Bulk (spreadsheet) mode
+# ---------------------------------------------------------------------------
+
+def _render_bulk() -> None:
+    """Per-ref amendments from an uploaded ref -> field values sheet."""
+    uploaded = st.file_uploader(
+        "Upload amendments (.xls, .xlsx, .csv)",
+        type=["xls", "xlsx", "csv"],
+        help=(
+            "First row is a header. First column: transaction ref. "
+            "Other columns: field names, one value per ref. "
+            "Blank cells leave the current value unchanged."
+        ),
     )
+    if uploaded is None:
+        st.info("Upload a spreadsheet to get started.")
+        return
 
-    # -- Sidebar --
-    with st.sidebar:
-        refs = _sidebar()
+    try:
+        with collect("crm.parse") as parse_timings:
+            amendments = _parse_amendments(uploaded.getvalue(), uploaded.name)
+    except Exception as exc:
+        st.error(f"Failed to parse file: {exc}")
+        logger.exception("Amendment parsing error")
+        return
 
-    if not refs:
-        st.info("Enter transaction references in the sidebar to get started.")
+    if not amendments:
+        st.warning("No transaction references found in the first column.")
+        return
+
+    st.success(f"{len(amendments)} ref(s) parsed")
+    st.info(
+        "Always run the pre-check SELECT first to confirm target rows "
+        "before executing the UPDATE."
+    )
+    _bulk_sql_section(amendments, parse_timings)
+
+
+@st.fragment
+@performance_section("crm.bulk")
+def _bulk_sql_section(
+    amendments: dict[str, dict[str, str]],
+    parse_timings: Timings | None = None,
+) -> None:
+    include(parse_timings)
+    st.subheader("Generated SQL")
+
+    refs = list(amendments)
+    use_ref_table = len(refs) > CRM_REF_TABLE_THRESHOLD
+    try:
+        update_sql = _build_bulk_update(amendments)
+        pre_sql = _build_pre_check(refs, use_ref_table=use_ref_table)
+    except ValueError as exc:
+        st.error(str(exc))
         return
 
+    if use_ref_table:
+        _ref_table_block(refs, key_suffix="_crm_bulk_load")
+
+    st.markdown("**Pre-check**")
+    sql_output(pre_sql, key_suffix="_crm_bulk_pre")
+
+    st.markdown("**UPDATE (set-based, per-ref values)**")
+    sql_output(update_sql, key_suffix="_crm_bulk_upd")
+
+    st.markdown("**Post-check**")
+    post_sql = _build_post_check(refs, use_ref_table=use_ref_table)
+    sql_output(post_sql, key_suffix="_crm_bulk_post")
+
+
+# ---------------------------------------------------------------------------
+# Manual mode
+# ---------------------------------------------------------------------------
+
+def _clear_custom_fields() -> None:
+    st.session_state["crm_custom_fields"] = {}
+
+
+@st.fragment
+@performance_section("crm.manual")
+def _render_manual(refs: list[str]) -> None:
+    """Fields and Generated SQL; field edits rerun only this fragment."""
     # ------------------------------------------------------------------ #
     # Fields to update
     # ------------------------------------------------------------------ #
@@ -98,9 +207,7 @@ def render() -> None:
     fields.update(custom_fields)
 
     if custom_fields:
-        if st.button("Clear custom fields", key="crm_clear_custom"):
-            st.session_state["crm_custom_fields"] = {}
-            st.rerun()
+        st.button("Clear custom fields", key="crm_clear_custom", on_click=_clear_custom_fields)
 
     # Summary
     if fields:
@@ -122,40 +229,50 @@ def render() -> None:
     # ------------------------------------------------------------------ #
     # Generated SQL
     # ------------------------------------------------------------------ #
+    use_ref_table: bool = st.checkbox(
+        f"Load refs into {CRM_REF_TABLE} temp table",
+        value=len(refs) > CRM_REF_TABLE_THRESHOLD,
+        key="crm_use_ref_table",
+        help=(
+            "Join every statement against a temp table instead of inlining "
+            "an IN (...) list. Recommended for long ref lists."
+        ),
+    )
+
     st.subheader("Generated SQL")
 
+    if use_ref_table and not _ref_table_block(refs, key_suffix="_crm_load"):
+        return
+
     # Pre-check
     try:
-        pre_sql = build_pre_check(refs)
+        pre_sql = _build_pre_check(refs, use_ref_table=use_ref_table)
     except ValueError as exc:
         st.error(str(exc))
         return
 
     st.markdown("**Pre-check**")
-    st.code(pre_sql, language="sql")
-    copy_buttons(pre_sql, key_suffix="_crm_pre")
+    sql_output(pre_sql, key_suffix="_crm_pre")
 
     # UPDATE
     try:
-        update_sql = build_update(refs, fields)
+        update_sql = _build_update(refs, fields, use_ref_table=use_ref_table)
     except ValueError as exc:
         st.error(str(exc))
         return
 
     st.markdown("**UPDATE**")
-    st.code(update_sql, language="sql")
-    copy_buttons(update_sql, key_suffix="_crm_upd")
+    sql_output(update_sql, key_suffix="_crm_upd")
 
     # Post-check
     try:
-        post_sql = build_post_check(refs)
+        post_sql = _build_post_check(refs, use_ref_table=use_ref_table)
     except ValueError as exc:
         st.error(str(exc))
         return
 
     st.markdown("**Post-check**")
-    st.code(post_sql, language="sql")
-    copy_buttons(post_sql, key_suffix="_crm_post")
+    sql_output(post_sql, key_suffix="_crm_post")
 
     # ------------------------------------------------------------------ #
     # Show all SQL
@@ -163,12 +280,49 @@ def render() -> None:
     st.divider()
     with st.expander("Show all SQL", expanded=False):
         try:
-            all_sql = build_full_flow(refs, fields)
+            all_sql = _build_full_flow(refs, fields, use_ref_table=use_ref_table)
         except ValueError as exc:
             st.error(str(exc))
             return
-        st.code(all_sql, language="sql")
-        copy_buttons(all_sql, key_suffix="_crm_all")
+        sql_output(all_sql, key_suffix="_crm_all")
+
+
+# ---------------------------------------------------------------------------
+# Page renderer
+# ---------------------------------------------------------------------------
+
+def render() -> None:
+    """Render the CRM Amendments page."""
+    st.header("CRM Amendments")
+    st.caption(
+        "Generate pre-check, UPDATE, and post-check SQL for "
+        "ClientTransactions.mba transaction amendments."
+    )
+
+    # -- Sidebar --
+    with st.sidebar:
+        mode: str = st.radio(
+            "Input mode",
+            options=[_MODE_MANUAL, _MODE_BULK],
+            index=0,
+            key="crm_mode",
+        )
+        refs = _sidebar() if mode == _MODE_MANUAL else []
+
+    if mode == _MODE_BULK:
+        _render_bulk()
+        st.divider()
+        st.caption(
+            "This tool only **generates** SQL text. "
+            "It does not connect to or execute against any database."
+        )
+        return
+
+    if not refs:
+        st.info("Enter transaction references in the sidebar to get started.")
+        return
+
+    _render_manual(refs)
 
     st.divider()
     st.caption(
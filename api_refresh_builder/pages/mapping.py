@@ -6,22 +6,52 @@ import logging
 
 import streamlit as st
 
+from api_refresh_builder.constants import SQL_MEMO_ENTRIES
 from api_refresh_builder.mapping_builder import (
     build_all_steps,
+    build_bulk_all_steps,
+    build_bulk_clone_config_rows,
+    build_bulk_config_check,
+    build_bulk_insert_map,
+    build_bulk_lookup_query,
     build_clone_config_row,
     build_config_check,
     build_config_lookup_existing,
     build_insert_map,
     build_lookup_query,
+    build_resolved_steps,
 )
-from api_refresh_builder.ui_helpers import copy_buttons
+from api_refresh_builder.config_catalog import ConfigCatalog
+from api_refresh_builder.instrumentation import Timings, collect, include
+from api_refresh_builder.parsing import parse_mapping_pairs
+from api_refresh_builder.ui_helpers import performance_section, sql_output
 
 logger = logging.getLogger(__name__)
 
+_MODE_SINGLE = "Single mapping (wizard)"
+_MODE_BULK = "Bulk (spreadsheet)"
+
+# Memoized bulk builders: fragment reruns that leave the pairs unchanged
+# reuse the previous SQL instead of rebuilding it.
+_memo = st.cache_resource(max_entries=SQL_MEMO_ENTRIES, show_spinner=False)
+_build_bulk_lookup_query = _memo(build_bulk_lookup_query)
+_build_bulk_config_check = _memo(build_bulk_config_check)
+_build_bulk_insert_map = _memo(build_bulk_insert_map)
+_build_bulk_all_steps = _memo(build_bulk_all_steps)
+_build_bulk_clone_config_rows = _memo(build_bulk_clone_config_rows)
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def _parse_mapping_pairs(file_bytes: bytes, filename: str) -> list[tuple[str, str]]:
+    return parse_mapping_pairs(file_bytes, filename)
+
+
 # ---------------------------------------------------------------------------
 # Session-state helpers
 # ---------------------------------------------------------------------------
 _STEP_KEY = "mapping_step"
+_CATALOG_KEY = "config_catalog"
+_PREFILL_FOR_KEY = "existing_ref_code_prefill_for"
 
 
 def _current_step() -> int:
@@ -32,10 +62,44 @@ def _set_step(n: int) -> None:
     st.session_state[_STEP_KEY] = n
 
 
+def _use_existing_code(code: str) -> None:
+    st.session_state["existing_ref_code"] = code
+
+
 # ---------------------------------------------------------------------------
 # Sidebar
 # ---------------------------------------------------------------------------
 
+def _catalog_sidebar() -> ConfigCatalog | None:
+    """Load the local Config catalog (cached on disk) and allow refreshing it."""
+    if _CATALOG_KEY not in st.session_state:
+        st.session_state[_CATALOG_KEY] = ConfigCatalog.load()
+    catalog: ConfigCatalog | None = st.session_state[_CATALOG_KEY]
+
+    with st.expander("Config catalog", expanded=False):
+        if catalog is None:
+            st.caption("No local catalog loaded.")
+        else:
+            st.caption(f"{len(catalog)} config code(s) cached locally.")
+        uploaded = st.file_uploader(
+            "Upload Config table export (.xls, .xlsx, .csv)",
+            type=["xls", "xlsx", "csv"],
+            key="config_catalog_upload",
+            help="Export of the TransactionTypeExternal_Config table.",
+        )
+        if uploaded is not None and st.button("Load catalog", key="load_catalog"):
+            try:
+                catalog = ConfigCatalog.from_file(uploaded.getvalue(), uploaded.name)
+                catalog.save()
+            except Exception as exc:
+                st.error(f"Failed to load catalog: {exc}")
+                logger.exception("Config catalog error")
+            else:
+                st.session_state[_CATALOG_KEY] = catalog
+                st.success(f"Loaded {len(catalog)} config code(s).")
+    return catalog
+
+
 def _sidebar() -> tuple[str, str]:
     """Render sidebar inputs and return (source_id, mapping_code)."""
     source_id: str = st.text_input(
@@ -52,20 +116,136 @@ def _sidebar() -> tuple[str, str]:
 
 
 # ---------------------------------------------------------------------------
-# Page renderer
+# Bulk (spreadsheet) mode
 # ---------------------------------------------------------------------------
 
-def render() -> None:
-    """Render the Mapping wizard page."""
-    st.header("Transaction Type Mapping")
+def _render_bulk_clone(catalog: ConfigCatalog, missing: list[str]) -> None:
+    """Editable new -> existing pairs for cloning every missing config row at once."""
+    st.markdown("**Clone config rows for the missing codes**")
     st.caption(
-        "Generate SQL for IMIX transaction-type mapping requests. "
-        "Work through the steps or use **Show all SQL** at the bottom."
+        "Each missing code is pre-paired with its closest existing code from "
+        "the local catalog. Review and edit the pairs before running the SQL."
+    )
+    suggested = []
+    for code in missing:
+        best = catalog.suggest(code, k=1)
+        suggested.append({"new_code": code, "existing_code": best[0][0] if best else ""})
+
+    edited = st.data_editor(
+        suggested,
+        key="map_bulk_clone_pairs",
+        disabled=["new_code"],
+        hide_index=True,
     )
+    pairs = [(row["new_code"], row["existing_code"] or "") for row in edited]
+    unresolved = [new for new, existing in pairs if not existing.strip()]
+    if unresolved:
+        st.warning(f"No existing code chosen for: {', '.join(unresolved)}")
 
-    with st.sidebar:
-        source_id, mapping_code = _sidebar()
+    try:
+        clone_sql = _build_bulk_clone_config_rows(pairs)
+    except ValueError as exc:
+        st.error(str(exc))
+        return
+    sql_output(clone_sql, key_suffix="_map_bulk_clone")
+
+
+def _render_bulk(catalog: ConfigCatalog | None) -> None:
+    """Many source ID -> mapping code pairs from an uploaded sheet."""
+    uploaded = st.file_uploader(
+        "Upload mappings (.xls, .xlsx, .csv)",
+        type=["xls", "xlsx", "csv"],
+        help=(
+            "First row is a header. First column: source ID. "
+            "Second column: target mapping code."
+        ),
+    )
+    if uploaded is None:
+        st.info("Upload a spreadsheet to get started.")
+        return
+
+    try:
+        with collect("mapping.parse") as parse_timings:
+            pairs = _parse_mapping_pairs(uploaded.getvalue(), uploaded.name)
+    except Exception as exc:
+        st.error(f"Failed to parse file: {exc}")
+        logger.exception("Mapping parsing error")
+        return
+
+    if not pairs:
+        st.warning("No complete source ID / mapping code rows found.")
+        return
+
+    st.success(f"{len(pairs)} mapping(s) parsed")
+    _bulk_sql_section(pairs, catalog, parse_timings)
+
+
+@st.fragment
+@performance_section("mapping.bulk")
+def _bulk_sql_section(
+    pairs: list[tuple[str, str]],
+    catalog: ConfigCatalog | None,
+    parse_timings: Timings | None = None,
+) -> None:
+    include(parse_timings)
+    ids = [sid for sid, _ in pairs]
+    codes = [code for _, code in pairs]
+
+    st.subheader("Step 1: Lookup current mappings")
+    lookup_sql = _build_bulk_lookup_query(ids)
+    sql_output(lookup_sql, key_suffix="_map_bulk_s1")
+
+    st.subheader("Step 2: Check mapping codes exist in config")
+    missing: list[str] = []
+    if catalog is not None:
+        missing = catalog.missing(codes)
+        if missing:
+            st.warning(
+                f"{len(missing)} code(s) not in the local config catalog: "
+                + ", ".join(missing)
+            )
+        else:
+            st.success("All mapping codes found in the local config catalog.")
+    if missing:
+        clone_hint = "clone them in **Clone config rows for the missing codes** below."
+    else:
+        # The bulk clone editor is driven by the catalog's missing codes.
+        clone_hint = (
+            "load or refresh the Config table export under **Config catalog** "
+            "in the sidebar to clone them all in one step."
+        )
+    st.markdown(
+        "Any code returned here needs a config row before the insert will "
+        f"succeed -- {clone_hint}"
+    )
+    check_sql = _build_bulk_config_check(codes)
+    sql_output(check_sql, key_suffix="_map_bulk_s2")
+
+    if catalog is not None and missing:
+        _render_bulk_clone(catalog, missing)
 
+    st.subheader("Step 3: Insert / update mappings")
+    insert_sql = _build_bulk_insert_map(pairs)
+    sql_output(insert_sql, key_suffix="_map_bulk_s3")
+
+    st.divider()
+    with st.expander("Show all SQL", expanded=False):
+        all_sql = _build_bulk_all_steps(pairs)
+        sql_output(all_sql, key_suffix="_map_bulk_all")
+
+
+# ---------------------------------------------------------------------------
+# Single mapping wizard
+# ---------------------------------------------------------------------------
+
+@st.fragment
+@performance_section("mapping.wizard")
+def _render_wizard(
+    source_id: str,
+    mapping_code: str,
+    catalog: ConfigCatalog | None,
+) -> None:
+    """Wizard steps; step buttons and error-recovery input rerun only this."""
     # -- Step navigation --
     step = _current_step()
 
@@ -88,14 +268,11 @@ def render() -> None:
         st.error(str(exc))
         return
 
-    st.code(lookup_sql, language="sql")
-    copy_buttons(lookup_sql, key_suffix="_map_s1")
+    sql_output(lookup_sql, key_suffix="_map_s1")
 
     col_next1, _ = st.columns([1, 3])
     with col_next1:
-        if st.button("Proceed to Step 2 \u2192", key="goto_step2"):
-            _set_step(2)
-            st.rerun()
+        st.button("Proceed to Step 2 \u2192", key="goto_step2", on_click=_set_step, args=(2,))
 
     if step < 2:
         return
@@ -116,19 +293,49 @@ def render() -> None:
         st.error(str(exc))
         return
 
-    st.code(insert_sql, language="sql")
-    copy_buttons(insert_sql, key_suffix="_map_s2")
+    code_missing = catalog is not None and mapping_code not in catalog
+    if catalog is not None:
+        if code_missing:
+            st.warning(
+                f"`{mapping_code}` is not in the local config catalog -- this EXEC "
+                "will fail. Clone a config row first (see below); **Show all SQL** "
+                "orders the clone before the insert."
+            )
+        else:
+            st.success(f"`{mapping_code}` found in the local config catalog.")
+
+    sql_output(insert_sql, key_suffix="_map_s2")
 
     # ------------------------------------------------------------------ #
     # Error-recovery expander
     # ------------------------------------------------------------------ #
     st.divider()
-    with st.expander("Known error: *TransactionTypeExternal does not exist in Config table*", expanded=False):
+    with st.expander(
+        "Known error: *TransactionTypeExternal does not exist in Config table*",
+        expanded=code_missing,
+    ):
         st.markdown(
             "If the EXEC above fails with this error, the mapping code "
             "doesn't exist in the config table yet. Follow the steps below."
         )
 
+        suggestions = catalog.suggest(mapping_code) if code_missing else []
+        if suggestions:
+            # Prefill the best match once per mapping code; a new code
+            # replaces a prefill (or edit) made for the previous one.
+            if st.session_state.get(_PREFILL_FOR_KEY) != mapping_code:
+                st.session_state["existing_ref_code"] = suggestions[0][0]
+                st.session_state[_PREFILL_FOR_KEY] = mapping_code
+            st.markdown("**Closest existing codes (from local config catalog):**")
+            cols = st.columns(len(suggestions))
+            for col, (code, score) in zip(cols, suggestions):
+                col.button(
+                    f"{code} ({score:.0%})",
+                    key=f"suggest_{code}",
+                    on_click=_use_existing_code,
+                    args=(code,),
+                )
+
         existing_code: str = st.text_input(
             "Existing reference code (closest match from Middle Office)",
             placeholder="e.g. SCSHS",
@@ -142,25 +349,21 @@ def render() -> None:
             # ER Step 1 – confirm new code is missing
             st.markdown("**ER Step 1:** Confirm the new code is missing from config")
             er1_sql = build_config_check(mapping_code)
-            st.code(er1_sql, language="sql")
-            copy_buttons(er1_sql, key_suffix="_er1")
+            sql_output(er1_sql, key_suffix="_er1")
 
             # ER Step 2 – look up existing reference row
             st.markdown("**ER Step 2:** Look up existing reference row to clone")
             er2_sql = build_config_lookup_existing(existing_code)
-            st.code(er2_sql, language="sql")
-            copy_buttons(er2_sql, key_suffix="_er2")
+            sql_output(er2_sql, key_suffix="_er2")
 
             # ER Step 3 – clone config row
             st.markdown("**ER Step 3:** Clone config row for the new code")
             er3_sql = build_clone_config_row(mapping_code, existing_code)
-            st.code(er3_sql, language="sql")
-            copy_buttons(er3_sql, key_suffix="_er3")
+            sql_output(er3_sql, key_suffix="_er3")
 
             # ER Step 4 – re-run insert
             st.markdown("**ER Step 4:** Re-run the mapping insert")
-            st.code(insert_sql, language="sql")
-            copy_buttons(insert_sql, key_suffix="_er4")
+            sql_output(insert_sql, key_suffix="_er4")
 
     # ------------------------------------------------------------------ #
     # Show all SQL
@@ -170,19 +373,56 @@ def render() -> None:
 
     with st.expander("Show all SQL", expanded=False):
         try:
-            all_sql = build_all_steps(source_id, mapping_code, existing_for_all)
+            if catalog is not None and (not code_missing or existing_for_all):
+                all_sql = build_resolved_steps(
+                    source_id, mapping_code, catalog, existing_for_all
+                )
+            else:
+                all_sql = build_all_steps(source_id, mapping_code, existing_for_all)
         except ValueError as exc:
             st.error(str(exc))
-            return
-        st.code(all_sql, language="sql")
-        copy_buttons(all_sql, key_suffix="_map_all")
+        else:
+            sql_output(all_sql, key_suffix="_map_all")
 
     # ------------------------------------------------------------------ #
     # Reset
     # ------------------------------------------------------------------ #
-    if st.button("Reset wizard", key="reset_mapping"):
-        _set_step(1)
-        st.rerun()
+    st.button("Reset wizard", key="reset_mapping", on_click=_set_step, args=(1,))
+
+
+# ---------------------------------------------------------------------------
+# Page renderer
+# ---------------------------------------------------------------------------
+
+def render() -> None:
+    """Render the Mapping wizard page."""
+    st.header("Transaction Type Mapping")
+    st.caption(
+        "Generate SQL for IMIX transaction-type mapping requests. "
+        "Work through the steps or use **Show all SQL** at the bottom."
+    )
+
+    with st.sidebar:
+        mode: str = st.radio(
+            "Mode",
+            options=[_MODE_SINGLE, _MODE_BULK],
+            index=0,
+            key="mapping_mode",
+        )
+        if mode == _MODE_SINGLE:
+            source_id, mapping_code = _sidebar()
+        catalog = _catalog_sidebar()
+
+    if mode == _MODE_BULK:
+        _render_bulk(catalog)
+        st.divider()
+        st.caption(
+            "This tool only **generates** SQL text. "
+            "It does not connect to or execute against any database."
+        )
+        return
+
+    _render_wizard(source_id, mapping_code, catalog)
 
     st.divider()
     st.caption(
@@ -0,0 +1,141 @@
+"""Content-addressed LRU cache for :func:`parsing.parse_codes` results.
+
+Streamlit reruns the whole page script on every widget change.  Keying the
+parsed result on a hash of the uploaded bytes (plus the parse options) lets
+reruns that only toggle unrelated options skip the file read entirely.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+from .constants import PARSE_CACHE_MAX_BYTES, PARSE_CACHE_MAX_ENTRIES
+from .parsing import ParseResult, parse_codes
+
+logger = logging.getLogger(__name__)
+
+CacheKey = tuple[str, str, bool, str | None]
+
+
+def _make_key(
+    file_bytes: bytes,
+    filename: str,
+    dedupe: bool,
+    validation_pattern: str | None,
+) -> CacheKey:
+    """Hash the file content; the extension is kept because it picks the reader."""
+    digest = hashlib.sha256(file_bytes).hexdigest()
+    ext = filename.rsplit(".", maxsplit=1)[-1].lower()
+    return (digest, ext, dedupe, validation_pattern)
+
+
+class ParseCache:
+    """Thread-safe LRU cache of :class:`ParseResult` objects.
+
+    Entries are evicted least-recently-used first once either *max_entries*
+    or *max_bytes* (summed :attr:`ParseResult.nbytes`) is exceeded.  Results
+    larger than *max_bytes* on their own are returned but never stored.
+
+    Cached results are shared between callers and must not be mutated.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_bytes: int = PARSE_CACHE_MAX_BYTES,
+        max_entries: int = PARSE_CACHE_MAX_ENTRIES,
+    ) -> None:
+        if max_bytes <= 0 or max_entries <= 0:
+            raise ValueError("Cache limits must be positive.")
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries: OrderedDict[CacheKey, tuple[ParseResult, int]] = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        return self._nbytes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def get(self, key: CacheKey) -> ParseResult | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: CacheKey, result: ParseResult) -> None:
+        size = result.nbytes
+        if size > self.max_bytes:
+            logger.info("Parse result (%d bytes) exceeds cache cap; not cached", size)
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._nbytes -= old[1]
+            self._entries[key] = (result, size)
+            self._nbytes += size
+            while (
+                len(self._entries) > self.max_entries
+                or self._nbytes > self.max_bytes
+            ):
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._nbytes -= evicted
+                logger.debug("Evicted parse cache entry (%d bytes)", evicted)
+
+    def parse(
+        self,
+        file_bytes: bytes,
+        filename: str,
+        *,
+        dedupe: bool = True,
+        validation_pattern: str | None = None,
+    ) -> ParseResult:
+        """Return a cached :func:`parse_codes` result, parsing on a miss."""
+        key = _make_key(file_bytes, filename, dedupe, validation_pattern)
+        result = self.get(key)
+        if result is not None:
+            return result
+        result = parse_codes(
+            file_bytes,
+            filename,
+            dedupe=dedupe,
+            validation_pattern=validation_pattern,
+        )
+        self.put(key, result)
+        return result
+
+
+_default_cache = ParseCache()
+
+
+def cached_parse_codes(
+    file_bytes: bytes,
+    filename: str,
+    *,
+    dedupe: bool = True,
+    validation_pattern: str | None = None,
+) -> ParseResult:
+    """:func:`parse_codes` backed by the process-wide :class:`ParseCache`."""
+    return _default_cache.parse(
+        file_bytes,
+        filename,
+        dedupe=dedupe,
+        validation_pattern=validation_pattern,
+    )
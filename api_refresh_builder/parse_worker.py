@@ -0,0 +1,131 @@
+"""Run :func:`parsing.parse_codes` in a background thread.
+
+Streamlit runs the page script synchronously, so parsing a large upload
+inline blocks every widget until it finishes.  :func:`submit_parse` hands
+the parse to a small thread pool and returns a :class:`ParseJob` the page
+polls for progress on each rerun.  Results go through the shared
+:class:`~.parse_cache.ParseCache`, so a finished job is never repeated.
+
+Cancellation is cooperative: the job's progress callback raises
+:class:`ParseCancelled` at the next chunk boundary once :meth:`ParseJob.cancel`
+has been called.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor, wait
+
+from .constants import PARSE_WORKERS
+from .parse_cache import CacheKey, ParseCache, _default_cache, _make_key
+from .parsing import ParseResult, parse_codes
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=PARSE_WORKERS, thread_name_prefix="parse")
+
+
+class ParseCancelled(Exception):
+    """Raised inside a worker when its job has been cancelled."""
+
+
+class ParseJob:
+    """Handle for one background parse.
+
+    ``rows_read`` is updated by the worker after each chunk and may be read
+    from any thread.
+    """
+
+    def __init__(self, filename: str) -> None:
+        self.filename = filename
+        self.rows_read = 0
+        self._cancel = threading.Event()
+        self._future: Future[ParseResult] | None = None
+
+    def _progress(self, rows_read: int) -> None:
+        if self._cancel.is_set():
+            raise ParseCancelled(self.filename)
+        self.rows_read = rows_read
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def done(self) -> bool:
+        return self._future is not None and self._future.done()
+
+    def wait(self, timeout: float) -> bool:
+        """Block up to *timeout* seconds for the job to finish; return :meth:`done`."""
+        if self._future is not None:
+            wait([self._future], timeout=timeout)
+        return self.done()
+
+    def cancel(self) -> None:
+        """Ask the worker to stop; a job that has not started never runs."""
+        if not self.done():
+            logger.info("Cancelling parse of %s", self.filename)
+        self._cancel.set()
+        if self._future is not None:
+            self._future.cancel()
+
+    def result(self, timeout: float | None = None) -> ParseResult:
+        """Wait for and return the parse result, re-raising any parse error.
+
+        Raises :class:`ParseCancelled` if the job was cancelled before it
+        finished.
+        """
+        assert self._future is not None
+        try:
+            return self._future.result(timeout)
+        except CancelledError:
+            raise ParseCancelled(self.filename) from None
+
+
+def _run(
+    job: ParseJob,
+    cache: ParseCache,
+    key: CacheKey,
+    file_bytes: bytes,
+    filename: str,
+    dedupe: bool,
+    validation_pattern: str | None,
+) -> ParseResult:
+    result = parse_codes(
+        file_bytes,
+        filename,
+        dedupe=dedupe,
+        validation_pattern=validation_pattern,
+        progress=job._progress,
+    )
+    cache.put(key, result)
+    return result
+
+
+def submit_parse(
+    file_bytes: bytes,
+    filename: str,
+    *,
+    dedupe: bool = True,
+    validation_pattern: str | None = None,
+    cache: ParseCache | None = None,
+) -> ParseJob:
+    """Start parsing *file_bytes* in the background and return its job.
+
+    A cache hit returns an already-finished job without touching the pool.
+    """
+    cache = _default_cache if cache is None else cache
+    job = ParseJob(filename)
+
+    key = _make_key(file_bytes, filename, dedupe, validation_pattern)
+    cached = cache.get(key)
+    if cached is not None:
+        job.rows_read = cached.total_found
+        job._future = Future()
+        job._future.set_result(cached)
+        return job
+
+    job._future = _executor.submit(
+        _run, job, cache, key, file_bytes, filename, dedupe, validation_pattern
+    )
+    return job
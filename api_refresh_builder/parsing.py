@@ -1,27 +1,71 @@
-"""Parse entity/API codes from uploaded spreadsheet or CSV files."""
+"""Parse entity/API codes from uploaded spreadsheet or CSV files.
+
+pandas and the Excel engines are imported inside the functions that need
+them, so importing this module (e.g. for :class:`ParseResult`) stays cheap
+for pages that never parse a file.
+"""
 
 from __future__ import annotations
 
 import io
 import logging
+import re
 from dataclasses import dataclass, field
-from typing import Sequence
+from typing import TYPE_CHECKING, Callable, Iterator, Sequence
 
-import pandas as pd
+from .code_pool import CodeList, index_dtype, shared_nbytes
+from .constants import CODE_PATTERN, CSV_CHUNK_ROWS
+from .instrumentation import (
+    Timings,
+    instrumented,
+    log_timings,
+    new_timings,
+    stage,
+    timed_iter,
+)
 
-from .constants import CODE_PATTERN
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
 
 logger = logging.getLogger(__name__)
 
+# Number of invalid codes quoted in the single summary warning.
+_INVALID_LOG_SAMPLE: int = 10
+
+# Cell text that ``pd.read_excel`` treats as missing by default.  The
+# streaming XLSX reader bypasses pandas, so it skips the same values to keep
+# results identical to the DataFrame path.
+_EXCEL_NA_STRINGS: frozenset[str] = frozenset({
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a",
+    "nan", "null",
+})
+
 
 @dataclass
 class ParseResult:
-    """Container for parsing output and statistics."""
+    """Container for parsing output and statistics.
+
+    The code lists are :class:`~.code_pool.CodeList` views that share one
+    string pool, so each code's text is held once.  They support ``len``,
+    indexing, iteration and ``==`` with plain lists; slicing returns a
+    ``list[str]``.  Plain lists passed to the constructor are packed.
+    """
 
-    raw_codes: list[str] = field(default_factory=list)
-    valid_codes: list[str] = field(default_factory=list)
-    invalid_codes: list[str] = field(default_factory=list)
+    raw_codes: Sequence[str] = field(default_factory=list)
+    valid_codes: Sequence[str] = field(default_factory=list)
+    invalid_codes: Sequence[str] = field(default_factory=list)
     duplicates_removed: int = 0
+    # Per-stage costs (read/clean/validate/dedupe); ``None`` unless
+    # instrumentation is enabled.
+    timings: Timings | None = field(default=None, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        for name in ("raw_codes", "valid_codes", "invalid_codes"):
+            codes = getattr(self, name)
+            if not isinstance(codes, CodeList):
+                setattr(self, name, CodeList.from_strings(codes))
 
     @property
     def total_found(self) -> int:
@@ -35,24 +79,95 @@ class ParseResult:
     def invalid_count(self) -> int:
         return len(self.invalid_codes)
 
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the code lists, counting shared pools once."""
+        return shared_nbytes(self.raw_codes, self.valid_codes, self.invalid_codes)
+
+
+def _iter_csv_first_column(buf: io.BytesIO) -> Iterator[pd.Series]:
+    """Stream the first CSV column in fixed-size chunks.
+
+    Only column 0 is materialised (``usecols``), so memory stays flat no
+    matter how many rows or extra columns the file carries.
+    """
+    import pandas as pd
+
+    with pd.read_csv(
+        buf,
+        header=None,
+        dtype=str,
+        usecols=[0],
+        chunksize=CSV_CHUNK_ROWS,
+    ) as reader:
+        for chunk in reader:
+            yield chunk.iloc[:, 0]
+
+
+def _iter_xlsx_first_column(buf: io.BytesIO) -> Iterator[pd.Series]:
+    """Stream column A of the first worksheet using openpyxl read-only mode.
+
+    Rows are pulled lazily from the sheet XML; no other columns are loaded.
+    Values are batched into ``CSV_CHUNK_ROWS``-sized chunks.  Whole-number
+    floats become ``int`` first, as in :func:`pandas.read_excel`, so
+    ``1e20`` reads as ``"100000000000000000000"`` rather than ``"1e+20"``.
+    """
+    import pandas as pd
+    from openpyxl import load_workbook
+
+    wb = load_workbook(buf, read_only=True, data_only=True, keep_links=False)
+    try:
+        ws = wb.worksheets[0]
+        batch: list[object] = []
+        for (value,) in ws.iter_rows(max_col=1, values_only=True):
+            if isinstance(value, str) and value in _EXCEL_NA_STRINGS:
+                continue
+            if isinstance(value, float) and value.is_integer():
+                value = int(value)
+            batch.append(value)
+            if len(batch) >= CSV_CHUNK_ROWS:
+                yield pd.Series(batch, dtype=object)
+                batch = []
+        if batch:
+            yield pd.Series(batch, dtype=object)
+    finally:
+        wb.close()
+
+
+def _iter_first_column(buf: io.BytesIO, filename: str) -> Iterator[pd.Series]:
+    """Yield first-column chunks from a spreadsheet or CSV, row 0 included."""
+    import pandas as pd
 
-def _read_first_column(buf: io.BytesIO, filename: str) -> list[str]:
-    """Read the first column from a spreadsheet or CSV, treating row 0 as data."""
     ext = filename.rsplit(".", maxsplit=1)[-1].lower()
 
     if ext == "csv":
-        df = pd.read_csv(buf, header=None, dtype=str)
-    elif ext in ("xls", "xlsx"):
-        engine = "xlrd" if ext == "xls" else "openpyxl"
-        df = pd.read_excel(buf, header=None, dtype=str, engine=engine)
+        yield from _iter_csv_first_column(buf)
+    elif ext == "xlsx":
+        yield from _iter_xlsx_first_column(buf)
+    elif ext == "xls":
+        df = pd.read_excel(buf, header=None, dtype=str, engine="xlrd")
+        if df.empty:
+            return
+        yield df.iloc[:, 0]
     else:
         raise ValueError(f"Unsupported file type: .{ext}")
 
-    if df.empty:
-        return []
 
-    first_col: pd.Series = df.iloc[:, 0]
-    return first_col.tolist()
+def _drop_str_accessor(series: pd.Series) -> None:
+    """Forget the ``.str`` accessor pandas caches on *series*.
+
+    The accessor refers back to its Series; left in place, that cycle keeps
+    every chunk's strings alive until the next full garbage collection.
+    """
+    del series.str
+
+
+def _clean_chunk(chunk: pd.Series) -> pd.Series:
+    """Drop missing values, coerce to ``str``, strip, and drop blanks."""
+    text = chunk.dropna().astype(str)
+    codes = text.str.strip()
+    _drop_str_accessor(text)
+    return codes[codes != ""]
 
 
 def parse_codes(
@@ -61,9 +176,16 @@ def parse_codes(
     *,
     dedupe: bool = True,
     validation_pattern: str | None = None,
+    progress: Callable[[int], None] | None = None,
 ) -> ParseResult:
     """Parse, clean, validate and optionally deduplicate codes.
 
+    Each chunk from the reader is cleaned and validated with vectorised
+    pandas string operations, then appended to one string pool.
+    Deduplication runs once over all valid codes, by hash.  The result's
+    code lists are views over that pool (about the code length plus 8 bytes
+    per code).
+
     Parameters
     ----------
     file_bytes:
@@ -74,39 +196,77 @@ def parse_codes(
         Remove duplicates while preserving first-occurrence order.
     validation_pattern:
         Override regex pattern string; ``None`` uses the default from constants.
+    progress:
+        Called after each chunk with the cumulative number of rows read.
+        An exception raised by the callback aborts the parse and propagates,
+        which is how background jobs are cancelled.
+
+    When instrumentation is enabled the per-stage costs are stored in
+    :attr:`ParseResult.timings` and logged.
     """
-    buf = io.BytesIO(file_bytes)
-    raw_values = _read_first_column(buf, filename)
+    import numpy as np
+    import pandas as pd
 
-    pattern = CODE_PATTERN if validation_pattern is None else __import__("re").compile(validation_pattern)
+    buf = io.BytesIO(file_bytes)
+    pattern = CODE_PATTERN if validation_pattern is None else re.compile(validation_pattern)
 
-    raw_codes: list[str] = []
-    valid_codes: list[str] = []
-    invalid_codes: list[str] = []
-    seen: set[str] = set()
-    duplicates_removed = 0
+    # Per chunk: the codes' text joined, their lengths, the validity mask
+    # and (for dedupe) 64-bit hashes of the valid codes.
+    texts: list[str] = []
+    lengths: list[np.ndarray] = []
+    masks: list[np.ndarray] = []
+    hashes: list[np.ndarray] = []
+    rows_read = 0
+    timings = new_timings()
 
-    for val in raw_values:
-        if val is None or (isinstance(val, float) and pd.isna(val)):
-            continue
-        code = str(val).strip()
-        if not code:
+    for chunk in timed_iter(timings, "read", _iter_first_column(buf, filename)):
+        rows_read += len(chunk)
+        if progress is not None:
+            progress(rows_read)
+        with stage(timings, "clean", len(chunk)):
+            codes = _clean_chunk(chunk)
+        if codes.empty:
             continue
+        with stage(timings, "validate", len(codes)):
+            is_valid = codes.str.match(pattern).to_numpy(dtype=bool)
+            lengths.append(codes.str.len().to_numpy(dtype=np.int64))
+            _drop_str_accessor(codes)
+            values = codes.to_numpy()
+            texts.append("".join(values))
+            masks.append(is_valid)
+            if dedupe:
+                hashes.append(pd.util.hash_array(values[is_valid], categorize=False))
 
-        raw_codes.append(code)
+    pool = "".join(texts)
+    del texts
+    n_codes = sum(len(m) for m in masks)
+    offsets = np.zeros(n_codes + 1, dtype=index_dtype(len(pool)))
+    if n_codes:
+        np.cumsum(np.concatenate(lengths), out=offsets[1:])
+    mask = np.concatenate(masks) if masks else np.zeros(0, dtype=bool)
+    del lengths, masks
+    dtype = index_dtype(n_codes)
+    valid_index = np.flatnonzero(mask).astype(dtype)
+    invalid_index = np.flatnonzero(~mask).astype(dtype)
 
-        if not pattern.match(code):
-            invalid_codes.append(code)
-            logger.warning("Invalid code skipped: %s", code)
-            continue
-
-        if dedupe:
-            if code in seen:
-                duplicates_removed += 1
-                continue
-            seen.add(code)
+    raw_codes = CodeList(pool, offsets)
+    duplicates_removed = 0
+    if dedupe and len(valid_index):
+        with stage(timings, "dedupe", len(valid_index)):
+            keep = _first_occurrences(raw_codes.select(valid_index), np.concatenate(hashes))
+            if keep is not None:
+                duplicates_removed = len(valid_index) - len(keep)
+                valid_index = valid_index[keep]
+    del hashes
+    valid_codes = raw_codes.select(valid_index)
+    invalid_codes = raw_codes.select(invalid_index)
 
-        valid_codes.append(code)
+    if invalid_codes:
+        logger.warning(
+            "%d invalid code(s) skipped, e.g. %s",
+            len(invalid_codes),
+            ", ".join(invalid_codes[:_INVALID_LOG_SAMPLE]),
+        )
 
     logger.info(
         "Parsed %d raw codes → %d valid, %d invalid, %d dupes removed",
@@ -115,10 +275,160 @@ def parse_codes(
         len(invalid_codes),
         duplicates_removed,
     )
+    log_timings("parse_codes", timings, filename=filename)
 
     return ParseResult(
         raw_codes=raw_codes,
         valid_codes=valid_codes,
         invalid_codes=invalid_codes,
         duplicates_removed=duplicates_removed,
+        timings=timings,
     )
+
+
+def _first_occurrences(codes: CodeList, hashes: np.ndarray) -> np.ndarray | None:
+    """Positions of the first occurrence of each distinct code, in order.
+
+    Codes are grouped by their 64-bit *hashes* (from
+    :func:`pandas.util.hash_array`) so no set of ``str`` objects is built.
+    Every duplicate is then compared with the code it was grouped under, and
+    the exact (``str``-based) path is used if any hashes collide.  Returns
+    ``None`` when there are no duplicates.
+    """
+    import numpy as np
+    import pandas as pd
+
+    # A stable sort groups equal hashes with the earliest position first;
+    # it needs far less scratch memory than a hash table over the hashes.
+    order = np.argsort(hashes, kind="stable")
+    ordered = hashes[order]
+    starts_group = np.empty(len(order), dtype=bool)
+    starts_group[0] = True
+    np.not_equal(ordered[1:], ordered[:-1], out=starts_group[1:])
+    del ordered
+    if starts_group.all():
+        return None
+
+    group = np.cumsum(starts_group) - 1
+    group_first = order[starts_group]
+    dupes = order[~starts_group]
+    originals = group_first[group[~starts_group]]
+    del group
+    first = np.sort(group_first)
+    block = 65_536
+    for start in range(0, len(dupes), block):
+        a = codes.select(dupes[start:start + block])
+        b = codes.select(originals[start:start + block])
+        if a != b:
+            logger.debug("Hash collision during dedupe; comparing codes exactly")
+            is_dupe = pd.Series(codes.tolist(), dtype=object).duplicated(keep="first")
+            return np.flatnonzero(~is_dupe.to_numpy())
+    return first
+
+
+# ---------------------------------------------------------------------------
+# Multi-column tables (bulk workflows)
+# ---------------------------------------------------------------------------
+
+def read_table(file_bytes: bytes, filename: str) -> pd.DataFrame:
+    """Read a spreadsheet or CSV whose first row is a header.
+
+    Every cell is returned as a stripped ``str``; blank cells become ``""``.
+    """
+    import pandas as pd
+
+    buf = io.BytesIO(file_bytes)
+    ext = filename.rsplit(".", maxsplit=1)[-1].lower()
+
+    if ext == "csv":
+        df = pd.read_csv(buf, dtype=str, keep_default_na=False)
+    elif ext in ("xls", "xlsx"):
+        engine = "xlrd" if ext == "xls" else "openpyxl"
+        df = pd.read_excel(buf, dtype=str, keep_default_na=False, engine=engine)
+    else:
+        raise ValueError(f"Unsupported file type: .{ext}")
+
+    df.columns = [str(c).strip() for c in df.columns]
+    return df.fillna("").apply(lambda col: col.str.strip())
+
+
+@instrumented()
+def parse_amendments(file_bytes: bytes, filename: str) -> dict[str, dict[str, str]]:
+    """Parse a ref -> field values sheet for bulk CRM amendments.
+
+    The first column holds transaction refs; every other column header is a
+    field name.  Blank cells mean "leave unchanged" and are omitted.  Rows
+    with a blank ref are skipped.
+
+    Raises
+    ------
+    ValueError
+        If the sheet has no field columns or a ref appears more than once.
+    """
+    df = read_table(file_bytes, filename)
+    if df.shape[1] < 2:
+        raise ValueError("Expected a ref column followed by at least one field column.")
+
+    ref_col, *field_cols = df.columns
+    amendments: dict[str, dict[str, str]] = {}
+    duplicates: list[str] = []
+
+    for row in df.itertuples(index=False, name=None):
+        ref = row[0]
+        if not ref:
+            continue
+        if ref in amendments:
+            duplicates.append(ref)
+            continue
+        amendments[ref] = {
+            col: val for col, val in zip(field_cols, row[1:]) if val
+        }
+
+    if duplicates:
+        raise ValueError(
+            f"Duplicate ref(s) in '{ref_col}' column: {', '.join(duplicates[:10])}"
+        )
+
+    logger.info(
+        "Parsed %d amendment row(s) across %d field column(s)",
+        len(amendments),
+        len(field_cols),
+    )
+    return amendments
+
+
+@instrumented()
+def parse_mapping_pairs(file_bytes: bytes, filename: str) -> list[tuple[str, str]]:
+    """Parse a source ID -> mapping code sheet for bulk mapping requests.
+
+    The first row is a header; the first two columns hold the source ID and
+    the target mapping code.  Rows missing either value are skipped and
+    exact repeats are collapsed.
+
+    Raises
+    ------
+    ValueError
+        If the sheet has fewer than two columns or a source ID is mapped to
+        more than one code.
+    """
+    df = read_table(file_bytes, filename)
+    if df.shape[1] < 2:
+        raise ValueError("Expected a source ID column and a mapping code column.")
+
+    pairs: dict[str, str] = {}
+    conflicts: list[str] = []
+    for source_id, code in df.iloc[:, :2].itertuples(index=False, name=None):
+        if not source_id or not code:
+            continue
+        existing = pairs.setdefault(source_id, code)
+        if existing != code:
+            conflicts.append(source_id)
+
+    if conflicts:
+        raise ValueError(
+            "Source ID(s) mapped to more than one code: "
+            f"{', '.join(dict.fromkeys(conflicts[:10]))}"
+        )
+
+    logger.info("Parsed %d mapping pair(s)", len(pairs))
+    return list(pairs.items())
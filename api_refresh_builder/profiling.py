@@ -0,0 +1,207 @@
+"""Opt-in profiling of Streamlit script reruns.
+
+``API_REFRESH_PROFILE`` selects when a rerun is profiled:
+
+``0`` / ``off`` (default)
+    Never; the query parameter is ignored.
+``query``
+    Only sessions opened with ``?profile=1`` in the URL.
+``1`` / ``always``
+    Every rerun of every session.
+
+Profiling stays off unless the deployment opts in, so visitors cannot
+switch it on from the URL by themselves.
+
+A profiled rerun writes two files to ``PROFILE_DIR``: the raw profile
+(``.prof`` from :mod:`cProfile`, readable with :mod:`pstats` or snakeviz,
+or ``.pyisession`` when the sampling profiler ``pyinstrument`` is
+installed) and a ``.txt`` table of the top hotspots.  Only the newest
+``PROFILE_KEEP`` reruns are kept.
+
+Only the script thread is profiled; background parse jobs run on their
+own threads and show up as time spent waiting, if at all.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import logging
+import os
+import pstats
+import re
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Mapping
+
+from .constants import PROFILE_DIR, PROFILE_KEEP, PROFILE_TOP_N
+
+logger = logging.getLogger(__name__)
+
+ENV_VAR = "API_REFRESH_PROFILE"
+QUERY_PARAM = "profile"
+
+_TRUE = ("1", "true", "yes", "on", "always")
+_FALSE = ("0", "false", "no", "off", "never")
+_PROFILE_SUFFIXES = (".prof", ".pyisession", ".txt")
+
+
+def profiling_requested(query_params: Mapping[str, str] | None = None) -> bool:
+    """Whether this rerun should be profiled (see the module docstring)."""
+    mode = os.environ.get(ENV_VAR, "off").strip().lower()
+    if mode in _TRUE:
+        return True
+    if mode in _FALSE or not query_params:
+        return False
+    return str(query_params.get(QUERY_PARAM, "")).strip().lower() in _TRUE
+
+
+class _CProfileBackend:
+    suffix = ".prof"
+
+    def __init__(self) -> None:
+        self._profile = cProfile.Profile()
+
+    def start(self) -> None:
+        self._profile.enable()
+
+    def stop(self) -> None:
+        self._profile.disable()
+
+    def save(self, path: Path) -> None:
+        self._profile.dump_stats(path)
+
+    def hotspots(self, top_n: int) -> str:
+        buf = io.StringIO()
+        stats = pstats.Stats(self._profile, stream=buf)
+        stats.strip_dirs().sort_stats(pstats.SortKey.TIME).print_stats(top_n)
+        return buf.getvalue()
+
+
+class _PyinstrumentBackend:
+    suffix = ".pyisession"
+
+    def __init__(self) -> None:
+        from pyinstrument import Profiler
+
+        self._profiler = Profiler(async_mode="disabled")
+        self._session = None
+
+    def start(self) -> None:
+        self._profiler.start()
+
+    def stop(self) -> None:
+        self._session = self._profiler.stop()
+
+    def save(self, path: Path) -> None:
+        self._session.save(str(path))
+
+    def hotspots(self, top_n: int) -> str:
+        # Flat view: functions by self time, one per line after the header.
+        text = self._profiler.output_text(unicode=True, color=False, flat=True)
+        *header, entries = text.strip("\n").split("\n\n")
+        return "\n\n".join([*header, "\n".join(entries.splitlines()[:top_n])]) + "\n"
+
+
+def _new_backend() -> _CProfileBackend | _PyinstrumentBackend:
+    """A sampling profiler if ``pyinstrument`` is installed, else cProfile."""
+    try:
+        return _PyinstrumentBackend()
+    except ImportError:
+        return _CProfileBackend()
+
+
+def _prune(directory: Path, keep: int) -> None:
+    """Delete all but the newest *keep* profiled reruns in *directory*."""
+    stems = sorted(
+        {p.stem for p in directory.iterdir() if p.suffix in _PROFILE_SUFFIXES},
+        reverse=True,
+    )
+    for stem in stems[keep:]:
+        for suffix in _PROFILE_SUFFIXES:
+            (directory / f"{stem}{suffix}").unlink(missing_ok=True)
+
+
+def _save(
+    backend: _CProfileBackend | _PyinstrumentBackend,
+    label: str,
+    elapsed: float,
+    directory: str | os.PathLike[str],
+    keep: int,
+    top_n: int,
+) -> list[Path]:
+    """Write the raw profile and hotspot table; return their paths."""
+    out = Path(directory)
+    out.mkdir(parents=True, exist_ok=True)
+    safe_label = re.sub(r"[^A-Za-z0-9_.-]+", "_", label)
+    stem = f"{datetime.now():%Y%m%d-%H%M%S-%f}_{safe_label}"
+    raw = out / f"{stem}{backend.suffix}"
+    table = out / f"{stem}.txt"
+    backend.save(raw)
+    table.write_text(
+        f"{label}: {elapsed * 1000:.1f} ms\n\n{backend.hotspots(top_n)}",
+        encoding="utf-8",
+    )
+    _prune(out, keep)
+    logger.info("Profiled %s rerun (%.1f ms) -> %s", label, elapsed * 1000, raw)
+    return [raw, table]
+
+
+@contextmanager
+def profile_rerun(
+    label: str,
+    *,
+    enabled: bool,
+    directory: str | os.PathLike[str] = PROFILE_DIR,
+    keep: int = PROFILE_KEEP,
+    top_n: int = PROFILE_TOP_N,
+) -> Iterator[list[Path]]:
+    """Profile the ``with`` body and write its profile and hotspot table.
+
+    Yields a list that is filled with the written paths once the body
+    exits (empty when *enabled* is false, the profiler could not start or
+    the files could not be written).  The profile is saved even when the
+    body raises, which includes Streamlit's own rerun and stop signals; a
+    failure while saving is logged and never masks the body's exception.
+
+    Parameters
+    ----------
+    label:
+        Included in the file names (e.g. the page key).
+    enabled:
+        Usually :func:`profiling_requested`.
+    directory:
+        Created if missing.
+    keep:
+        Number of profiled reruns to retain; older files are deleted.
+    top_n:
+        Functions listed in the hotspot table.
+    """
+    written: list[Path] = []
+    if not enabled:
+        yield written
+        return
+
+    backend = _new_backend()
+    try:
+        backend.start()
+    except ValueError as exc:
+        # Python 3.12+ allows one cProfile per process; a concurrent
+        # session already holds it.
+        logger.warning("Rerun not profiled: %s", exc)
+        yield written
+        return
+
+    start = time.perf_counter()
+    try:
+        yield written
+    finally:
+        backend.stop()
+        try:
+            written += _save(backend, label, time.perf_counter() - start, directory, keep, top_n)
+        except Exception:
+            # Never let a failed report replace the rerun's own exception.
+            logger.exception("Could not save the %s rerun profile", label)
+
@@ -0,0 +1,385 @@
+"""Local HTTP service exposing the SQL generators as JSON endpoints (ASGI).
+
+Requires the optional ``service`` extra (``starlette`` and ``uvicorn``).
+Run it with ``python -m api_refresh_builder serve`` or any ASGI server::
+
+    uvicorn --factory api_refresh_builder.service:create_app
+
+Endpoints (all POST bodies are JSON unless noted):
+
+``GET  /health``
+``POST /refresh``           ``{codes, refresh_family, target_types, debug, output_mode,
+                             batch_size, validation_pattern}``
+``POST /refresh/upload``    raw file body; options in the query string
+``POST /mapping``           ``{source_id, mapping_code, existing_code}``
+``POST /mapping/bulk``      ``{pairs: [[source_id, mapping_code], ...]}``
+``POST /crm``               ``{refs, fields, use_ref_table}``
+``POST /crm/bulk``          ``{amendments: {ref: {field: value}}}``
+
+Builder calls run on Starlette's thread pool and uploads are parsed (and
+their SQL built) in a process pool, so the event loop only ever does I/O
+and stays responsive under many concurrent requests.
+
+Every value lands in a string literal of the generated SQL, so requests are
+checked before any builder runs: codes must match the code pattern (or the
+request's ``validation_pattern``), CRM field names must be plain identifiers,
+and refs, values, source IDs and mapping codes may not contain a single
+quote.  Invalid input returns ``400`` with ``{"error": ...}``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import re
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Iterable
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from . import __version__, crm_builder, mapping_builder
+from .constants import (
+    CODE_PATTERN,
+    CRM_REF_TABLE_THRESHOLD,
+    DEFAULT_TARGET_TYPES,
+    OUTPUT_BATCHED,
+    OUTPUT_SINGLE,
+    OUTPUT_TEMP_TABLE,
+    SQL_BATCH_MAX_CODES,
+)
+
+logger = logging.getLogger(__name__)
+
+# ``output_mode`` values accepted by the refresh endpoints.
+OUTPUT_MODE_NAMES: dict[str, str] = {
+    "single": OUTPUT_SINGLE,
+    "batched": OUTPUT_BATCHED,
+    "temp-table": OUTPUT_TEMP_TABLE,
+}
+
+
+# Column names accepted in CRM ``fields``.
+_FIELD_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# Offending values echoed back in a validation error.
+_ERROR_SAMPLES: int = 5
+
+
+class BadRequest(ValueError):
+    """Malformed request; returned as ``400``."""
+
+
+# ---------------------------------------------------------------------------
+# Request helpers
+# ---------------------------------------------------------------------------
+
+async def _json_body(request: Request) -> dict[str, Any]:
+    try:
+        body = await request.json()
+    except ValueError as exc:
+        raise BadRequest("Request body must be valid JSON.") from exc
+    if not isinstance(body, dict):
+        raise BadRequest("Request body must be a JSON object.")
+    return body
+
+
+def _str_list(body: dict[str, Any], key: str) -> list[str]:
+    value = body.get(key)
+    if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+        raise BadRequest(f"'{key}' must be a list of strings.")
+    return value
+
+
+def _str(body: dict[str, Any], key: str, *, required: bool = True) -> str | None:
+    value = body.get(key)
+    if value is None and not required:
+        return None
+    if not isinstance(value, str):
+        raise BadRequest(f"'{key}' must be a string.")
+    return value
+
+
+def _is_str_map(value: Any) -> bool:
+    return isinstance(value, dict) and all(
+        isinstance(k, str) and isinstance(v, str) for k, v in value.items()
+    )
+
+
+def _reject(key: str, message: str, bad: list[str]) -> None:
+    if bad:
+        sample = ", ".join(repr(v) for v in bad[:_ERROR_SAMPLES])
+        raise BadRequest(f"'{key}' {message}: {sample}")
+
+
+def _check_literals(key: str, values: Iterable[str]) -> None:
+    """Reject *values* that would break out of a quoted SQL literal."""
+    _reject(key, "must not contain single quotes", [v for v in values if "'" in v])
+
+
+def _code_pattern(source: str | None) -> re.Pattern[str]:
+    if source is None:
+        return CODE_PATTERN
+    try:
+        return re.compile(source)
+    except re.error as exc:
+        raise BadRequest(f"'validation_pattern' is not a valid regex: {exc}") from None
+
+
+def _check_codes(codes: list[str], validation_pattern: str | None) -> None:
+    pattern = _code_pattern(validation_pattern)
+    _reject("codes", "contains invalid codes", [c for c in codes if not pattern.match(c)])
+    _check_literals("codes", codes)
+
+
+def _build(builder: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Call *builder*, turning its input-validation ``ValueError`` into a ``400``."""
+    try:
+        return builder(*args, **kwargs)
+    except ValueError as exc:
+        raise BadRequest(str(exc)) from exc
+
+
+def _output_mode(name: Any) -> str:
+    if not isinstance(name, str) or name not in OUTPUT_MODE_NAMES:
+        raise BadRequest(
+            f"'output_mode' must be one of: {', '.join(OUTPUT_MODE_NAMES)}"
+        )
+    return OUTPUT_MODE_NAMES[name]
+
+
+def _refresh_options(source: dict[str, Any]) -> dict[str, Any]:
+    """Refresh options from a JSON body or query string (all strings there)."""
+    types = source.get("target_types", DEFAULT_TARGET_TYPES)
+    if isinstance(types, str):
+        types = [t.strip() for t in types.split(",") if t.strip()]
+    if not isinstance(types, list) or not all(isinstance(t, str) for t in types):
+        raise BadRequest("'target_types' must be a list of strings.")
+    debug = source.get("debug", False)
+    if isinstance(debug, str):
+        debug = debug.lower() in ("1", "true", "yes")
+    elif not isinstance(debug, bool):
+        raise BadRequest("'debug' must be a boolean.")
+    try:
+        batch_size = int(source.get("batch_size", SQL_BATCH_MAX_CODES))
+    except (TypeError, ValueError):
+        raise BadRequest("'batch_size' must be an integer.") from None
+    return {
+        "refresh_family": _str(source, "refresh_family"),
+        "target_types": types,
+        "output_mode": _output_mode(source.get("output_mode", "single")),
+        "debug": debug,
+        "max_codes": batch_size,
+        "validation_pattern": _str(source, "validation_pattern", required=False),
+    }
+
+
+def _refresh_sql(codes: list[str], options: dict[str, Any]) -> str:
+    from .sql_builder import iter_sql_for_mode
+
+    fragments = _build(
+        iter_sql_for_mode,
+        codes,
+        options["refresh_family"],
+        options["target_types"],
+        output_mode=options["output_mode"],
+        debug=options["debug"],
+        max_codes=options["max_codes"],
+    )
+    return "".join(fragments)
+
+
+def _parse_and_build(
+    file_bytes: bytes,
+    filename: str,
+    dedupe: bool,
+    options: dict[str, Any],
+) -> dict[str, Any]:
+    """Worker-process job for ``/refresh/upload``: parse, then build the SQL."""
+    from .parsing import parse_codes
+
+    pattern = options["validation_pattern"]
+    _code_pattern(pattern)
+    try:
+        result = parse_codes(
+            file_bytes, filename, dedupe=dedupe, validation_pattern=pattern
+        )
+    except Exception as exc:
+        raise BadRequest(f"Failed to parse file: {exc}") from exc
+    stats = {
+        "total_found": result.total_found,
+        "valid_count": result.valid_count,
+        "invalid_count": result.invalid_count,
+        "duplicates_removed": result.duplicates_removed,
+        "invalid_codes": result.invalid_codes[:100],
+    }
+    if not result.valid_codes:
+        raise BadRequest("No valid codes found.")
+    if pattern is not None:
+        # The default pattern admits no quotes; a custom one might.
+        _check_literals("codes", result.valid_codes)
+    return {"stats": stats, "sql": _refresh_sql(result.valid_codes, options)}
+
+
+# ---------------------------------------------------------------------------
+# Endpoints
+# ---------------------------------------------------------------------------
+
+async def health(request: Request) -> JSONResponse:
+    return JSONResponse({"status": "ok", "version": __version__})
+
+
+async def refresh(request: Request) -> JSONResponse:
+    body = await _json_body(request)
+    codes = _str_list(body, "codes")
+    options = _refresh_options(body)
+    _check_codes(codes, options["validation_pattern"])
+    sql = await run_in_threadpool(_refresh_sql, codes, options)
+    return JSONResponse({"sql": sql})
+
+
+async def refresh_upload(request: Request) -> JSONResponse:
+    params = dict(request.query_params)
+    filename = _str(params, "filename")
+    options = _refresh_options(params)
+    dedupe = params.get("dedupe", "true").lower() not in ("0", "false", "no")
+    file_bytes = await request.body()
+    if not file_bytes:
+        raise BadRequest("Request body must contain the uploaded file.")
+
+    loop = asyncio.get_running_loop()
+    payload = await loop.run_in_executor(
+        request.app.state.executor,
+        _parse_and_build,
+        file_bytes,
+        filename,
+        dedupe,
+        options,
+    )
+    return JSONResponse(payload)
+
+
+async def mapping(request: Request) -> JSONResponse:
+    body = await _json_body(request)
+    source_id = _str(body, "source_id")
+    mapping_code = _str(body, "mapping_code")
+    existing = _str(body, "existing_code", required=False)
+    _check_literals("mapping", [v for v in (source_id, mapping_code, existing) if v])
+    sql = await run_in_threadpool(
+        _build, mapping_builder.build_all_steps, source_id, mapping_code, existing
+    )
+    return JSONResponse({"sql": sql})
+
+
+async def mapping_bulk(request: Request) -> JSONResponse:
+    body = await _json_body(request)
+    pairs = body.get("pairs")
+    if not isinstance(pairs, list) or not all(
+        isinstance(p, list) and len(p) == 2 and all(isinstance(v, str) for v in p)
+        for p in pairs
+    ):
+        raise BadRequest("'pairs' must be a list of [source_id, mapping_code] pairs.")
+    _check_literals("pairs", [v for p in pairs for v in p])
+    sql = await run_in_threadpool(
+        _build, mapping_builder.build_bulk_all_steps, [tuple(p) for p in pairs]
+    )
+    return JSONResponse({"sql": sql})
+
+
+def _crm_steps(refs: list[str], fields: dict[str, str], use_ref_table: bool) -> dict[str, str]:
+    opts = {"use_ref_table": use_ref_table}
+    steps = {
+        "pre_check": _build(crm_builder.build_pre_check, refs, **opts),
+        "update": _build(crm_builder.build_update, refs, fields, **opts),
+        "post_check": _build(crm_builder.build_post_check, refs, **opts),
+        "full_flow": _build(crm_builder.build_full_flow, refs, fields, **opts),
+    }
+    if use_ref_table:
+        steps["ref_table_load"] = _build(crm_builder.build_ref_table_load, refs)
+    return steps
+
+
+async def crm(request: Request) -> JSONResponse:
+    body = await _json_body(request)
+    refs = _str_list(body, "refs")
+    fields = body.get("fields")
+    if not _is_str_map(fields):
+        raise BadRequest("'fields' must be an object of field name -> value.")
+    _check_literals("refs", refs)
+    _reject(
+        "fields", "has invalid field names",
+        [k for k in fields if not _FIELD_NAME.match(k.strip())],
+    )
+    _check_literals("fields", fields.values())
+    use_ref_table = body.get("use_ref_table")
+    if use_ref_table is None:
+        use_ref_table = len(refs) > CRM_REF_TABLE_THRESHOLD
+    elif not isinstance(use_ref_table, bool):
+        raise BadRequest("'use_ref_table' must be a boolean.")
+    steps = await run_in_threadpool(_crm_steps, refs, fields, use_ref_table)
+    return JSONResponse(steps)
+
+
+async def crm_bulk(request: Request) -> JSONResponse:
+    body = await _json_body(request)
+    amendments = body.get("amendments")
+    if not isinstance(amendments, dict) or not all(
+        _is_str_map(f) for f in amendments.values()
+    ):
+        raise BadRequest("'amendments' must be an object of ref -> {field: value}.")
+    sql = await run_in_threadpool(_build, crm_builder.build_bulk_update, amendments)
+    return JSONResponse({"sql": sql})
+
+
+# ---------------------------------------------------------------------------
+# Application
+# ---------------------------------------------------------------------------
+
+def _default_executor() -> Executor:
+    return ProcessPoolExecutor(max_workers=os.cpu_count())
+
+
+async def _bad_request(request: Request, exc: Exception) -> JSONResponse:
+    return JSONResponse({"error": str(exc)}, status_code=400)
+
+
+def create_app(
+    *,
+    executor_factory: Callable[[], Executor] | None = None,
+) -> Starlette:
+    """Build the ASGI app.
+
+    *executor_factory* creates the pool used for upload parsing when the app
+    starts (default: a :class:`ProcessPoolExecutor` with one worker per
+    core); it is shut down when the app stops.
+    """
+    if executor_factory is None:
+        executor_factory = _default_executor
+
+    @asynccontextmanager
+    async def lifespan(app: Starlette) -> AsyncIterator[None]:
+        app.state.executor = executor_factory()
+        try:
+            yield
+        finally:
+            app.state.executor.shutdown(wait=False, cancel_futures=True)
+
+    routes = [
+        Route("/health", health, methods=["GET"]),
+        Route("/refresh", refresh, methods=["POST"]),
+        Route("/refresh/upload", refresh_upload, methods=["POST"]),
+        Route("/mapping", mapping, methods=["POST"]),
+        Route("/mapping/bulk", mapping_bulk, methods=["POST"]),
+        Route("/crm", crm, methods=["POST"]),
+        Route("/crm/bulk", crm_bulk, methods=["POST"]),
+    ]
+    return Starlette(
+        routes=routes,
+        lifespan=lifespan,
+        exception_handlers={BadRequest: _bad_request},
+    )
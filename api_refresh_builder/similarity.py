@@ -0,0 +1,59 @@
+"""Trigram similarity index for fuzzy code lookup.
+
+Strings are lower-cased and padded (``"  abc "``) before being split into
+character trigrams, as PostgreSQL's ``pg_trgm`` does, so short codes and
+word starts still produce useful grams.  Similarity is the Jaccard index of
+the two trigram sets.  Postings (trigram -> document ids) are stored as
+NumPy arrays so a query is one ``bincount`` over the postings it touches.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Iterable
+
+import numpy as np
+
+
+def trigrams(text: str) -> frozenset[str]:
+    """Return the padded, lower-cased character trigrams of *text*."""
+    grams: set[str] = set()
+    for word in text.lower().split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+class TrigramIndex:
+    """Inverted trigram index over a list of strings.
+
+    Parameters
+    ----------
+    texts:
+        Documents to index; document ids are positions in this iterable.
+    """
+
+    def __init__(self, texts: Iterable[str]) -> None:
+        sizes: list[int] = []
+        postings: dict[str, list[int]] = defaultdict(list)
+        for doc_id, text in enumerate(texts):
+            grams = trigrams(text)
+            sizes.append(len(grams))
+            for gram in grams:
+                postings[gram].append(doc_id)
+        self._sizes = np.asarray(sizes, dtype=np.int32)
+        self._postings: dict[str, np.ndarray] = {
+            gram: np.asarray(ids, dtype=np.int32) for gram, ids in postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    def scores(self, query: str) -> np.ndarray:
+        """Return the similarity of *query* to every document (0.0 if unrelated)."""
+        q = trigrams(query)
+        hits = [self._postings[g] for g in q if g in self._postings]
+        if not hits:
+            return np.zeros(len(self), dtype=np.float64)
+        shared = np.bincount(np.concatenate(hits), minlength=len(self))
+        return shared / (len(q) + self._sizes - shared)
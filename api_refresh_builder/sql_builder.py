@@ -1,15 +1,128 @@
-"""Generate the EXEC SQL block for the API refresh stored procedure."""
+"""Generate the EXEC SQL block for the API refresh stored procedure.
+
+Every ``build_*`` function has an ``iter_*`` twin that yields the same SQL
+as a stream of string fragments, for writing very large scripts straight to
+a file without holding the whole text in memory (see :mod:`.sql_writer`).
+"""
 
 from __future__ import annotations
 
 import logging
-from typing import Sequence
+from typing import Iterable, Iterator, Sequence
 
-from .constants import STORED_PROCEDURES
+from .constants import (
+    OUTPUT_BATCHED,
+    OUTPUT_SINGLE,
+    OUTPUT_TEMP_TABLE,
+    SQL_BATCH_MAX_CODES,
+    SQL_BATCH_SEPARATOR,
+    SQL_VALUES_MAX_ROWS,
+    STORED_PROCEDURES,
+    TEMP_TABLE_NAME,
+)
+from .instrumentation import instrumented
 
 logger = logging.getLogger(__name__)
 
+# Codes joined per yielded fragment when streaming a literal.
+_FRAGMENT_CODES: int = 1_000
+
+
+def _validate_inputs(
+    codes: Sequence[str],
+    refresh_family: str,
+    target_types: Sequence[str],
+) -> str:
+    """Raise ``ValueError`` on bad input; return the stored procedure name."""
+    if not codes:
+        raise ValueError("No codes provided – cannot build SQL.")
+    if not target_types:
+        raise ValueError("No target types selected – cannot build SQL.")
+    if refresh_family not in STORED_PROCEDURES:
+        raise ValueError(
+            f"Unknown refresh family '{refresh_family}'. "
+            f"Expected one of: {list(STORED_PROCEDURES)}"
+        )
+    return STORED_PROCEDURES[refresh_family]
+
+
+def _iter_literal(codes: Sequence[str]) -> Iterator[str]:
+    """Yield ``'A,B,C'`` in pieces of ``_FRAGMENT_CODES`` codes."""
+    yield "'"
+    for start in range(0, len(codes), _FRAGMENT_CODES):
+        piece = ",".join(codes[start:start + _FRAGMENT_CODES])
+        yield piece if start == 0 else "," + piece
+    yield "'"
+
+
+def _iter_exec(
+    proc: str,
+    codes_arg: Iterable[str],
+    types_str: str,
+    debug: bool,
+) -> Iterator[str]:
+    """Yield one EXEC statement.
+
+    *codes_arg* yields the SQL expression passed as ``@EntityCodes`` --
+    either a quoted literal or a variable name.
+    """
+    yield f"EXEC {proc}\n    @EntityCodes = "
+    yield from codes_arg
+    if debug:
+        yield f",\n    @TargetTypes = '{types_str}',\n    @debug = 1;"
+    else:
+        yield f",\n    @TargetTypes = '{types_str}';"
+
+
+def _chunk_codes(
+    codes: Sequence[str],
+    max_codes: int | None,
+    max_bytes: int | None,
+) -> Iterator[Sequence[str]]:
+    """Split *codes* greedily so each chunk respects both limits.
+
+    Bytes are measured on the comma-joined UTF-8 literal.  A single code
+    larger than *max_bytes* is emitted as a chunk of its own.
+    """
+    start = 0
+    size = 0
+    for i, code in enumerate(codes):
+        code_bytes = len(code.encode("utf-8"))
+        added = code_bytes if i == start else code_bytes + 1
+        full_by_count = max_codes is not None and i - start >= max_codes
+        full_by_bytes = max_bytes is not None and i > start and size + added > max_bytes
+        if full_by_count or full_by_bytes:
+            yield codes[start:i]
+            start = i
+            added = code_bytes
+            size = 0
+        size += added
+    yield codes[start:]
+
+
+def _check_batch_limits(max_codes: int | None, max_bytes: int | None) -> None:
+    if max_codes is not None and max_codes <= 0:
+        raise ValueError("max_codes must be a positive integer.")
+    if max_bytes is not None and max_bytes <= 0:
+        raise ValueError("max_bytes must be a positive integer.")
+
 
+def iter_sql(
+    codes: Sequence[str],
+    refresh_family: str,
+    target_types: Sequence[str],
+    *,
+    debug: bool = False,
+) -> Iterator[str]:
+    """Stream the :func:`build_sql` statement as string fragments.
+
+    Inputs are validated eagerly, before the first fragment is requested.
+    """
+    proc = _validate_inputs(codes, refresh_family, target_types)
+    return _iter_exec(proc, _iter_literal(codes), ",".join(target_types), debug)
+
+
+@instrumented(rows_arg=0)
 def build_sql(
     codes: Sequence[str],
     refresh_family: str,
@@ -35,29 +148,260 @@ def build_sql(
     str
         A complete, copy-pasteable SQL EXEC statement.
     """
-    if not codes:
-        raise ValueError("No codes provided – cannot build SQL.")
-    if not target_types:
-        raise ValueError("No target types selected – cannot build SQL.")
-    if refresh_family not in STORED_PROCEDURES:
+    sql = "".join(iter_sql(codes, refresh_family, target_types, debug=debug))
+    logger.info("Generated SQL (%d codes, debug=%s)", len(codes), debug)
+    return sql
+
+
+@instrumented(rows_arg=0)
+def build_sql_batches(
+    codes: Sequence[str],
+    refresh_family: str,
+    target_types: Sequence[str],
+    *,
+    debug: bool = False,
+    max_codes: int | None = SQL_BATCH_MAX_CODES,
+    max_bytes: int | None = None,
+) -> list[str]:
+    """Build one EXEC statement per batch of codes.
+
+    Parameters
+    ----------
+    codes, refresh_family, target_types, debug:
+        As for :func:`build_sql`.
+    max_codes:
+        Maximum codes per statement; ``None`` for no count limit.
+    max_bytes:
+        Maximum size of the ``@EntityCodes`` literal in bytes;
+        ``None`` for no size limit.
+
+    Returns
+    -------
+    list[str]
+        One EXEC statement per batch, in input order.
+    """
+    proc = _validate_inputs(codes, refresh_family, target_types)
+    _check_batch_limits(max_codes, max_bytes)
+
+    types_str = ",".join(target_types)
+    statements = [
+        "".join(_iter_exec(proc, _iter_literal(chunk), types_str, debug))
+        for chunk in _chunk_codes(codes, max_codes, max_bytes)
+    ]
+    logger.info(
+        "Generated %d batched statement(s) (%d codes, debug=%s)",
+        len(statements),
+        len(codes),
+        debug,
+    )
+    return statements
+
+
+def join_batches(statements: Sequence[str]) -> str:
+    """Join batch statements into one script separated by ``GO``."""
+    return f"\n{SQL_BATCH_SEPARATOR}\n\n".join(statements) + f"\n{SQL_BATCH_SEPARATOR}"
+
+
+def _iter_batched(
+    proc: str,
+    chunks: Iterable[Sequence[str]],
+    types_str: str,
+    debug: bool,
+) -> Iterator[str]:
+    for i, chunk in enumerate(chunks):
+        if i:
+            yield "\n\n"
+        yield from _iter_exec(proc, _iter_literal(chunk), types_str, debug)
+        yield f"\n{SQL_BATCH_SEPARATOR}"
+
+
+def iter_sql_batched(
+    codes: Sequence[str],
+    refresh_family: str,
+    target_types: Sequence[str],
+    *,
+    debug: bool = False,
+    max_codes: int | None = SQL_BATCH_MAX_CODES,
+    max_bytes: int | None = None,
+) -> Iterator[str]:
+    """Stream the :func:`build_sql_script_batched` script as string fragments."""
+    proc = _validate_inputs(codes, refresh_family, target_types)
+    _check_batch_limits(max_codes, max_bytes)
+    return _iter_batched(
+        proc,
+        _chunk_codes(codes, max_codes, max_bytes),
+        ",".join(target_types),
+        debug,
+    )
+
+
+@instrumented(rows_arg=0)
+def build_sql_script_batched(
+    codes: Sequence[str],
+    refresh_family: str,
+    target_types: Sequence[str],
+    *,
+    debug: bool = False,
+    max_codes: int | None = SQL_BATCH_MAX_CODES,
+    max_bytes: int | None = None,
+) -> str:
+    """Build the batched EXEC statements as a single ``GO``-separated script.
+
+    Same statements as :func:`build_sql_batches`, joined as by
+    :func:`join_batches`.
+    """
+    sql = "".join(
+        iter_sql_batched(
+            codes,
+            refresh_family,
+            target_types,
+            debug=debug,
+            max_codes=max_codes,
+            max_bytes=max_bytes,
+        )
+    )
+    logger.info("Generated batched SQL script (%d codes, debug=%s)", len(codes), debug)
+    return sql
+
+
+def _iter_values_inserts(
+    table: str,
+    column: str,
+    codes: Sequence[str],
+    batch_size: int,
+) -> Iterator[str]:
+    """Yield multi-row ``INSERT ... VALUES`` statements of *batch_size* rows."""
+    for start in range(0, len(codes), batch_size):
+        rows = ",\n".join(f"    ('{c}')" for c in codes[start:start + batch_size])
+        yield f"INSERT INTO {table} ({column}) VALUES\n{rows};"
+
+
+def _iter_temp_table(
+    proc: str,
+    codes: Sequence[str],
+    types_str: str,
+    debug: bool,
+    insert_batch_size: int,
+    max_codes: int | None,
+) -> Iterator[str]:
+    table = TEMP_TABLE_NAME
+    yield (
+        "SET NOCOUNT ON;\n"
+        "\n"
+        f"IF OBJECT_ID('tempdb..{table}') IS NOT NULL DROP TABLE {table};\n"
+        f"CREATE TABLE {table} (\n"
+        "    id INT IDENTITY(1, 1) PRIMARY KEY,\n"
+        # MAX, not a fixed width: parse_codes puts no length limit on codes.
+        "    code NVARCHAR(MAX) NOT NULL\n"
+        ");\n"
+        "\n"
+    )
+    for stmt in _iter_values_inserts(table, "code", codes, insert_batch_size):
+        yield stmt
+        yield "\n\n"
+    yield "DECLARE @EntityCodes NVARCHAR(MAX);\n"
+    # The table is new, so ids run 1..n in insertion order.
+    n = len(codes)
+    step = n if max_codes is None else max_codes
+    for first in range(1, n + 1, step):
+        where = "" if step >= n else f"\nWHERE id BETWEEN {first} AND {min(first + step - 1, n)}"
+        yield (
+            "\n"
+            "SELECT @EntityCodes = STRING_AGG(code, ',')"
+            " WITHIN GROUP (ORDER BY id)\n"
+            f"FROM {table}{where};\n"
+        )
+        yield from _iter_exec(proc, ["@EntityCodes"], types_str, debug)
+        yield "\n"
+    yield f"\nDROP TABLE {table};"
+
+
+def iter_sql_temp_table(
+    codes: Sequence[str],
+    refresh_family: str,
+    target_types: Sequence[str],
+    *,
+    debug: bool = False,
+    insert_batch_size: int = SQL_VALUES_MAX_ROWS,
+    max_codes: int | None = SQL_BATCH_MAX_CODES,
+) -> Iterator[str]:
+    """Stream the :func:`build_sql_temp_table` script as string fragments."""
+    proc = _validate_inputs(codes, refresh_family, target_types)
+    if not 1 <= insert_batch_size <= SQL_VALUES_MAX_ROWS:
         raise ValueError(
-            f"Unknown refresh family '{refresh_family}'. "
-            f"Expected one of: {list(STORED_PROCEDURES)}"
+            f"insert_batch_size must be between 1 and {SQL_VALUES_MAX_ROWS}."
         )
+    _check_batch_limits(max_codes, None)
+    return _iter_temp_table(
+        proc, codes, ",".join(target_types), debug, insert_batch_size, max_codes
+    )
 
-    proc = STORED_PROCEDURES[refresh_family]
-    codes_str = ",".join(codes)
-    types_str = ",".join(target_types)
 
-    lines: list[str] = [f"EXEC {proc}"]
-    lines.append(f"    @EntityCodes = '{codes_str}',")
+@instrumented(rows_arg=0)
+def build_sql_temp_table(
+    codes: Sequence[str],
+    refresh_family: str,
+    target_types: Sequence[str],
+    *,
+    debug: bool = False,
+    insert_batch_size: int = SQL_VALUES_MAX_ROWS,
+    max_codes: int | None = SQL_BATCH_MAX_CODES,
+) -> str:
+    """Load codes into a ``#codes`` temp table, then EXEC the refresh proc
+    once per batch of rows.
 
-    if debug:
-        lines.append(f"    @TargetTypes = '{types_str}',")
-        lines.append("    @debug = 1;")
-    else:
-        lines.append(f"    @TargetTypes = '{types_str}';")
+    The codes are inserted with multi-row ``INSERT ... VALUES`` statements,
+    so the script never carries one giant string literal.  Each EXEC gets
+    its ``@EntityCodes`` list assembled server-side with ``STRING_AGG``
+    (SQL Server 2017+) from at most *max_codes* rows in insertion order, so
+    the proc splits a batch-sized string per call rather than the whole
+    list at once.
 
-    sql = "\n".join(lines)
-    logger.info("Generated SQL (%d codes, debug=%s)", len(codes), debug)
+    Parameters
+    ----------
+    codes, refresh_family, target_types, debug:
+        As for :func:`build_sql`.
+    insert_batch_size:
+        Rows per ``INSERT`` statement (1 to ``SQL_VALUES_MAX_ROWS``).
+    max_codes:
+        Codes per EXEC; ``None`` passes every row to a single EXEC.
+    """
+    sql = "".join(
+        iter_sql_temp_table(
+            codes,
+            refresh_family,
+            target_types,
+            debug=debug,
+            insert_batch_size=insert_batch_size,
+            max_codes=max_codes,
+        )
+    )
+    logger.info("Generated temp-table SQL (%d codes, debug=%s)", len(codes), debug)
     return sql
+
+
+def iter_sql_for_mode(
+    codes: Sequence[str],
+    refresh_family: str,
+    target_types: Sequence[str],
+    *,
+    output_mode: str = OUTPUT_SINGLE,
+    debug: bool = False,
+    max_codes: int | None = SQL_BATCH_MAX_CODES,
+) -> Iterator[str]:
+    """Dispatch to :func:`iter_sql`, :func:`iter_sql_batched` or
+    :func:`iter_sql_temp_table` by *output_mode* (one of ``OUTPUT_MODES``).
+
+    *max_codes* caps the codes per EXEC in batched and temp-table output.
+    """
+    if output_mode == OUTPUT_TEMP_TABLE:
+        return iter_sql_temp_table(
+            codes, refresh_family, target_types, debug=debug, max_codes=max_codes
+        )
+    if output_mode == OUTPUT_BATCHED:
+        return iter_sql_batched(
+            codes, refresh_family, target_types, debug=debug, max_codes=max_codes
+        )
+    if output_mode == OUTPUT_SINGLE:
+        return iter_sql(codes, refresh_family, target_types, debug=debug)
+    raise ValueError(f"Unknown output mode '{output_mode}'.")
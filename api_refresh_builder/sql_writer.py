@@ -0,0 +1,77 @@
+"""Write streamed SQL fragments to a file-like object.
+
+The ``iter_*`` builders (:func:`sql_builder.iter_sql`,
+:func:`crm_builder.iter_full_flow`, :func:`mapping_builder.iter_all_steps`,
+...) yield SQL as a sequence of string fragments.  :func:`write_sql` drains
+one of those iterators into any text stream, so large scripts go straight to
+disk or stdout without being assembled in memory first.
+
+:func:`preview_sql` and :func:`encode_sql` support the dashboard's
+large-output mode: a bounded head/tail preview on screen and the full
+script offered as a (optionally gzipped) download.
+"""
+
+from __future__ import annotations
+
+import gzip
+import logging
+from typing import Iterable, TextIO
+
+from .constants import SQL_PREVIEW_HEAD_CHARS, SQL_PREVIEW_TAIL_CHARS
+
+logger = logging.getLogger(__name__)
+
+
+def write_sql(fragments: Iterable[str], fp: TextIO) -> int:
+    """Write every fragment to *fp* and return the number of characters written.
+
+    A trailing newline is not added; the fragments are written verbatim so
+    the output is identical to the matching ``build_*`` function.
+    """
+    written = 0
+    for fragment in fragments:
+        fp.write(fragment)
+        written += len(fragment)
+    logger.debug("Wrote %d characters of SQL", written)
+    return written
+
+
+def preview_sql(
+    sql: str,
+    *,
+    head_chars: int = SQL_PREVIEW_HEAD_CHARS,
+    tail_chars: int = SQL_PREVIEW_TAIL_CHARS,
+) -> str:
+    """Return the start and end of *sql* with an omission marker.
+
+    The head and tail are snapped to line boundaries when that keeps at
+    least half of *head_chars* / *tail_chars*; a single very long line
+    (e.g. an ``@EntityCodes`` literal) is cut mid-line instead.  Short
+    scripts are returned as-is.
+    """
+    if len(sql) <= head_chars + tail_chars:
+        return sql
+    head_end = sql.rfind("\n", 0, head_chars)
+    if head_end < head_chars // 2:
+        head_end = head_chars
+    tail_start = len(sql) - tail_chars
+    newline = sql.find("\n", tail_start, len(sql) - tail_chars // 2)
+    if newline != -1:
+        tail_start = newline + 1
+    omitted = tail_start - head_end
+    return (
+        f"{sql[:head_end]}\n\n"
+        f"-- ... {omitted:,} characters omitted; download the full script ...\n\n"
+        f"{sql[tail_start:]}"
+    )
+
+
+def encode_sql(sql: str, *, compress: bool = False) -> bytes:
+    """Encode *sql* as UTF-8, gzip-compressed when *compress* is True.
+
+    Compression uses a fixed mtime so identical SQL gives identical bytes.
+    """
+    data = sql.encode("utf-8")
+    if compress:
+        data = gzip.compress(data, compresslevel=6, mtime=0)
+    return data
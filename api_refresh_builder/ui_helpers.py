@@ -2,12 +2,18 @@
 
 from __future__ import annotations
 
+import functools
 import html as _html
 import logging
+from typing import Callable
 
 import streamlit as st
 import streamlit.components.v1 as components
 
+from .constants import SQL_LARGE_OUTPUT_CHARS, SQL_MEMO_ENTRIES
+from .instrumentation import Timings, collect
+from .sql_writer import encode_sql, preview_sql
+
 logger = logging.getLogger(__name__)
 
 # ---------------------------------------------------------------------------
@@ -82,3 +88,105 @@ def copy_buttons(sql: str, *, key_suffix: str = "") -> None:
                 )
     with col_b:
         js_clipboard_button(sql, key=f"cpbtn{key_suffix}")
+
+
+# ---------------------------------------------------------------------------
+# SQL output block
+# ---------------------------------------------------------------------------
+
+@st.cache_resource(max_entries=SQL_MEMO_ENTRIES, show_spinner=False)
+def _encoded_sql(sql: str, compress: bool) -> bytes:
+    """Memoised :func:`encode_sql`, so reruns don't re-gzip the same script."""
+    return encode_sql(sql, compress=compress)
+
+
+def _large_sql_output(sql: str, *, key_suffix: str) -> None:
+    """Head/tail preview plus download; nothing inlines the full script."""
+    st.caption(
+        f"{len(sql):,} characters \u2013 showing the start and end only. "
+        "Download the full script to run it."
+    )
+    st.code(preview_sql(sql), language="sql")
+
+    file_name = f"{key_suffix.strip('_') or 'script'}.sql"
+    col_a, col_b, col_c = st.columns(3)
+    with col_c:
+        compress = st.checkbox("gzip", key=f"gz{key_suffix}")
+    with col_a:
+        st.download_button(
+            "Download SQL",
+            data=_encoded_sql(sql, compress),
+            file_name=f"{file_name}.gz" if compress else file_name,
+            mime="application/gzip" if compress else "application/sql",
+            key=f"dl{key_suffix}",
+        )
+    with col_b:
+        # The script stays server-side until the button is clicked.
+        if st.button("Copy SQL to clipboard", key=f"cp_native{key_suffix}"):
+            if copy_via_pyperclip(sql):
+                st.toast("SQL copied to clipboard!", icon="\u2705")
+            else:
+                st.warning("pyperclip unavailable \u2013 use the download button.")
+
+
+def sql_output(sql: str, *, key_suffix: str = "") -> None:
+    """Render *sql* as a code block with copy buttons.
+
+    Scripts longer than ``SQL_LARGE_OUTPUT_CHARS`` switch to a bounded
+    preview and a download button, so a multi-megabyte script is never
+    sent to the browser as a code block or embedded in a clipboard iframe.
+    """
+    if len(sql) > SQL_LARGE_OUTPUT_CHARS:
+        _large_sql_output(sql, key_suffix=key_suffix)
+        return
+    st.code(sql, language="sql")
+    copy_buttons(sql, key_suffix=key_suffix)
+
+
+# ---------------------------------------------------------------------------
+# Performance panel (instrumentation enabled only)
+# ---------------------------------------------------------------------------
+
+def performance_panel(*timings: Timings | None) -> None:
+    """Show recorded stage costs in a collapsed "Performance" expander.
+
+    Renders nothing when every argument is ``None`` or empty, which is
+    always the case while instrumentation is disabled.
+    """
+    stages = [s for t in timings if t for s in t.stages.values()]
+    if not stages:
+        return
+    with st.expander("Performance", expanded=False):
+        st.table([
+            {
+                "Stage": s.name,
+                "Time (ms)": f"{s.seconds * 1000:,.1f}",
+                "Calls": s.calls,
+                "Rows": "" if s.rows is None else f"{s.rows:,}",
+                "Peak memory (KiB)": "" if s.peak_bytes is None else f"{s.peak_bytes / 1024:,.0f}",
+            }
+            for s in stages
+        ])
+        st.caption(
+            "Stages that were served from a cache this run do not appear. "
+            "Nested stages (e.g. a bulk script and its parts) overlap."
+        )
+
+
+def performance_section(label: str) -> Callable[[Callable[..., None]], Callable[..., None]]:
+    """Decorate a render function to record its instrumented calls.
+
+    The calls are collected (and logged) under *label* and shown in a
+    :func:`performance_panel` below the function's output.  Apply it below
+    ``@st.fragment`` so fragment-only reruns are measured too.
+    """
+    def decorator(func: Callable[..., None]) -> Callable[..., None]:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs) -> None:
+            with collect(label) as timings:
+                func(*args, **kwargs)
+            performance_panel(timings)
+
+        return wrapper
+
+    return decorator
@@ -2,6 +2,9 @@
 
 Launch with:
     streamlit run app.py
+
+With ``API_REFRESH_PROFILE=query`` set, add ``?profile=1`` to the URL to
+profile each rerun of that session (see ``api_refresh_builder/profiling.py``).
 """
 
 from __future__ import annotations
@@ -10,6 +13,8 @@ import logging
 
 import streamlit as st
 
+from api_refresh_builder.pages import get_renderer
+from api_refresh_builder.profiling import profile_rerun, profiling_requested
 from api_refresh_builder.ui_helpers import inject_css
 
 # ---------------------------------------------------------------------------
@@ -51,14 +56,11 @@ with st.sidebar:
     st.divider()
 
 # ---------------------------------------------------------------------------
-# Route to the selected page
+# Route to the selected page (profiled on request)
 # ---------------------------------------------------------------------------
-if TASKS[selected_task] == "api_refresh":
-    from api_refresh_builder.pages.api_refresh import render
-    render()
-elif TASKS[selected_task] == "mapping":
-    from api_refresh_builder.pages.mapping import render  # type: ignore[assignment]
-    render()
-elif TASKS[selected_task] == "crm_amendments":
-    from api_refresh_builder.pages.crm_amendments import render  # type: ignore[assignment]
-    render()
+page = TASKS[selected_task]
+with profile_rerun(page, enabled=profiling_requested(st.query_params)) as profile_files:
+    get_renderer(page)()
+
+if profile_files:
+    st.sidebar.caption(f"Rerun profiled: `{profile_files[-1]}`")
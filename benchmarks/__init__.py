@@ -0,0 +1 @@
+"""Performance benchmarks for parsing and SQL generation (``python -m benchmarks``)."""
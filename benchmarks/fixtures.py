@@ -0,0 +1,119 @@
+"""Synthetic entity-code files for benchmarks.
+
+Codes are generated deterministically from a seed, so the same arguments
+always give byte-identical files and comparable timings.
+"""
+
+from __future__ import annotations
+
+import csv
+import random
+from pathlib import Path
+
+# Sheet row limits of the Excel formats.
+XLS_MAX_ROWS = 65_536
+XLSX_MAX_ROWS = 1_048_576
+
+FORMATS = ("csv", "xlsx", "xls")
+
+_INVALID_CHARS = " !@#$%"
+
+
+def generate_codes(
+    rows: int,
+    *,
+    invalid_ratio: float = 0.0,
+    duplicate_ratio: float = 0.0,
+    seed: int = 0,
+) -> list[str]:
+    """Return *rows* codes with roughly the given invalid/duplicate shares.
+
+    Valid codes match ``CODE_PATTERN`` (``ENT`` + digits).  Invalid codes
+    contain a character the pattern rejects.  Duplicates repeat an earlier
+    valid code.
+    """
+    if not 0 <= invalid_ratio + duplicate_ratio <= 1:
+        raise ValueError("invalid_ratio + duplicate_ratio must be between 0 and 1.")
+    rng = random.Random(seed)
+    codes: list[str] = []
+    valid: list[str] = []
+    for i in range(rows):
+        r = rng.random()
+        if r < invalid_ratio:
+            codes.append(f"ENT{i}{rng.choice(_INVALID_CHARS)}X")
+        elif r < invalid_ratio + duplicate_ratio and valid:
+            codes.append(rng.choice(valid))
+        else:
+            code = f"ENT{i:08d}"
+            valid.append(code)
+            codes.append(code)
+    return codes
+
+
+def write_fixture(
+    path: str | Path,
+    rows: int,
+    *,
+    invalid_ratio: float = 0.0,
+    duplicate_ratio: float = 0.0,
+    seed: int = 0,
+) -> Path:
+    """Write a one-column code file; the format comes from *path*'s suffix.
+
+    ``.xls`` needs the optional ``xlwt`` package.
+    """
+    path = Path(path)
+    fmt = path.suffix.lstrip(".").lower()
+    limit = {"xls": XLS_MAX_ROWS, "xlsx": XLSX_MAX_ROWS}.get(fmt)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported fixture format: .{fmt}")
+    if limit is not None and rows > limit:
+        raise ValueError(f".{fmt} holds at most {limit:,} rows; got {rows:,}.")
+
+    codes = generate_codes(
+        rows, invalid_ratio=invalid_ratio, duplicate_ratio=duplicate_ratio, seed=seed
+    )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if fmt == "csv":
+        with open(path, "w", newline="", encoding="utf-8") as fp:
+            csv.writer(fp).writerows([c] for c in codes)
+    elif fmt == "xlsx":
+        from openpyxl import Workbook
+
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet()
+        for code in codes:
+            ws.append([code])
+        wb.save(path)
+    else:
+        import xlwt
+
+        wb = xlwt.Workbook()
+        ws = wb.add_sheet("codes")
+        for i, code in enumerate(codes):
+            ws.write(i, 0, code)
+        wb.save(str(path))
+    return path
+
+
+def fixture_path(
+    cache_dir: str | Path,
+    rows: int,
+    fmt: str,
+    *,
+    invalid_ratio: float = 0.0,
+    duplicate_ratio: float = 0.0,
+    seed: int = 0,
+) -> Path:
+    """Return a cached fixture, writing it on first use."""
+    name = f"codes_{rows}_{invalid_ratio:g}_{duplicate_ratio:g}_{seed}.{fmt}"
+    path = Path(cache_dir) / name
+    if not path.exists():
+        write_fixture(
+            path,
+            rows,
+            invalid_ratio=invalid_ratio,
+            duplicate_ratio=duplicate_ratio,
+            seed=seed,
+        )
+    return path
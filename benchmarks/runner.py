@@ -0,0 +1,362 @@
+"""Benchmark runner: throughput, peak memory and output size per case.
+
+Each case runs once untimed to warm imports and caches, once under
+:mod:`tracemalloc` for the peak allocation, then ``repeat`` timed samples
+with tracing off (best sample wins), so neither import cost nor tracing
+overhead skews the numbers.  Fast cases loop inside each sample until it
+lasts at least ``MIN_SAMPLE_SECONDS`` so timer noise stays well inside the
+tolerance.  Results can be saved as a JSON baseline; later runs
+compare against it and fail when throughput drops or peak memory grows by
+more than the tolerance.  Throughput is only comparable on the same
+hardware, so the default baseline is skipped, with a note, on a machine
+other than the one that recorded it; an explicit ``--baseline`` is always
+compared.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import platform
+import re
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Sequence
+
+from .fixtures import XLS_MAX_ROWS, XLSX_MAX_ROWS, fixture_path, generate_codes
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+DEFAULT_BASELINE = Path(__file__).parent / "baselines" / "baseline.json"
+DEFAULT_FIXTURES_DIR = Path(".cache") / "bench"
+MAPPING_CALLS = 10_000
+# Shortest timed sample; faster cases are looped (as timeit.autorange does).
+MIN_SAMPLE_SECONDS = 0.2
+
+_FORMAT_LIMITS = {"csv": None, "xlsx": XLSX_MAX_ROWS, "xls": XLS_MAX_ROWS}
+
+
+def _cpu_model() -> str:
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as fh:
+            for line in fh:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def machine() -> dict[str, Any]:
+    """What the throughput numbers depend on: CPU, core count and Python."""
+    return {
+        "cpu": _cpu_model(),
+        "cpus": os.cpu_count(),
+        "arch": platform.machine(),
+        "python": ".".join(platform.python_version_tuple()[:2]),
+    }
+
+
+@dataclass
+class Case:
+    """One benchmark: ``func(*setup())`` processes *rows* rows."""
+
+    name: str
+    rows: int
+    setup: Callable[[], tuple]
+    func: Callable[..., Any]
+    output_bytes: Callable[[Any], int]
+
+
+def _sql_bytes(sql: str) -> int:
+    return len(sql.encode("utf-8"))
+
+
+def _parse_cases(sizes, formats, fixtures_dir, invalid_ratio, duplicate_ratio) -> list[Case]:
+    from api_refresh_builder.parsing import parse_codes
+
+    cases = []
+    for fmt in formats:
+        if fmt == "xls":
+            try:
+                import xlwt  # noqa: F401
+            except ImportError:
+                print("skipping .xls cases: xlwt is not installed", file=sys.stderr)
+                continue
+        for rows in sizes:
+            limit = _FORMAT_LIMITS[fmt]
+            if limit is not None and rows > limit:
+                continue
+
+            def setup(rows=rows, fmt=fmt):
+                path = fixture_path(
+                    fixtures_dir,
+                    rows,
+                    fmt,
+                    invalid_ratio=invalid_ratio,
+                    duplicate_ratio=duplicate_ratio,
+                )
+                return path.read_bytes(), path.name
+
+            cases.append(Case(
+                name=f"parse_codes[{fmt}-{rows}]",
+                rows=rows,
+                setup=setup,
+                func=parse_codes,
+                output_bytes=lambda result: result.nbytes,
+            ))
+    return cases
+
+
+def _builder_cases(sizes) -> list[Case]:
+    from api_refresh_builder import crm_builder, mapping_builder, sql_builder
+
+    cases = []
+    for rows in sizes:
+        def codes(rows=rows):
+            return (generate_codes(rows), "IMIX", ["Contact", "Account"])
+
+        def refs(rows=rows):
+            return ([f"IMIX.CT.{i}" for i in range(rows)], {"Narrative2": "Employer Contribution"})
+
+        def pairs(rows=rows):
+            return ([(str(i), f"M{i % 997}") for i in range(rows)],)
+
+        cases += [
+            Case(f"build_sql[{rows}]", rows, codes, sql_builder.build_sql, _sql_bytes),
+            Case(
+                f"build_sql_temp_table[{rows}]",
+                rows,
+                codes,
+                sql_builder.build_sql_temp_table,
+                _sql_bytes,
+            ),
+            Case(
+                f"crm.build_full_flow[{rows}]",
+                rows,
+                refs,
+                crm_builder.build_full_flow,
+                _sql_bytes,
+            ),
+            Case(
+                f"mapping.build_bulk_all_steps[{rows}]",
+                rows,
+                pairs,
+                mapping_builder.build_bulk_all_steps,
+                _sql_bytes,
+            ),
+        ]
+
+    def all_steps_many() -> list[str]:
+        return [
+            mapping_builder.build_all_steps(str(i), "CACR0", "SCSH")
+            for i in range(MAPPING_CALLS)
+        ]
+
+    cases.append(Case(
+        f"mapping.build_all_steps[x{MAPPING_CALLS}]",
+        MAPPING_CALLS,
+        tuple,
+        all_steps_many,
+        lambda out: sum(_sql_bytes(s) for s in out),
+    ))
+    return cases
+
+
+def measure(case: Case, repeat: int) -> dict[str, float | int]:
+    """Warm up *case*, trace one run for peak memory, then time it (best of *repeat* samples)."""
+    args = case.setup()
+    output_bytes = case.output_bytes(case.func(*args))
+
+    tracemalloc.start()
+    try:
+        case.func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            case.func(*args)
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_SAMPLE_SECONDS:
+            break
+        number *= max(2, min(10, int(MIN_SAMPLE_SECONDS / max(elapsed, 1e-9)) + 1))
+
+    best = elapsed / number
+    for _ in range(max(1, repeat) - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            case.func(*args)
+        best = min(best, (time.perf_counter() - start) / number)
+
+    return {
+        "rows": case.rows,
+        "seconds": round(best, 6),
+        # None when the run was below timer resolution (JSON has no Infinity).
+        "rows_per_s": round(case.rows / best, 1) if best > 0 else None,
+        "peak_bytes": peak,
+        "output_bytes": output_bytes,
+    }
+
+
+def compare(
+    results: dict[str, dict],
+    baseline: dict[str, dict],
+    tolerance: float,
+) -> list[str]:
+    """Return one message per case that regressed beyond *tolerance*.
+
+    Cases missing from either side are ignored, as is throughput when either
+    run was too fast to time.
+    """
+    regressions = []
+    for name, now in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if (
+            now["rows_per_s"] is not None
+            and before["rows_per_s"] is not None
+            and now["rows_per_s"] < before["rows_per_s"] * (1 - tolerance)
+        ):
+            regressions.append(
+                f"{name}: throughput {now['rows_per_s']:,.0f} rows/s "
+                f"< baseline {before['rows_per_s']:,.0f}"
+            )
+        if now["peak_bytes"] > before["peak_bytes"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: peak memory {now['peak_bytes']:,} B "
+                f"> baseline {before['peak_bytes']:,} B"
+            )
+    return regressions
+
+
+def _format_row(name: str, r: dict) -> str:
+    rate = "-" if r["rows_per_s"] is None else f"{r['rows_per_s']:,.0f}"
+    return (
+        f"{name:<42} {r['rows']:>10,} {r['seconds']:>10.4f} "
+        f"{rate:>14} {r['peak_bytes'] / 2**20:>10.1f} "
+        f"{r['output_bytes'] / 2**20:>10.1f}"
+    )
+
+
+def _int_list(value: str) -> list[int]:
+    return [int(v.replace("_", "")) for v in value.split(",") if v.strip()]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmark parsing and SQL generation.",
+    )
+    parser.add_argument(
+        "--sizes",
+        type=_int_list,
+        default=list(DEFAULT_SIZES),
+        help="comma-separated row counts (default: 1000,10000,100000,1000000)",
+    )
+    parser.add_argument(
+        "--formats",
+        default="csv,xlsx,xls",
+        help="fixture formats for parse_codes (default: %(default)s)",
+    )
+    parser.add_argument("--invalid-ratio", type=float, default=0.01)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.05)
+    parser.add_argument("--repeat", type=int, default=5, help="timed samples per case")
+    parser.add_argument("-k", "--only", help="regex; run only matching cases")
+    parser.add_argument("--fixtures-dir", type=Path, default=DEFAULT_FIXTURES_DIR)
+    parser.add_argument("-o", "--output", type=Path, help="write results JSON here")
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        help=(
+            "baseline JSON to compare against (default: the committed "
+            "baseline, compared only on the machine that recorded it)"
+        ),
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="overwrite the baseline with this run instead of comparing",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="allowed fractional regression (default: %(default)s)",
+    )
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    # The fixtures contain invalid codes on purpose; keep the table readable.
+    logging.getLogger("api_refresh_builder").setLevel(logging.ERROR)
+    formats = [f.strip() for f in args.formats.split(",") if f.strip()]
+    unknown = set(formats) - set(_FORMAT_LIMITS)
+    if unknown:
+        print(f"unknown format(s): {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+
+    cases = _parse_cases(
+        args.sizes, formats, args.fixtures_dir, args.invalid_ratio, args.duplicate_ratio
+    ) + _builder_cases(args.sizes)
+    if args.only:
+        cases = [c for c in cases if re.search(args.only, c.name)]
+
+    print(f"{'case':<42} {'rows':>10} {'seconds':>10} {'rows/s':>14} {'peak MiB':>10} {'out MiB':>10}")
+    results: dict[str, dict] = {}
+    for case in cases:
+        results[case.name] = measure(case, args.repeat)
+        print(_format_row(case.name, results[case.name]), flush=True)
+
+    report = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": machine(),
+            "invalid_ratio": args.invalid_ratio,
+            "duplicate_ratio": args.duplicate_ratio,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    baseline_path = args.baseline or DEFAULT_BASELINE
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"baseline saved to {baseline_path}")
+        return 0
+
+    if not baseline_path.exists():
+        print(f"no baseline at {baseline_path}; run with --save-baseline to create one")
+        return 0
+
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    recorded_on = baseline["meta"].get("machine")
+    if args.baseline is None and recorded_on != report["meta"]["machine"]:
+        print(
+            f"not comparing: {baseline_path} was recorded on {recorded_on}, "
+            f"this machine is {report['meta']['machine']}; pass --baseline to "
+            "compare anyway, or --save-baseline to record one here"
+        )
+        return 0
+    regressions = compare(results, baseline["results"], args.tolerance)
+    for msg in regressions:
+        print(f"REGRESSION {msg}", file=sys.stderr)
+    if regressions:
+        return 1
+    print(f"no regressions against {baseline_path} (tolerance {args.tolerance:.0%})")
+    return 0
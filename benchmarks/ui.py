@@ -0,0 +1,316 @@
+"""Interactive-latency harness: drive the pages headlessly with AppTest.
+
+Each scenario loads ``app.py`` in :class:`streamlit.testing.v1.AppTest`,
+uploads synthetic files of increasing size and changes widgets the way a
+user would, timing every interaction until the page shows generated SQL
+again (including the reruns that poll a background parse).  Per-page p50
+and p95 latencies are checked against budgets; any page over budget makes
+the run exit 1.
+
+    python -m benchmarks.ui
+    python -m benchmarks.ui --sizes 1000,50000 --repeat 5 --budgets budgets.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import math
+import sys
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Sequence
+
+from .fixtures import generate_codes
+from .runner import _int_list
+
+if TYPE_CHECKING:
+    from streamlit.testing.v1 import AppTest
+
+APP_PATH = Path(__file__).resolve().parent.parent / "app.py"
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+# Seconds AppTest waits for one script run.
+RUN_TIMEOUT = 120.0
+# Reruns allowed while waiting for SQL (background parse polling).
+MAX_POLL_RUNS = 600
+# Refs typed into the CRM manual-mode text area; larger lists are uploaded.
+CRM_MANUAL_MAX_REFS = 1_000
+
+PAGES = ("api_refresh", "mapping", "crm_amendments")
+_PAGE_LABELS = {
+    "api_refresh": "API Refresh",
+    "mapping": "Mapping",
+    "crm_amendments": "CRM Amendments",
+}
+
+# Milliseconds per interaction at the default sizes, AppTest overhead
+# included.  p50 tracks widget reruns; the mapping and CRM p95 is set by the
+# 100k-row bulk uploads, which parse and build synchronously.
+DEFAULT_BUDGETS: dict[str, dict[str, float]] = {
+    "api_refresh": {"p50_ms": 500, "p95_ms": 2_000},
+    "mapping": {"p50_ms": 500, "p95_ms": 12_000},
+    "crm_amendments": {"p50_ms": 500, "p95_ms": 15_000},
+}
+
+
+@dataclass
+class Sample:
+    """One timed interaction."""
+
+    page: str
+    action: str
+    rows: int
+    ms: float
+    reruns: int
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile (*pct* in 0-100) of a non-empty sequence."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+# ---------------------------------------------------------------------------
+# Driving the app
+# ---------------------------------------------------------------------------
+
+def _has_sql(at: AppTest) -> bool:
+    return any(c.proto.language == "sql" for c in at.code)
+
+
+class _Session:
+    """One AppTest session on one page; records a :class:`Sample` per step."""
+
+    def __init__(self, page: str, rows: int, samples: list[Sample]) -> None:
+        from streamlit.testing.v1 import AppTest
+
+        self.page = page
+        self.rows = rows
+        self.samples = samples
+        self.at = AppTest.from_file(str(APP_PATH), default_timeout=RUN_TIMEOUT)
+        self.at.run()
+        if page != "api_refresh":
+            self.at.sidebar.radio(key="task_selector").set_value(_PAGE_LABELS[page]).run()
+
+    def step(self, action: str, interact: Callable[[AppTest], object]) -> None:
+        """Apply *interact*, then rerun until SQL is on the page again."""
+        at = self.at
+        start = time.perf_counter()
+        interact(at)
+        at.run()
+        reruns = 1
+        while not _has_sql(at) and not at.exception:
+            if reruns >= MAX_POLL_RUNS:
+                raise RuntimeError(f"{self.page}/{action}: no SQL after {reruns} reruns")
+            at.run()
+            reruns += 1
+        elapsed = (time.perf_counter() - start) * 1000
+        if at.exception:
+            raise RuntimeError(f"{self.page}/{action}: {at.exception[0].value}")
+        self.samples.append(Sample(self.page, action, self.rows, round(elapsed, 1), reruns))
+
+
+def _widget(widgets, label: str):
+    return next(w for w in widgets if w.label == label)
+
+
+def _codes_csv(rows: int, seed: int) -> bytes:
+    codes = generate_codes(rows, invalid_ratio=0.01, duplicate_ratio=0.05, seed=seed)
+    return "\n".join(codes).encode("utf-8")
+
+
+def _scenario_api_refresh(rows: int, seed: int, samples: list[Sample]) -> None:
+    from api_refresh_builder.constants import OUTPUT_BATCHED, OUTPUT_TEMP_TABLE
+
+    s = _Session("api_refresh", rows, samples)
+    data = _codes_csv(rows, seed)
+    s.step("upload", lambda at: at.file_uploader[0].set_value(("codes.csv", data, "text/csv")))
+    s.step("debug on", lambda at: _widget(at.checkbox, "Debug (@debug=1)").check())
+    s.step("temp table", lambda at: _widget(at.radio, "Output mode").set_value(OUTPUT_TEMP_TABLE))
+    s.step("batched", lambda at: _widget(at.radio, "Output mode").set_value(OUTPUT_BATCHED))
+    s.step("dedupe off", lambda at: _widget(at.sidebar.checkbox, "Deduplicate codes").uncheck())
+
+
+def _scenario_mapping(rows: int, seed: int, samples: list[Sample]) -> None:
+    s = _Session("mapping", rows, samples)
+    s.step("source id", lambda at: at.sidebar.text_input[0].set_value(str(seed + 348)))
+    s.step("mapping code", lambda at: at.sidebar.text_input[1].set_value("CACR0"))
+
+    body = "id,code\n" + "".join(f"{seed}_{i},M{i % 997}\n" for i in range(rows))
+    data = body.encode("utf-8")
+    s.at.sidebar.radio(key="mapping_mode").set_value("Bulk (spreadsheet)").run()
+    s.step("bulk upload", lambda at: at.file_uploader[0].set_value(("pairs.csv", data, "text/csv")))
+
+
+def _scenario_crm_amendments(rows: int, seed: int, samples: list[Sample]) -> None:
+    n_manual = min(rows, CRM_MANUAL_MAX_REFS)
+    s = _Session("crm_amendments", n_manual, samples)
+    refs = "\n".join(f"IMIX.CT.{seed}{i}" for i in range(n_manual))
+
+    at = s.at
+    at.sidebar.text_area[0].set_value(refs).run()
+    at.checkbox(key="crm_f_Narrative2").check().run()
+    s.step("field value", lambda at: at.text_input(key="crm_v_Narrative2").set_value("Employer"))
+    s.step("ref table", lambda at: at.checkbox(key="crm_use_ref_table").set_value(n_manual <= 100))
+    s.rows = rows
+
+    body = "ref,Narrative2\n" + "".join(f"IMIX.CT.{seed}{i},N{i}\n" for i in range(rows))
+    data = body.encode("utf-8")
+    s.at.sidebar.radio(key="crm_mode").set_value("Spreadsheet (per-ref values)").run()
+    s.step("bulk upload", lambda at: at.file_uploader[0].set_value(("amend.csv", data, "text/csv")))
+
+
+SCENARIOS: dict[str, Callable[[int, int, list[Sample]], None]] = {
+    "api_refresh": _scenario_api_refresh,
+    "mapping": _scenario_mapping,
+    "crm_amendments": _scenario_crm_amendments,
+}
+
+
+def run_scenarios(
+    pages: Sequence[str],
+    sizes: Sequence[int],
+    repeat: int,
+    *,
+    progress: Callable[[str], None] | None = None,
+) -> list[Sample]:
+    """Run each page's scenario ``repeat`` times per size.
+
+    Every repeat uses new file content, so parse and SQL caches start cold
+    for the upload step, as they would for a new user file.
+    """
+    samples: list[Sample] = []
+    for page in pages:
+        for rows in sizes:
+            for seed in range(repeat):
+                if progress is not None:
+                    progress(f"{page} rows={rows:,} run {seed + 1}/{repeat}")
+                SCENARIOS[page](rows, seed, samples)
+    return samples
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+def summarise(samples: Sequence[Sample]) -> dict[str, dict[str, float]]:
+    """Per-page sample count, p50 and p95 in milliseconds."""
+    by_page: dict[str, list[float]] = defaultdict(list)
+    for s in samples:
+        by_page[s.page].append(s.ms)
+    return {
+        page: {
+            "n": len(ms),
+            "p50_ms": percentile(ms, 50),
+            "p95_ms": percentile(ms, 95),
+        }
+        for page, ms in by_page.items()
+    }
+
+
+def check_budgets(
+    summary: dict[str, dict[str, float]],
+    budgets: dict[str, dict[str, float]],
+) -> list[str]:
+    """Return one message per page metric over its budget."""
+    failures = []
+    for page, stats in summary.items():
+        for metric, limit in budgets.get(page, {}).items():
+            if stats[metric] > limit:
+                failures.append(f"{page}: {metric} {stats[metric]:,.0f} > budget {limit:,.0f}")
+    return failures
+
+
+def _print_report(samples: Sequence[Sample], summary: dict, budgets: dict) -> None:
+    by_action: dict[tuple[str, str, int], list[float]] = defaultdict(list)
+    for s in samples:
+        by_action[(s.page, s.action, s.rows)].append(s.ms)
+    print(f"\n{'page':<16} {'action':<14} {'rows':>9} {'n':>3} {'p50 ms':>9} {'p95 ms':>9}")
+    for (page, action, rows), ms in by_action.items():
+        print(
+            f"{page:<16} {action:<14} {rows:>9,} {len(ms):>3} "
+            f"{percentile(ms, 50):>9,.0f} {percentile(ms, 95):>9,.0f}"
+        )
+    print(f"\n{'page':<16} {'n':>4} {'p50 ms':>9} {'budget':>9} {'p95 ms':>9} {'budget':>9}")
+    for page, stats in summary.items():
+        budget = budgets.get(page, {})
+        print(
+            f"{page:<16} {stats['n']:>4} {stats['p50_ms']:>9,.0f} "
+            f"{budget.get('p50_ms', float('nan')):>9,.0f} {stats['p95_ms']:>9,.0f} "
+            f"{budget.get('p95_ms', float('nan')):>9,.0f}"
+        )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.ui",
+        description="Time page reruns through Streamlit AppTest and check latency budgets.",
+    )
+    parser.add_argument(
+        "--pages",
+        default=",".join(PAGES),
+        help="comma-separated pages (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--sizes",
+        type=_int_list,
+        default=list(DEFAULT_SIZES),
+        help="comma-separated rows per uploaded file (default: 1000,10000,100000)",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="scenario runs per size")
+    parser.add_argument(
+        "--budgets",
+        type=Path,
+        help='JSON {"page": {"p50_ms": ..., "p95_ms": ...}} overriding the defaults',
+    )
+    parser.add_argument("-o", "--output", type=Path, help="write samples and summary JSON here")
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    pages = [p.strip() for p in args.pages.split(",") if p.strip()]
+    unknown = set(pages) - set(SCENARIOS)
+    if unknown:
+        print(f"unknown page(s): {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+
+    budgets = {page: dict(limits) for page, limits in DEFAULT_BUDGETS.items()}
+    if args.budgets:
+        for page, limits in json.loads(args.budgets.read_text(encoding="utf-8")).items():
+            budgets.setdefault(page, {}).update(limits)
+
+    # Keep the report readable: the app logs every parse and build at INFO.
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger("api_refresh_builder").setLevel(logging.ERROR)
+
+    samples = run_scenarios(
+        pages,
+        args.sizes,
+        args.repeat,
+        progress=lambda msg: print(msg, file=sys.stderr, flush=True),
+    )
+    summary = summarise(samples)
+    _print_report(samples, summary, budgets)
+
+    if args.output:
+        args.output.write_text(
+            json.dumps(
+                {"summary": summary, "budgets": budgets, "samples": [asdict(s) for s in samples]},
+                indent=2,
+            ),
+            encoding="utf-8",
+        )
+
+    failures = check_budgets(summary, budgets)
+    for msg in failures:
+        print(f"OVER BUDGET {msg}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""Tests for api_refresh_builder.batch."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from api_refresh_builder import sql_builder
+from api_refresh_builder.batch import discover_inputs, run_batch
+from api_refresh_builder.cli import EXIT_INVALID, EXIT_OK, main
+from api_refresh_builder.constants import OUTPUT_BATCHED
+
+
+@pytest.fixture
+def inbox(tmp_path):
+    d = tmp_path / "inbox"
+    d.mkdir()
+    (d / "a.csv").write_text("A1\nA2\nA2\n")
+    (d / "b.csv").write_text("B1\nbad code\n")
+    (d / "notes.txt").write_text("ignored")
+    return d
+
+
+class TestDiscoverInputs:
+    def test_directory(self, inbox):
+        assert [p.name for p in discover_inputs(inbox)] == ["a.csv", "b.csv"]
+
+    def test_glob(self, inbox):
+        assert [p.name for p in discover_inputs(inbox / "b*")] == ["b.csv"]
+
+
+class TestRunBatch:
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_writes_sql_and_summary(self, inbox, tmp_path, workers):
+        out = tmp_path / "out"
+        summary = run_batch(
+            discover_inputs(inbox),
+            out,
+            refresh_family="IMIX",
+            target_types=["Contact"],
+            workers=workers,
+        )
+        assert summary.workers == workers
+        assert not summary.failed
+        assert (out / "a.sql").read_text() == (
+            sql_builder.build_sql(["A1", "A2"], "IMIX", ["Contact"]) + "\n"
+        )
+
+        data = json.loads((out / "summary.json").read_text())
+        assert data["totals"] == {
+            "files": 2,
+            "failed": 0,
+            "total_found": 5,
+            "valid_count": 3,
+            "invalid_count": 1,
+            "duplicates_removed": 1,
+        }
+        assert [f["input"].rsplit("/", 1)[-1] for f in data["files"]] == ["a.csv", "b.csv"]
+
+    def test_failure_does_not_stop_others(self, inbox, tmp_path):
+        (inbox / "empty.csv").write_text("bad code\n")
+        summary = run_batch(
+            discover_inputs(inbox),
+            tmp_path / "out",
+            refresh_family="IMIX",
+            target_types=["Contact"],
+            workers=2,
+        )
+        assert [f.input.rsplit("/", 1)[-1] for f in summary.failed] == ["empty.csv"]
+        assert "No codes" in summary.failed[0].error
+        assert (tmp_path / "out" / "a.sql").exists()
+
+    def test_strict_and_mode(self, inbox, tmp_path):
+        summary = run_batch(
+            discover_inputs(inbox),
+            tmp_path / "out",
+            refresh_family="IMIX",
+            target_types=["Contact"],
+            output_mode=OUTPUT_BATCHED,
+            max_codes=1,
+            strict=True,
+            workers=1,
+        )
+        assert [f.input.rsplit("/", 1)[-1] for f in summary.failed] == ["b.csv"]
+        assert (tmp_path / "out" / "a.sql").read_text().count("GO") == 2
+
+    def test_colliding_stems(self, tmp_path):
+        (tmp_path / "codes.csv").write_text("A1\n")
+        (tmp_path / "codes.xlsx").write_bytes(b"not a workbook")
+        summary = run_batch(
+            discover_inputs(tmp_path),
+            tmp_path / "out",
+            refresh_family="IMIX",
+            target_types=["Contact"],
+            workers=1,
+        )
+        assert summary.files[0].output.endswith("codes.csv.sql")
+        assert summary.files[1].error is not None
+
+
+class TestBatchCLI:
+    def test_exit_codes(self, inbox, tmp_path, capsys):
+        out = tmp_path / "out"
+        args = ["batch", str(inbox), "-d", str(out), "--family", "IMIX", "-j", "2"]
+        assert main(args) == EXIT_OK
+        assert "2/2 file(s)" in capsys.readouterr().err
+        assert main([*args, "--strict"]) == EXIT_INVALID
+        assert "failed: " in capsys.readouterr().err
+
+    def test_no_inputs(self, tmp_path, capsys):
+        assert main(["batch", str(tmp_path), "-d", str(tmp_path / "o"), "--family", "IMIX"]) == EXIT_INVALID
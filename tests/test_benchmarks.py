@@ -0,0 +1,146 @@
+"""Tests for the benchmark fixtures and baseline comparison."""
+
+from __future__ import annotations
+
+import json
+import re
+
+import pytest
+
+from api_refresh_builder.constants import CODE_PATTERN
+from api_refresh_builder.parsing import parse_codes
+from benchmarks.fixtures import XLS_MAX_ROWS, fixture_path, generate_codes, write_fixture
+from benchmarks import runner
+from benchmarks.runner import DEFAULT_BASELINE, compare, main
+
+
+class TestGenerateCodes:
+    def test_deterministic(self):
+        assert generate_codes(500, invalid_ratio=0.1, seed=3) == generate_codes(
+            500, invalid_ratio=0.1, seed=3
+        )
+
+    def test_ratios(self):
+        codes = generate_codes(20_000, invalid_ratio=0.1, duplicate_ratio=0.2)
+        invalid = [c for c in codes if not re.fullmatch(CODE_PATTERN, c)]
+        valid = [c for c in codes if re.fullmatch(CODE_PATTERN, c)]
+        assert len(codes) == 20_000
+        assert len(invalid) / len(codes) == pytest.approx(0.1, abs=0.02)
+        assert (len(valid) - len(set(valid))) / len(codes) == pytest.approx(0.2, abs=0.02)
+
+    def test_rejects_bad_ratios(self):
+        with pytest.raises(ValueError):
+            generate_codes(10, invalid_ratio=0.7, duplicate_ratio=0.5)
+
+
+class TestFixtures:
+    @pytest.mark.parametrize("fmt", ["csv", "xlsx"])
+    def test_round_trip(self, tmp_path, fmt):
+        path = fixture_path(tmp_path, 300, fmt, invalid_ratio=0.1, duplicate_ratio=0.1)
+        result = parse_codes(path.read_bytes(), path.name)
+        assert result.total_found == 300
+        assert result.invalid_count > 0 and result.duplicates_removed > 0
+
+    def test_xls_row_limit(self, tmp_path):
+        with pytest.raises(ValueError, match="at most"):
+            write_fixture(tmp_path / "big.xls", XLS_MAX_ROWS + 1)
+
+
+class TestCompare:
+    BASE = {"case": {"rows_per_s": 1000.0, "peak_bytes": 1000}}
+
+    def test_within_tolerance(self):
+        now = {"case": {"rows_per_s": 800.0, "peak_bytes": 1200}}
+        assert compare(now, self.BASE, 0.25) == []
+
+    def test_slower_and_bigger(self):
+        now = {"case": {"rows_per_s": 700.0, "peak_bytes": 1300}}
+        messages = compare(now, self.BASE, 0.25)
+        assert len(messages) == 2
+        assert "throughput" in messages[0] and "peak memory" in messages[1]
+
+    def test_new_case_ignored(self):
+        assert compare({"new": {"rows_per_s": 1.0, "peak_bytes": 1}}, self.BASE, 0.25) == []
+
+    def test_untimed_throughput_ignored(self):
+        now = {"case": {"rows_per_s": None, "peak_bytes": 1000}}
+        assert compare(now, self.BASE, 0.25) == []
+
+
+def test_committed_baseline_is_strict_json():
+    def reject(token):
+        raise ValueError(f"non-standard JSON constant {token}")
+
+    report = json.loads(DEFAULT_BASELINE.read_text(encoding="utf-8"), parse_constant=reject)
+    assert "build_sql[1000]" in report["results"]
+    assert set(report["meta"]["machine"]) == {"cpu", "cpus", "arch", "python"}
+
+
+class TestMain:
+    def test_save_then_detect_regression(self, tmp_path):
+        baseline = tmp_path / "baseline.json"
+        args = [
+            "--sizes", "200",
+            "--formats", "csv",
+            "--repeat", "1",
+            "--fixtures-dir", str(tmp_path / "fx"),
+            "--baseline", str(baseline),
+            "-k", r"^build_sql\[",
+        ]
+        assert main([*args, "--save-baseline"]) == 0
+        report = json.loads(baseline.read_text())
+        assert set(report["results"]) == {"build_sql[200]"}
+
+        report["results"]["build_sql[200]"]["rows_per_s"] *= 1000
+        baseline.write_text(json.dumps(report))
+        assert main(args) == 1
+
+    def test_default_baseline_skipped_on_other_machine(self, tmp_path, monkeypatch, capsys):
+        baseline = tmp_path / "baseline.json"
+        monkeypatch.setattr(runner, "DEFAULT_BASELINE", baseline)
+        args = [
+            "--sizes", "200",
+            "--formats", "csv",
+            "--repeat", "1",
+            "--fixtures-dir", str(tmp_path / "fx"),
+            "-k", r"^build_sql\[",
+        ]
+        assert main([*args, "--save-baseline"]) == 0
+        report = json.loads(baseline.read_text())
+        report["results"]["build_sql[200]"]["rows_per_s"] *= 1000
+        baseline.write_text(json.dumps(report))
+        assert main(args) == 1
+
+        report["meta"]["machine"]["cpu"] = "some other CPU"
+        baseline.write_text(json.dumps(report))
+        capsys.readouterr()
+        assert main(args) == 0
+        assert "not comparing" in capsys.readouterr().out
+        assert main([*args, "--baseline", str(baseline)]) == 1
+
+
+class TestUILatency:
+    def test_percentile(self):
+        from benchmarks.ui import percentile
+
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 95) == 95
+        assert percentile([7.0], 95) == 7.0
+
+    def test_budgets(self):
+        from benchmarks.ui import Sample, check_budgets, summarise
+
+        samples = [Sample("mapping", "upload", 10, ms, 1) for ms in (10.0, 20.0, 900.0)]
+        summary = summarise(samples)
+        assert summary["mapping"] == {"n": 3, "p50_ms": 20.0, "p95_ms": 900.0}
+        assert check_budgets(summary, {"mapping": {"p50_ms": 50, "p95_ms": 1000}}) == []
+        (failure,) = check_budgets(summary, {"mapping": {"p50_ms": 50, "p95_ms": 500}})
+        assert failure.startswith("mapping: p95_ms")
+
+    def test_mapping_scenario_runs(self):
+        from benchmarks.ui import run_scenarios
+
+        samples = run_scenarios(["mapping"], [20], 1)
+        assert [s.action for s in samples] == ["source id", "mapping code", "bulk upload"]
+        assert all(s.ms > 0 for s in samples)
@@ -0,0 +1,128 @@
+"""Tests for api_refresh_builder.cli."""
+
+from __future__ import annotations
+
+import io
+import subprocess
+import sys
+
+import pytest
+
+from api_refresh_builder import crm_builder, mapping_builder, sql_builder
+from api_refresh_builder.cli import EXIT_INVALID, EXIT_OK, EXIT_USAGE, main
+
+
+@pytest.fixture
+def codes_csv(tmp_path):
+    path = tmp_path / "codes.csv"
+    path.write_text("A1\nB2\nB2\nbad code\n")
+    return path
+
+
+def _stdin(monkeypatch, data: bytes) -> None:
+    monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(io.BytesIO(data)))
+
+
+class TestRefresh:
+    def test_matches_build_sql(self, codes_csv, capsys):
+        assert main(["refresh", str(codes_csv), "--family", "IMIX", "--types", "Contact"]) == EXIT_OK
+        out, err = capsys.readouterr()
+        assert out == sql_builder.build_sql(["A1", "B2"], "IMIX", ["Contact"]) + "\n"
+        assert "2 valid, 1 invalid, 1 duplicates removed" in err
+
+    def test_modes(self, codes_csv, capsys):
+        args = ["refresh", str(codes_csv), "--family", "IMIX", "--types", "Contact"]
+        main([*args, "--mode", "batched", "--batch-size", "1", "--debug"])
+        expected = sql_builder.build_sql_script_batched(
+            ["A1", "B2"], "IMIX", ["Contact"], debug=True, max_codes=1
+        )
+        assert capsys.readouterr().out == expected + "\n"
+        main([*args, "--mode", "temp-table"])
+        assert "CREATE TABLE #codes" in capsys.readouterr().out
+
+    def test_writes_output_file(self, codes_csv, tmp_path, capsys):
+        out = tmp_path / "out.sql"
+        assert main(["refresh", str(codes_csv), "--family", "IMIX", "-o", str(out)]) == EXIT_OK
+        assert out.read_text().startswith("EXEC ")
+        assert capsys.readouterr().out == ""
+
+    def test_stdin(self, monkeypatch, capsys):
+        _stdin(monkeypatch, b"X1\nX2\n")
+        assert main(["refresh", "-", "--family", "IMIX", "--types", "Contact"]) == EXIT_OK
+        assert "@EntityCodes = 'X1,X2'" in capsys.readouterr().out
+
+    def test_strict_fails(self, codes_csv, capsys):
+        assert main(["refresh", str(codes_csv), "--family", "IMIX", "--strict"]) == EXIT_INVALID
+        assert "strict validation" in capsys.readouterr().err
+
+    def test_no_valid_codes(self, tmp_path, capsys):
+        path = tmp_path / "bad.csv"
+        path.write_text("bad code\n")
+        assert main(["refresh", str(path), "--family", "IMIX"]) == EXIT_INVALID
+
+    def test_missing_file(self, capsys):
+        assert main(["refresh", "/no/such.csv", "--family", "IMIX"]) == EXIT_INVALID
+        assert "cannot read" in capsys.readouterr().err
+
+    def test_usage_error(self, codes_csv, capsys):
+        with pytest.raises(SystemExit) as exc:
+            main(["refresh", str(codes_csv), "--family", "Nope"])
+        assert exc.value.code == EXIT_USAGE
+
+
+class TestMapping:
+    def test_single(self, capsys):
+        assert main(["mapping", "348", "CACR0", "--existing", "SCSH"]) == EXIT_OK
+        out = capsys.readouterr().out
+        assert out == mapping_builder.build_all_steps("348", "CACR0", "SCSH") + "\n"
+
+    def test_bulk_file(self, tmp_path, capsys):
+        path = tmp_path / "pairs.csv"
+        path.write_text("id,code\n348,CACR0\n349,SCSH\n")
+        assert main(["mapping", "--file", str(path)]) == EXIT_OK
+        out = capsys.readouterr().out
+        assert out == mapping_builder.build_bulk_all_steps([("348", "CACR0"), ("349", "SCSH")]) + "\n"
+
+    def test_missing_args(self, capsys):
+        assert main(["mapping", "348"]) == EXIT_INVALID
+
+
+class TestCRM:
+    def test_refs_and_set(self, monkeypatch, capsys):
+        _stdin(monkeypatch, b"IMIX.CT.1\n\nIMIX.CT.2\n")
+        assert main(["crm", "--refs", "-", "--set", "Narrative2=Employer"]) == EXIT_OK
+        expected = crm_builder.build_full_flow(
+            ["IMIX.CT.1", "IMIX.CT.2"], {"Narrative2": "Employer"}
+        )
+        assert capsys.readouterr().out == expected + "\n"
+
+    def test_ref_table_flag(self, tmp_path, capsys):
+        refs = tmp_path / "refs.txt"
+        refs.write_text("IMIX.CT.1\n")
+        main(["crm", "--refs", str(refs), "--set", "Narrative2=X", "--ref-table"])
+        assert capsys.readouterr().out.startswith("-- Load refs into #refs")
+
+    def test_bulk_file(self, tmp_path, capsys):
+        path = tmp_path / "amend.csv"
+        path.write_text("ref,Narrative2\nIMIX.CT.1,X\nIMIX.CT.2,Y\n")
+        assert main(["crm", "--file", str(path)]) == EXIT_OK
+        out = capsys.readouterr().out
+        assert out.index("-- Pre-check") < out.index("UPDATE t") < out.index("-- Post-check")
+        assert "(N'IMIX.CT.2', N'Y')" in out
+
+    def test_bad_assignment(self, tmp_path, capsys):
+        refs = tmp_path / "refs.txt"
+        refs.write_text("IMIX.CT.1\n")
+        assert main(["crm", "--refs", str(refs), "--set", "Narrative2"]) == EXIT_INVALID
+        assert "FIELD=VALUE" in capsys.readouterr().err
+
+
+def test_module_entry_point(codes_csv):
+    proc = subprocess.run(
+        [sys.executable, "-m", "api_refresh_builder", "refresh", str(codes_csv), "--family", "IMIX"],
+        capture_output=True,
+        text=True,
+    )
+    assert proc.returncode == EXIT_OK
+    assert proc.stdout.startswith("EXEC ")
+    assert "streamlit" not in proc.stderr
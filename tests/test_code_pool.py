@@ -0,0 +1,69 @@
+"""Tests for api_refresh_builder.code_pool."""
+
+from __future__ import annotations
+
+import sys
+
+import numpy as np
+import pytest
+
+from api_refresh_builder import code_pool
+from api_refresh_builder.code_pool import CodeList, shared_nbytes
+
+CODES = ["A1", "BB22", "", "C", "DDD333"]
+
+
+@pytest.fixture
+def codes() -> CodeList:
+    return CodeList.from_strings(CODES)
+
+
+class TestSequence:
+    def test_len_index_iter(self, codes):
+        assert len(codes) == 5
+        assert codes[1] == "BB22" and codes[-1] == "DDD333" and codes[2] == ""
+        assert list(codes) == CODES
+
+    def test_index_out_of_range(self, codes):
+        with pytest.raises(IndexError):
+            codes[5]
+        with pytest.raises(IndexError):
+            codes[-6]
+
+    def test_slices_are_lists(self, codes):
+        assert codes[1:3] == ["BB22", ""]
+        assert type(codes[1:3]) is list
+        assert codes[::2] == CODES[::2]
+        assert codes[10:] == []
+
+    def test_equality(self, codes):
+        assert codes == CODES
+        assert codes == tuple(CODES)
+        assert codes == CodeList.from_strings(CODES)
+        assert codes != CODES[:-1]
+        assert codes != "A1BB22CDDD333"
+
+    def test_sequence_mixins(self, codes):
+        assert "C" in codes and "Z" not in codes
+        assert codes.index("C") == 3
+        assert not CodeList.from_strings([])
+
+    def test_iterates_in_blocks(self, monkeypatch):
+        monkeypatch.setattr(code_pool, "_ITER_BLOCK", 2)
+        assert list(CodeList.from_strings(CODES)) == CODES
+
+
+class TestSelect:
+    def test_view_shares_pool(self, codes):
+        view = codes.select(np.array([4, 0, 0]))
+        assert view == ["DDD333", "A1", "A1"]
+        assert view[1:] == ["A1", "A1"]
+
+    def test_select_of_view(self, codes):
+        view = codes.select(np.array([1, 3, 4])).select(np.array([2, 0]))
+        assert view == ["DDD333", "BB22"]
+
+    def test_shared_buffers_counted_once(self, codes):
+        view = codes.select(np.array([0, 1], dtype=np.int32))
+        assert codes.nbytes == sys.getsizeof("".join(CODES)) + 6 * 4
+        assert shared_nbytes(codes, view, view) == codes.nbytes + 2 * 4
@@ -0,0 +1,119 @@
+"""Tests for api_refresh_builder.config_catalog and catalog-aware mapping SQL."""
+
+from __future__ import annotations
+
+import pytest
+
+from api_refresh_builder.config_catalog import ConfigCatalog
+from api_refresh_builder.mapping_builder import build_resolved_steps
+
+HEADER = "TransactionTypeExternal,TransactionType,TransferType,Shares,TDW_Description,TDW_SourceTable,Extra"
+
+
+def _export(*rows: str) -> bytes:
+    return "\n".join([HEADER, *rows]).encode("utf-8")
+
+
+@pytest.fixture
+def catalog() -> ConfigCatalog:
+    return ConfigCatalog.from_file(
+        _export(
+            "SCSH,Cash,None,0,Cash switch,src,x",
+            "CACR0,Credit,None,1,Cash credit,src,y",
+            "scsh,Dupe,None,0,ignored,src,z",
+        ),
+        "config.csv",
+    )
+
+
+class TestConfigCatalog:
+    def test_lookup_case_insensitive(self, catalog):
+        assert len(catalog) == 2
+        assert "SCSH" in catalog
+        assert " scsh " in catalog
+        assert "NOPE" not in catalog
+        assert catalog.get("cacr0")["TDW_Description"] == "Cash credit"
+
+    def test_only_config_columns_kept(self, catalog):
+        assert "Extra" not in catalog.get("SCSH")
+
+    def test_first_row_wins(self, catalog):
+        assert catalog.get("SCSH")["TransactionType"] == "Cash"
+
+    def test_missing(self, catalog):
+        assert catalog.missing(["SCSH", "NEW1", "NEW1", " NEW2 ", ""]) == ["NEW1", "NEW2"]
+
+    def test_requires_key_column(self):
+        with pytest.raises(ValueError, match="TransactionTypeExternal"):
+            ConfigCatalog.from_file(b"Code,Other\nA,B\n", "config.csv")
+
+    def test_sqlite_round_trip(self, catalog, tmp_path):
+        path = catalog.save(tmp_path / "nested" / "catalog.sqlite")
+        loaded = ConfigCatalog.load(path)
+        assert loaded is not None
+        assert list(loaded) == list(catalog)
+
+    @pytest.mark.parametrize("dirname", ["a?b", "c#d", "50%", "sp ace"])
+    def test_sqlite_round_trip_uri_characters_in_path(self, catalog, tmp_path, dirname):
+        path = catalog.save(tmp_path / dirname / "catalog.sqlite")
+        loaded = ConfigCatalog.load(path)
+        assert loaded is not None
+        assert list(loaded) == list(catalog)
+
+    def test_load_missing_file(self, tmp_path):
+        assert ConfigCatalog.load(tmp_path / "absent.sqlite") is None
+
+
+class TestResolvedSteps:
+    def test_known_code_skips_clone(self, catalog):
+        sql = build_resolved_steps("348", "CACR0", catalog, "SCSH")
+        assert "INSERT INTO" not in sql
+        assert sql.endswith("EXEC Aurora.IMIX.TransactionTypes_InsertMap '348', 'CACR0', 1;")
+
+    def test_missing_code_clones_before_insert(self, catalog):
+        sql = build_resolved_steps("348", "NEWC", catalog, "SCSH")
+        assert "IF NOT EXISTS" in sql
+        assert sql.index("INSERT INTO") < sql.index("EXEC Aurora.IMIX")
+        assert "'NEWC', TransactionType" in sql
+        assert "TransactionTypeExternal = 'SCSH';" in sql
+
+    def test_missing_code_needs_existing(self, catalog):
+        with pytest.raises(ValueError, match="existing reference code is required"):
+            build_resolved_steps("348", "NEWC", catalog)
+
+    def test_existing_code_must_be_known(self, catalog):
+        with pytest.raises(ValueError, match="not in the config catalog"):
+            build_resolved_steps("348", "NEWC", catalog, "ALSO_NEW")
+
+
+class TestSuggest:
+    @pytest.fixture
+    def big_catalog(self) -> ConfigCatalog:
+        rows = [
+            {"TransactionTypeExternal": "CACR0", "TDW_Description": "Cash credit"},
+            {"TransactionTypeExternal": "CACR1", "TDW_Description": "Cash credit adj"},
+            {"TransactionTypeExternal": "SCSH", "TDW_Description": "Switch cash"},
+            {"TransactionTypeExternal": "EMPC", "TDW_Description": "Employer contribution"},
+        ]
+        return ConfigCatalog(rows)
+
+    def test_closest_code_first(self, big_catalog):
+        suggestions = big_catalog.suggest("CACR2")
+        assert [code for code, _ in suggestions[:2]] == ["CACR0", "CACR1"]
+        assert all(0 < score <= 1 for _, score in suggestions)
+
+    def test_matches_description(self, big_catalog):
+        codes = [code for code, _ in big_catalog.suggest("EMPLOYER", k=1)]
+        assert codes == ["EMPC"]
+
+    def test_excludes_exact_match(self, big_catalog):
+        codes = [code for code, _ in big_catalog.suggest("cacr0")]
+        assert "CACR0" not in codes
+        assert codes[0] == "CACR1"
+
+    def test_top_k(self, big_catalog):
+        assert len(big_catalog.suggest("CACR2", k=1)) == 1
+
+    def test_no_overlap(self, big_catalog):
+        assert big_catalog.suggest("ZZZZ") == []
+        assert big_catalog.suggest("  ") == []
@@ -5,9 +5,11 @@ from __future__ import annotations
 import pytest
 
 from api_refresh_builder.crm_builder import (
+    build_bulk_update,
     build_full_flow,
     build_post_check,
     build_pre_check,
+    build_ref_table_load,
     build_update,
 )
 
@@ -126,3 +128,123 @@ class TestBuildFullFlow:
             {"Narrative2": "X"},
         )
         assert sql.rstrip().endswith(";")
+
+
+class TestBuildBulkUpdate:
+    def test_set_based_update(self):
+        sql = build_bulk_update({
+            "IMIX.CT.1": {"Narrative2": "Employer Contribution"},
+            "IMIX.CT.2": {"Narrative2": "Member Contribution"},
+        })
+        assert sql.startswith("UPDATE t\n")
+        assert "FROM ClientTransactions.mba.transactions t" in sql
+        assert "(N'IMIX.CT.1', N'Employer Contribution')," in sql
+        assert "(N'IMIX.CT.2', N'Member Contribution')" in sql
+        assert ") v (ref, Narrative2)" in sql
+        assert sql.endswith("ON t.ref = v.ref;")
+
+    def test_missing_value_keeps_current(self):
+        sql = build_bulk_update({
+            "IMIX.CT.1": {"Narrative2": "X"},
+            "IMIX.CT.2": {"TransactionTypeExternal": "EMP"},
+        })
+        assert "(N'IMIX.CT.1', N'X', NULL)" in sql
+        assert "(N'IMIX.CT.2', NULL, N'EMP')" in sql
+        assert "t.Narrative2 = COALESCE(CAST(v.Narrative2 AS NVARCHAR(MAX)), t.Narrative2)" in sql
+
+    def test_chunked_by_values_limit(self):
+        amendments = {f"IMIX.CT.{i}": {"Narrative2": "X"} for i in range(2_500)}
+        sql = build_bulk_update(amendments)
+        assert sql.count("UPDATE t") == 3
+        assert sql.count("(N'IMIX.CT.") == 2_500
+
+    def test_custom_chunk_size(self):
+        amendments = {f"R{i}": {"Narrative2": "X"} for i in range(5)}
+        assert build_bulk_update(amendments, chunk_size=2).count("UPDATE t") == 3
+
+    def test_quotes_escaped(self):
+        sql = build_bulk_update({"IMIX.CT.1": {"Narrative2": "Employer's"}})
+        assert "N'Employer''s'" in sql
+
+    def test_blank_rows_dropped(self):
+        sql = build_bulk_update({
+            " IMIX.CT.1 ": {"Narrative2": " X "},
+            "IMIX.CT.2": {"Narrative2": "  "},
+            "": {"Narrative2": "Y"},
+        })
+        assert "(N'IMIX.CT.1', N'X')" in sql
+        assert "IMIX.CT.2" not in sql
+
+    def test_empty_raises(self):
+        with pytest.raises(ValueError, match="reference"):
+            build_bulk_update({"IMIX.CT.1": {"Narrative2": ""}})
+
+    def test_invalid_field_name_raises(self):
+        with pytest.raises(ValueError, match="Invalid field name"):
+            build_bulk_update({"IMIX.CT.1": {"Narrative2; DROP": "X"}})
+
+    def test_chunk_size_out_of_range_raises(self):
+        with pytest.raises(ValueError, match="chunk_size"):
+            build_bulk_update({"IMIX.CT.1": {"Narrative2": "X"}}, chunk_size=1001)
+
+
+class TestRefTable:
+    REFS = ["IMIX.CT.1", "IMIX.CT.2", "IMIX.CT.1"]
+
+    def test_load_script(self):
+        sql = build_ref_table_load(self.REFS)
+        assert (
+            "CREATE TABLE #refs "
+            "(ref NVARCHAR(100) COLLATE DATABASE_DEFAULT NOT NULL PRIMARY KEY);"
+        ) in sql
+        assert "INSERT INTO #refs (ref) VALUES\n    ('IMIX.CT.1'),\n    ('IMIX.CT.2');" in sql
+
+    def test_load_batched_at_values_limit(self):
+        sql = build_ref_table_load([f"IMIX.CT.{i}" for i in range(2_001)])
+        assert sql.count("INSERT INTO #refs") == 3
+
+    def test_load_empty_raises(self):
+        with pytest.raises(ValueError, match="reference"):
+            build_ref_table_load(["  "])
+
+    def test_ref_longer_than_column_raises(self):
+        build_ref_table_load(["R" * 100])
+        with pytest.raises(ValueError, match="longer than 100 characters"):
+            build_ref_table_load(["IMIX.CT.1", "R" * 101])
+        with pytest.raises(ValueError, match="longer than"):
+            build_full_flow(["R" * 101], {"Narrative2": "X"}, use_ref_table=True)
+
+    def test_long_refs_allowed_without_ref_table(self):
+        refs = ["R" * 150]
+        assert "R" * 150 in build_pre_check(refs)
+        assert "R" * 150 in build_full_flow(refs, {"Narrative2": "X"})
+
+    def test_checks_join_ref_table(self):
+        sql = build_pre_check(self.REFS, use_ref_table=True)
+        assert "IN (" not in sql
+        assert sql.count("JOIN #refs r ON r.ref = t.ref;") == 2
+        assert build_post_check(self.REFS, use_ref_table=True) == sql
+
+    def test_update_joins_ref_table(self):
+        sql = build_update(self.REFS, {"Narrative2": "X"}, use_ref_table=True)
+        assert sql == (
+            "UPDATE t\n"
+            "SET Narrative2 = 'X'\n"
+            "FROM ClientTransactions.mba.transactions t\n"
+            "JOIN #refs r ON r.ref = t.ref;"
+        )
+
+    def test_statement_text_independent_of_ref_count(self):
+        few = build_update(["A"], {"Narrative2": "X"}, use_ref_table=True)
+        many = build_update([f"R{i}" for i in range(5_000)], {"Narrative2": "X"}, use_ref_table=True)
+        assert few == many
+
+    def test_full_flow_loads_and_drops(self):
+        sql = build_full_flow(self.REFS, {"Narrative2": "X"}, use_ref_table=True)
+        assert sql.startswith("-- Load refs into #refs\n")
+        assert sql.index("CREATE TABLE #refs") < sql.index("-- Pre-check")
+        assert sql.endswith("DROP TABLE #refs;")
+
+    def test_default_is_inline(self):
+        sql = build_full_flow(self.REFS, {"Narrative2": "X"})
+        assert "#refs" not in sql
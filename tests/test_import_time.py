@@ -0,0 +1,76 @@
+"""Import-time budget checks (``python -X importtime``).
+
+Each module is imported in a fresh interpreter so results don't depend on
+what the test session has already loaded.
+"""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+HEAVY_MODULES = ("pandas", "numpy", "openpyxl", "xlrd")
+
+# Cumulative import time budget per module, in microseconds.  Generous enough
+# for slow CI runners; importing pandas alone typically costs more.
+BUILDER_BUDGET_US = 150_000
+PAGE_BUDGET_US = 2_500_000
+
+
+def _import_profile(module: str) -> dict[str, int]:
+    """Return ``{module_name: cumulative_us}`` for everything *module* imports."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    profile: dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        profile[name] = int(cumulative)
+    return profile
+
+
+def _loaded(profile: dict[str, int], package: str) -> bool:
+    return any(name == package or name.startswith(f"{package}.") for name in profile)
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "api_refresh_builder.sql_builder",
+        "api_refresh_builder.crm_builder",
+        "api_refresh_builder.mapping_builder",
+        "api_refresh_builder.parsing",
+        "api_refresh_builder.parse_cache",
+        "api_refresh_builder.code_pool",
+        "api_refresh_builder.config_catalog",
+    ],
+)
+def test_core_modules_are_light(module):
+    profile = _import_profile(module)
+    assert not [m for m in HEAVY_MODULES if _loaded(profile, m)]
+    assert profile[module] < BUILDER_BUDGET_US
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "api_refresh_builder.pages.api_refresh",
+        "api_refresh_builder.pages.mapping",
+        "api_refresh_builder.pages.crm_amendments",
+    ],
+)
+def test_pages_defer_pandas(module):
+    profile = _import_profile(module)
+    assert not [m for m in HEAVY_MODULES if _loaded(profile, m)]
+    assert profile[module] < PAGE_BUDGET_US
@@ -0,0 +1,130 @@
+"""Tests for api_refresh_builder.instrumentation."""
+
+from __future__ import annotations
+
+import logging
+import tracemalloc
+
+import pytest
+
+from api_refresh_builder import instrumentation
+from api_refresh_builder.crm_builder import build_pre_check
+from api_refresh_builder.instrumentation import (
+    Timings,
+    collect,
+    include,
+    instrumented,
+    new_timings,
+    stage,
+    timed_iter,
+)
+from api_refresh_builder.parsing import parse_codes
+from api_refresh_builder.sql_builder import build_sql, build_sql_script_batched
+
+
+@pytest.fixture
+def enabled():
+    instrumentation.configure(True)
+    yield
+    instrumentation.configure(False)
+
+
+@pytest.fixture
+def memory():
+    instrumentation.configure(True, memory=True)
+    yield
+    instrumentation.configure(False)
+    tracemalloc.stop()
+
+
+class TestDisabled:
+    def test_helpers_are_noops(self):
+        assert new_timings() is None
+        with stage(None, "x") as entry:
+            entry.rows = 5
+        assert timed_iter(None, "x", [1]) == [1]
+        with collect("label") as timings:
+            build_sql(["A"], "IMIX", ["Contact"])
+        assert timings is None
+
+    def test_parse_has_no_timings(self):
+        assert parse_codes(b"A\nB", "a.csv").timings is None
+
+
+class TestEnabled:
+    def test_parse_stages(self, enabled):
+        result = parse_codes(b"A\nB\nB\nbad code", "a.csv")
+        stages = result.timings.stages
+        assert list(stages) == ["read", "clean", "validate", "dedupe"]
+        assert stages["read"].rows == 4
+        assert stages["validate"].rows == 4
+        assert stages["dedupe"].rows == 3
+        assert all(s.seconds >= 0 for s in stages.values())
+
+    def test_timings_do_not_affect_equality(self, enabled):
+        assert parse_codes(b"A", "a.csv") == parse_codes(b"A", "a.csv")
+
+    def test_builders_record_inside_collect_only(self, enabled):
+        build_sql(["A"], "IMIX", ["Contact"])
+        with collect("label") as timings:
+            build_sql(["A", "B"], "IMIX", ["Contact"])
+            build_sql(["C"], "IMIX", ["Contact"])
+            build_pre_check(["IMIX.CT.1"])
+        assert timings.stages["build_sql"].calls == 2
+        assert timings.stages["build_sql"].rows == 3
+        assert timings.stages["build_pre_check"].rows == 1
+
+    def test_batched_script_timed_once(self, enabled):
+        with collect("label") as timings:
+            build_sql_script_batched(["A", "B"], "IMIX", ["Contact"], max_codes=1)
+        assert set(timings.stages) == {"build_sql_script_batched"}
+        assert timings.stages["build_sql_script_batched"].calls == 1
+
+    def test_failed_call_is_still_timed(self, enabled):
+        with collect("label") as timings:
+            with pytest.raises(ValueError):
+                build_sql([], "IMIX", ["Contact"])
+        assert timings.stages["build_sql"].calls == 1
+
+    def test_include_merges_with_prefix(self, enabled):
+        parsed = parse_codes(b"A\nB", "a.csv").timings
+        with collect("label") as timings:
+            include(parsed, prefix="parse.")
+        assert "parse.read" in timings.stages
+        assert timings.stages["parse.read"].rows == 2
+
+    def test_structured_log_record(self, enabled, caplog):
+        with caplog.at_level(logging.INFO, logger="api_refresh_builder.perf"):
+            with collect("page.sql"):
+                build_sql(["A"], "IMIX", ["Contact"])
+        (record,) = [r for r in caplog.records if r.name == "api_refresh_builder.perf"]
+        assert record.perf["label"] == "page.sql"
+        assert record.perf["stages"][0]["name"] == "build_sql"
+
+    def test_decorator_preserves_metadata(self):
+        @instrumented(rows_arg=0)
+        def sample(items):
+            """Doc."""
+            return len(items)
+
+        assert sample.__name__ == "sample" and sample.__doc__ == "Doc."
+        assert sample([1, 2]) == 2
+
+
+class TestMemory:
+    def test_peak_recorded(self, memory):
+        timings = Timings()
+        with timings.stage("alloc"):
+            blob = bytearray(1_000_000)
+        del blob
+        assert timings.stages["alloc"].peak_bytes >= 1_000_000
+
+    def test_nested_stage_keeps_parent_peak(self, memory):
+        timings = Timings()
+        with timings.stage("outer"):
+            blob = bytearray(1_000_000)
+            del blob
+            with timings.stage("inner"):
+                pass
+        assert timings.stages["outer"].peak_bytes >= 1_000_000
+        assert timings.stages["inner"].peak_bytes < 1_000_000
@@ -6,6 +6,11 @@ import pytest
 
 from api_refresh_builder.mapping_builder import (
     build_all_steps,
+    build_bulk_all_steps,
+    build_bulk_clone_config_rows,
+    build_bulk_config_check,
+    build_bulk_insert_map,
+    build_bulk_lookup_query,
     build_clone_config_row,
     build_config_check,
     build_config_lookup_existing,
@@ -122,3 +127,82 @@ class TestBuildAllSteps:
     def test_ends_with_semicolon(self):
         sql = build_all_steps("348", "CACR0")
         assert sql.rstrip().endswith(";")
+
+
+class TestBulkMapping:
+    PAIRS = [("348", "CACR0"), ("149_1033", "SCSH"), ("9", "SCSH")]
+
+    def test_lookup_single_query(self):
+        sql = build_bulk_lookup_query(["348", " 149_1033 ", "348"])
+        assert sql.count("SELECT") == 1
+        assert "WHERE id IN ('348', '149_1033');" in sql
+
+    def test_lookup_empty_raises(self):
+        with pytest.raises(ValueError, match="source ID"):
+            build_bulk_lookup_query(["", " "])
+
+    def test_config_check_lists_missing_codes(self):
+        sql = build_bulk_config_check(["CACR0", "SCSH", "SCSH"])
+        assert "    ('CACR0'),\n    ('SCSH')\n) v (code)" in sql
+        assert "WHERE NOT EXISTS" in sql
+        assert "c.TransactionTypeExternal = v.code" in sql
+
+    def test_insert_single_transaction(self):
+        sql = build_bulk_insert_map(self.PAIRS)
+        assert sql.count("BEGIN TRANSACTION;") == 1
+        assert sql.count("EXEC Aurora.IMIX.TransactionTypes_InsertMap") == 3
+        assert "EXEC Aurora.IMIX.TransactionTypes_InsertMap '149_1033', 'SCSH', 1;" in sql
+        assert sql.startswith("SET XACT_ABORT ON;")
+        assert sql.endswith("COMMIT TRANSACTION;\nGO")
+
+    def test_insert_chunked(self):
+        sql = build_bulk_insert_map(self.PAIRS, chunk_size=2)
+        assert sql.count("BEGIN TRANSACTION;") == 2
+        assert sql.count("COMMIT TRANSACTION;\nGO") == 2
+        assert sql.count("\nGO") == 2
+        assert sql.endswith("GO")
+
+    def test_insert_strips_and_drops_incomplete(self):
+        sql = build_bulk_insert_map([(" 348 ", " CACR0 "), ("349", "")])
+        assert "'348', 'CACR0'" in sql
+        assert "349" not in sql
+
+    def test_insert_empty_raises(self):
+        with pytest.raises(ValueError, match="pair"):
+            build_bulk_insert_map([])
+
+    def test_all_steps(self):
+        sql = build_bulk_all_steps(self.PAIRS)
+        assert sql.index("-- Step 1") < sql.index("-- Step 2") < sql.index("-- Step 3")
+        assert sql.rstrip().endswith("COMMIT TRANSACTION;\nGO")
+
+
+class TestBulkCloneConfigRows:
+    def test_single_set_based_statement(self):
+        sql = build_bulk_clone_config_rows([("NEW1", "SCSH"), ("NEW2", "CACR0")])
+        assert sql.count("INSERT INTO") == 1
+        assert "        ('NEW1', 'SCSH'),\n        ('NEW2', 'CACR0')\n" in sql
+        assert "ON c.TransactionTypeExternal = v.existing_code" in sql
+        assert "WHERE x.TransactionTypeExternal = v.new_code" in sql
+        assert "v.new_code, c.TransactionType, c.TransferType" in sql
+
+    def test_chunked(self):
+        pairs = [(f"NEW{i}", "SCSH") for i in range(2_100)]
+        assert build_bulk_clone_config_rows(pairs).count("INSERT INTO") == 3
+        assert build_bulk_clone_config_rows(pairs[:5], chunk_size=2).count("INSERT INTO") == 3
+
+    def test_repeats_collapsed(self):
+        sql = build_bulk_clone_config_rows([("NEW1", "SCSH"), (" NEW1 ", "SCSH ")])
+        assert sql.count("('NEW1', 'SCSH')") == 1
+
+    def test_conflicting_pairs_raise(self):
+        with pytest.raises(ValueError, match="more than one existing code"):
+            build_bulk_clone_config_rows([("NEW1", "SCSH"), ("NEW1", "CACR0")])
+
+    def test_incomplete_pairs_dropped(self):
+        sql = build_bulk_clone_config_rows([("NEW1", "SCSH"), ("NEW2", "")])
+        assert "NEW2" not in sql
+
+    def test_empty_raises(self):
+        with pytest.raises(ValueError, match="pair"):
+            build_bulk_clone_config_rows([("NEW1", " ")])
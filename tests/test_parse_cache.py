@@ -0,0 +1,73 @@
+"""Tests for api_refresh_builder.parse_cache."""
+
+from __future__ import annotations
+
+import pytest
+
+from api_refresh_builder import parse_cache
+from api_refresh_builder.parse_cache import ParseCache
+
+
+def _csv(*codes: str) -> bytes:
+    return "\n".join(codes).encode("utf-8")
+
+
+@pytest.fixture
+def count_parses(monkeypatch):
+    calls: list[bytes] = []
+    real = parse_cache.parse_codes
+
+    def _spy(file_bytes, *args, **kwargs):
+        calls.append(file_bytes)
+        return real(file_bytes, *args, **kwargs)
+
+    monkeypatch.setattr(parse_cache, "parse_codes", _spy)
+    return calls
+
+
+class TestParseCache:
+    def test_hit_skips_parse(self, count_parses):
+        cache = ParseCache()
+        first = cache.parse(_csv("A", "B"), "a.csv")
+        second = cache.parse(_csv("A", "B"), "renamed.csv")
+        assert first is second
+        assert len(count_parses) == 1
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_options_are_part_of_key(self, count_parses):
+        cache = ParseCache()
+        raw = _csv("A", "A")
+        assert cache.parse(raw, "a.csv", dedupe=True).valid_codes == ["A"]
+        assert cache.parse(raw, "a.csv", dedupe=False).valid_codes == ["A", "A"]
+        cache.parse(raw, "a.csv", validation_pattern=r"^B$")
+        assert len(count_parses) == 3
+
+    def test_lru_eviction_by_entries(self, count_parses):
+        cache = ParseCache(max_entries=2)
+        cache.parse(_csv("A"), "a.csv")
+        cache.parse(_csv("B"), "b.csv")
+        cache.parse(_csv("A"), "a.csv")  # refresh A
+        cache.parse(_csv("C"), "c.csv")  # evicts B
+        assert len(cache) == 2
+        cache.parse(_csv("A"), "a.csv")
+        assert len(count_parses) == 3
+        cache.parse(_csv("B"), "b.csv")
+        assert len(count_parses) == 4
+
+    def test_memory_cap_evicts(self):
+        cache = ParseCache()
+        first = cache.parse(_csv("AAAA"), "a.csv")
+        cache.max_bytes = first.nbytes + 1
+        cache.parse(_csv("BBBB"), "b.csv")
+        assert len(cache) == 1
+        assert cache.nbytes <= cache.max_bytes
+
+    def test_oversized_result_not_stored(self):
+        cache = ParseCache(max_bytes=1)
+        result = cache.parse(_csv("A", "B"), "a.csv")
+        assert result.valid_codes == ["A", "B"]
+        assert len(cache) == 0
+
+    def test_invalid_limits_raise(self):
+        with pytest.raises(ValueError, match="positive"):
+            ParseCache(max_bytes=0)
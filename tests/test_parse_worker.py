@@ -0,0 +1,83 @@
+"""Tests for api_refresh_builder.parse_worker."""
+
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from api_refresh_builder import parse_worker
+from api_refresh_builder.parse_cache import ParseCache
+from api_refresh_builder.parse_worker import ParseCancelled, submit_parse
+
+
+def _csv(*codes: str) -> bytes:
+    return "\n".join(codes).encode("utf-8")
+
+
+@pytest.fixture
+def gated_parse(monkeypatch):
+    """Make parse_codes report progress, then block until the gate opens."""
+    gate = threading.Event()
+    started = threading.Event()
+    real = parse_worker.parse_codes
+
+    def _parse(file_bytes, filename, *, progress=None, **kwargs):
+        progress(42)
+        started.set()
+        gate.wait(5)
+        progress(42)
+        return real(file_bytes, filename, progress=progress, **kwargs)
+
+    monkeypatch.setattr(parse_worker, "parse_codes", _parse)
+    return started, gate
+
+
+class TestSubmitParse:
+    def test_result_and_progress(self):
+        job = submit_parse(_csv("A", "B", "B"), "a.csv", cache=ParseCache())
+        result = job.result(timeout=5)
+        assert result.valid_codes == ["A", "B"]
+        assert job.done()
+        assert job.rows_read == 3
+
+    def test_cache_hit_is_already_done(self):
+        cache = ParseCache()
+        first = submit_parse(_csv("A"), "a.csv", cache=cache).result(timeout=5)
+        job = submit_parse(_csv("A"), "b.csv", cache=cache)
+        assert job.done()
+        assert job.result() is first
+
+    def test_parse_error_propagates(self):
+        job = submit_parse(b"x", "codes.txt", cache=ParseCache())
+        with pytest.raises(ValueError, match="Unsupported"):
+            job.result(timeout=5)
+
+    def test_progress_visible_while_running(self, gated_parse):
+        started, gate = gated_parse
+        job = submit_parse(_csv("A"), "a.csv", cache=ParseCache())
+        assert started.wait(5)
+        assert not job.done()
+        assert job.rows_read == 42
+        gate.set()
+        assert job.result(timeout=5).valid_codes == ["A"]
+
+    def test_wait_times_out_then_returns_done(self, gated_parse):
+        started, gate = gated_parse
+        job = submit_parse(_csv("A"), "a.csv", cache=ParseCache())
+        assert started.wait(5)
+        assert job.wait(0.01) is False
+        gate.set()
+        assert job.wait(5) is True
+
+    def test_cancel_stops_running_job(self, gated_parse):
+        started, gate = gated_parse
+        cache = ParseCache()
+        job = submit_parse(_csv("A"), "a.csv", cache=cache)
+        assert started.wait(5)
+        job.cancel()
+        gate.set()
+        with pytest.raises(ParseCancelled):
+            job.result(timeout=5)
+        assert job.cancelled
+        assert len(cache) == 0
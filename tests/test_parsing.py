@@ -4,10 +4,17 @@ from __future__ import annotations
 
 import io
 
+import numpy as np
 import pandas as pd
 import pytest
 
-from api_refresh_builder.parsing import parse_codes
+from api_refresh_builder.code_pool import CodeList
+from api_refresh_builder.parsing import (
+    ParseResult,
+    parse_amendments,
+    parse_codes,
+    parse_mapping_pairs,
+)
 
 
 # ---------------------------------------------------------------------------
@@ -103,3 +110,200 @@ class TestValidation:
         assert result.valid_count == 2  # A, B (one A deduped)
         assert result.invalid_count == 1
         assert result.duplicates_removed == 1
+
+
+# ---------------------------------------------------------------------------
+# Streaming CSV reader
+# ---------------------------------------------------------------------------
+
+class TestCSVStreaming:
+    def test_only_first_column_used(self):
+        raw = _csv_bytes([["A1", "x", "y"], ["B2", "z", "w"]])
+        result = parse_codes(raw, "wide.csv")
+        assert result.valid_codes == ["A1", "B2"]
+
+    def test_ragged_rows(self):
+        raw = _csv_bytes([["A1"], ["B2", "extra", "cols"], ["C3", "x"]])
+        result = parse_codes(raw, "ragged.csv")
+        assert result.valid_codes == ["A1", "B2", "C3"]
+
+    def test_dedupe_across_chunk_boundaries(self, monkeypatch):
+        monkeypatch.setattr("api_refresh_builder.parsing.CSV_CHUNK_ROWS", 2)
+        raw = _csv_bytes([["A"], ["B"], ["C"], ["A"], ["D"], ["B"], ["E"]])
+        result = parse_codes(raw, "chunks.csv")
+        assert result.valid_codes == ["A", "B", "C", "D", "E"]
+        assert result.duplicates_removed == 2
+
+    def test_unsupported_extension_raises(self):
+        with pytest.raises(ValueError, match="Unsupported file type"):
+            parse_codes(b"A\n", "codes.txt")
+
+
+# ---------------------------------------------------------------------------
+# Streaming XLSX reader
+# ---------------------------------------------------------------------------
+
+class TestXLSXStreaming:
+    def test_only_column_a_used(self):
+        df = pd.DataFrame([["A1", "x", "y"], ["B2", "z", "w"]])
+        buf = io.BytesIO()
+        df.to_excel(buf, index=False, header=False, engine="openpyxl")
+        result = parse_codes(buf.getvalue(), "wide.xlsx")
+        assert result.valid_codes == ["A1", "B2"]
+
+    def test_matches_pandas_reader(self):
+        values = ["CODE1", 12345, None, "NA", "  CODE2 ", "#N/A", "BAD!"]
+        raw = _xlsx_bytes(values)
+        expected = pd.read_excel(
+            io.BytesIO(raw), header=None, dtype=str, engine="openpyxl"
+        ).iloc[:, 0]
+        expected_codes = [str(v).strip() for v in expected if not pd.isna(v)]
+        result = parse_codes(raw, "mixed.xlsx", dedupe=False)
+        assert result.raw_codes == expected_codes
+        assert result.valid_codes == ["CODE1", "12345", "CODE2"]
+
+    def test_large_numeric_codes_match_pandas_reader(self):
+        values = [1e20, 123.0, 1.5]
+        raw = _xlsx_bytes(values)
+        expected = pd.read_excel(
+            io.BytesIO(raw), header=None, dtype=str, engine="openpyxl"
+        ).iloc[:, 0]
+        result = parse_codes(raw, "numbers.xlsx", dedupe=False)
+        assert result.raw_codes == list(expected) == ["100000000000000000000", "123", "1.5"]
+        assert result.valid_codes == ["100000000000000000000", "123"]
+
+
+# ---------------------------------------------------------------------------
+# Vectorised validation / dedupe
+# ---------------------------------------------------------------------------
+
+class TestVectorisedValidation:
+    def test_custom_pattern(self):
+        raw = _csv_bytes([["ab12"], ["AB12"], ["ab"]])
+        result = parse_codes(raw, "c.csv", validation_pattern=r"^[a-z]+\d+$")
+        assert result.valid_codes == ["ab12"]
+        assert result.invalid_codes == ["AB12", "ab"]
+
+    def test_pattern_uses_match_semantics(self):
+        raw = _csv_bytes([["ABC-trailing"], ["xABC"]])
+        result = parse_codes(raw, "c.csv", validation_pattern=r"ABC")
+        assert result.valid_codes == ["ABC-trailing"]
+
+    def test_invalid_codes_logged_once(self, caplog):
+        raw = _csv_bytes([["GOOD"], ["BAD!"], ["ALSO BAD"], ["WORSE?"]])
+        with caplog.at_level("WARNING", logger="api_refresh_builder.parsing"):
+            parse_codes(raw, "c.csv")
+        warnings = [r for r in caplog.records if r.levelname == "WARNING"]
+        assert len(warnings) == 1
+        assert "3 invalid code(s)" in warnings[0].getMessage()
+
+    def test_invalid_duplicates_not_counted_as_dupes(self):
+        raw = _csv_bytes([["BAD!"], ["BAD!"], ["A"]])
+        result = parse_codes(raw, "c.csv", dedupe=True)
+        assert result.invalid_codes == ["BAD!", "BAD!"]
+        assert result.duplicates_removed == 0
+
+
+# ---------------------------------------------------------------------------
+# Compact storage
+# ---------------------------------------------------------------------------
+
+class TestCompactResult:
+    def test_lists_are_views_over_one_pool(self):
+        raw = _csv_bytes([["B2"], ["BAD!"], ["A1"], ["B2"]])
+        result = parse_codes(raw, "c.csv")
+        assert isinstance(result.valid_codes, CodeList)
+        assert result.valid_codes[:] == ["B2", "A1"]
+        assert result.nbytes < result.raw_codes.nbytes + 64
+
+    def test_equals_list_built_result(self):
+        raw = _csv_bytes([["A"], ["A"], ["bad code"]])
+        expected = ParseResult(
+            raw_codes=["A", "A", "bad code"],
+            valid_codes=["A"],
+            invalid_codes=["bad code"],
+            duplicates_removed=1,
+        )
+        assert parse_codes(raw, "c.csv") == expected
+
+    def test_hash_collision_falls_back_to_exact(self, monkeypatch):
+        monkeypatch.setattr(
+            pd.util, "hash_array", lambda values, **kw: np.zeros(len(values), dtype=np.uint64)
+        )
+        raw = _csv_bytes([["A"], ["B"], ["A"], ["C"], ["B"]])
+        result = parse_codes(raw, "c.csv")
+        assert result.valid_codes == ["A", "B", "C"]
+        assert result.duplicates_removed == 2
+
+    def test_bytes_per_code_near_code_length(self):
+        codes = [f"CODE{i:07d}" for i in range(20_000)]
+        result = parse_codes("\n".join(codes).encode(), "c.csv")
+        # 11 characters + 4-byte offset + 4-byte valid index per code.
+        assert result.nbytes / len(codes) < 20
+
+
+# ---------------------------------------------------------------------------
+# Bulk amendment sheets
+# ---------------------------------------------------------------------------
+
+class TestParseAmendments:
+    def test_csv(self):
+        raw = _csv_bytes([
+            ["ref", "Narrative2", "TransactionTypeExternal"],
+            ["IMIX.CT.1", "Employer", ""],
+            [" IMIX.CT.2 ", "", " EMP "],
+            ["", "ignored", ""],
+        ])
+        assert parse_amendments(raw, "a.csv") == {
+            "IMIX.CT.1": {"Narrative2": "Employer"},
+            "IMIX.CT.2": {"TransactionTypeExternal": "EMP"},
+        }
+
+    def test_xlsx(self):
+        df = pd.DataFrame({"ref": ["IMIX.CT.1"], "Narrative2": ["NA"]})
+        buf = io.BytesIO()
+        df.to_excel(buf, index=False, engine="openpyxl")
+        assert parse_amendments(buf.getvalue(), "a.xlsx") == {
+            "IMIX.CT.1": {"Narrative2": "NA"},
+        }
+
+    def test_duplicate_refs_raise(self):
+        raw = _csv_bytes([["ref", "Narrative2"], ["A", "x"], ["A", "y"]])
+        with pytest.raises(ValueError, match="Duplicate ref"):
+            parse_amendments(raw, "a.csv")
+
+    def test_needs_field_column(self):
+        raw = _csv_bytes([["ref"], ["A"]])
+        with pytest.raises(ValueError, match="field column"):
+            parse_amendments(raw, "a.csv")
+
+
+# ---------------------------------------------------------------------------
+# Bulk mapping sheets
+# ---------------------------------------------------------------------------
+
+class TestParseMappingPairs:
+    def test_csv(self):
+        raw = _csv_bytes([
+            ["source_id", "mapping_code", "notes"],
+            ["348", "CACR0", "x"],
+            [" 149_1033 ", " SCSH ", ""],
+            ["348", "CACR0", "repeat"],
+            ["350", "", ""],
+        ])
+        assert parse_mapping_pairs(raw, "m.csv") == [("348", "CACR0"), ("149_1033", "SCSH")]
+
+    def test_xlsx_numeric_ids_kept_as_text(self):
+        df = pd.DataFrame({"id": ["348", "0149"], "code": ["A", "B"]})
+        buf = io.BytesIO()
+        df.to_excel(buf, index=False, engine="openpyxl")
+        assert parse_mapping_pairs(buf.getvalue(), "m.xlsx") == [("348", "A"), ("0149", "B")]
+
+    def test_conflicting_codes_raise(self):
+        raw = _csv_bytes([["id", "code"], ["348", "A"], ["348", "B"]])
+        with pytest.raises(ValueError, match="more than one code"):
+            parse_mapping_pairs(raw, "m.csv")
+
+    def test_needs_two_columns(self):
+        with pytest.raises(ValueError, match="mapping code column"):
+            parse_mapping_pairs(_csv_bytes([["id"], ["348"]]), "m.csv")
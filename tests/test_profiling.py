@@ -0,0 +1,100 @@
+"""Tests for api_refresh_builder.profiling."""
+
+from __future__ import annotations
+
+import pstats
+
+import pytest
+
+from api_refresh_builder import profiling
+from api_refresh_builder.profiling import ENV_VAR, profile_rerun, profiling_requested
+
+
+@pytest.fixture(autouse=True)
+def cprofile_only(monkeypatch):
+    """Use cProfile even if pyinstrument happens to be installed."""
+    monkeypatch.setattr(profiling, "_new_backend", profiling._CProfileBackend)
+
+
+def _work() -> int:
+    return sum(i * i for i in range(10_000))
+
+
+class TestProfilingRequested:
+    @pytest.mark.parametrize(
+        ("env", "params", "expected"),
+        [
+            (None, {}, False),
+            (None, {"profile": "1"}, False),
+            ("query", {"profile": "1"}, True),
+            ("query", {"profile": "0"}, False),
+            ("query", {"profile": "true"}, True),
+            ("1", {}, True),
+            ("always", None, True),
+            ("off", {"profile": "1"}, False),
+        ],
+    )
+    def test_modes(self, monkeypatch, env, params, expected):
+        if env is None:
+            monkeypatch.delenv(ENV_VAR, raising=False)
+        else:
+            monkeypatch.setenv(ENV_VAR, env)
+        assert profiling_requested(params) is expected
+
+
+class TestProfileRerun:
+    def test_disabled_writes_nothing(self, tmp_path):
+        with profile_rerun("page", enabled=False, directory=tmp_path) as files:
+            _work()
+        assert files == []
+        assert list(tmp_path.iterdir()) == []
+
+    def test_writes_profile_and_hotspots(self, tmp_path):
+        with profile_rerun("api_refresh", enabled=True, directory=tmp_path, top_n=5) as files:
+            _work()
+        prof, table = files
+        assert prof.suffix == ".prof" and table.suffix == ".txt"
+        assert "api_refresh" in prof.name
+        assert pstats.Stats(str(prof)).total_calls > 0
+        text = table.read_text()
+        assert text.startswith("api_refresh: ")
+        assert "_work" in text or "<genexpr>" in text
+
+    def test_saved_when_body_raises(self, tmp_path):
+        with pytest.raises(RuntimeError):
+            with profile_rerun("page", enabled=True, directory=tmp_path) as files:
+                raise RuntimeError("rerun")
+        assert len(files) == 2 and all(p.exists() for p in files)
+
+    def test_save_failure_does_not_mask_body_error(self, tmp_path, monkeypatch):
+        def broken_save(self, path):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(profiling._CProfileBackend, "save", broken_save)
+        with pytest.raises(RuntimeError, match="rerun"):
+            with profile_rerun("page", enabled=True, directory=tmp_path) as files:
+                raise RuntimeError("rerun")
+        assert files == []
+
+    def test_retention(self, tmp_path):
+        for _ in range(4):
+            with profile_rerun("page", enabled=True, directory=tmp_path, keep=2):
+                _work()
+        assert len(list(tmp_path.glob("*.prof"))) == 2
+        assert len(list(tmp_path.glob("*.txt"))) == 2
+
+    def test_label_sanitised(self, tmp_path):
+        with profile_rerun("../a b", enabled=True, directory=tmp_path) as files:
+            pass
+        assert all(p.parent == tmp_path for p in files)
+
+
+def test_pyinstrument_hotspots_respect_top_n():
+    pytest.importorskip("pyinstrument")
+    backend = profiling._PyinstrumentBackend()
+    backend.start()
+    _work()
+    sorted(range(100_000), key=lambda x: -x)
+    backend.stop()
+    entries = backend.hotspots(2).rstrip("\n").split("\n\n")[-1].splitlines()
+    assert len(entries) == 2
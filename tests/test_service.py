@@ -0,0 +1,201 @@
+"""Tests for api_refresh_builder.service."""
+
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("starlette")
+httpx = pytest.importorskip("httpx")
+
+from starlette.testclient import TestClient  # noqa: E402
+
+from api_refresh_builder import crm_builder, mapping_builder, sql_builder  # noqa: E402
+from api_refresh_builder.service import create_app  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    app = create_app(executor_factory=lambda: ThreadPoolExecutor(max_workers=2))
+    with TestClient(app) as c:
+        yield c
+
+
+class TestRefresh:
+    def test_json(self, client):
+        resp = client.post("/refresh", json={
+            "codes": ["A1", "B2"],
+            "refresh_family": "IMIX",
+            "target_types": ["Contact"],
+            "debug": True,
+        })
+        assert resp.status_code == 200
+        assert resp.json()["sql"] == sql_builder.build_sql(
+            ["A1", "B2"], "IMIX", ["Contact"], debug=True
+        )
+
+    def test_batched_mode(self, client):
+        resp = client.post("/refresh", json={
+            "codes": ["A1", "B2"],
+            "refresh_family": "IMIX",
+            "output_mode": "batched",
+            "batch_size": 1,
+        })
+        assert resp.json()["sql"].count("GO") == 2
+
+    def test_upload(self, client):
+        resp = client.post(
+            "/refresh/upload",
+            params={"filename": "codes.csv", "refresh_family": "IMIX", "target_types": "Contact"},
+            content=b"A1\nB2\nB2\nbad code\n",
+        )
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["stats"]["valid_count"] == 2
+        assert body["stats"]["invalid_codes"] == ["bad code"]
+        assert body["sql"] == sql_builder.build_sql(["A1", "B2"], "IMIX", ["Contact"])
+
+    def test_upload_unsupported_type(self, client):
+        resp = client.post(
+            "/refresh/upload",
+            params={"filename": "codes.txt", "refresh_family": "IMIX"},
+            content=b"A1",
+        )
+        assert resp.status_code == 400
+        assert "Unsupported" in resp.json()["error"]
+
+    @pytest.mark.parametrize("body, message", [
+        ({"codes": "A1", "refresh_family": "IMIX"}, "codes"),
+        ({"codes": ["A1"], "refresh_family": "Nope"}, "Unknown refresh family"),
+        ({"codes": [], "refresh_family": "IMIX"}, "No codes"),
+        ({"codes": ["A1"], "refresh_family": "IMIX", "output_mode": "x"}, "output_mode"),
+        ({"codes": ["A1"], "refresh_family": "IMIX", "output_mode": ["x"]}, "output_mode"),
+        ({"codes": ["A1"], "refresh_family": "IMIX", "debug": 1}, "debug"),
+        ({"codes": ["A'; DROP TABLE x;--"], "refresh_family": "IMIX"}, "invalid codes"),
+        ({"codes": ["A1"], "refresh_family": "IMIX", "validation_pattern": "("}, "regex"),
+        ({"codes": ["A'1"], "refresh_family": "IMIX", "validation_pattern": ".+"}, "quotes"),
+    ])
+    def test_bad_request(self, client, body, message):
+        resp = client.post("/refresh", json=body)
+        assert resp.status_code == 400
+        assert message in resp.json()["error"]
+
+    def test_validation_pattern(self, client):
+        resp = client.post("/refresh", json={
+            "codes": ["A.1"], "refresh_family": "IMIX", "validation_pattern": r"^[A-Z.0-9]+$",
+        })
+        assert resp.status_code == 200
+        assert "'A.1'" in resp.json()["sql"]
+
+    def test_upload_rejects_quoted_codes(self, client):
+        resp = client.post(
+            "/refresh/upload",
+            params={"filename": "c.csv", "refresh_family": "IMIX", "validation_pattern": ".+"},
+            content=b"A1\nB'2\n",
+        )
+        assert resp.status_code == 400
+        assert "quotes" in resp.json()["error"]
+
+    def test_invalid_json(self, client):
+        resp = client.post("/refresh", content=b"{", headers={"content-type": "application/json"})
+        assert resp.status_code == 400
+
+
+class TestMappingAndCRM:
+    def test_mapping(self, client):
+        resp = client.post("/mapping", json={"source_id": "348", "mapping_code": "CACR0"})
+        assert resp.json()["sql"] == mapping_builder.build_all_steps("348", "CACR0")
+
+    def test_mapping_bulk(self, client):
+        pairs = [["348", "CACR0"], ["349", "SCSH"]]
+        resp = client.post("/mapping/bulk", json={"pairs": pairs})
+        assert resp.json()["sql"] == mapping_builder.build_bulk_all_steps(
+            [tuple(p) for p in pairs]
+        )
+
+    def test_crm(self, client):
+        resp = client.post("/crm", json={
+            "refs": ["IMIX.CT.1"],
+            "fields": {"Narrative2": "X"},
+            "use_ref_table": True,
+        })
+        body = resp.json()
+        assert body["full_flow"] == crm_builder.build_full_flow(
+            ["IMIX.CT.1"], {"Narrative2": "X"}, use_ref_table=True
+        )
+        assert "CREATE TABLE #refs" in body["ref_table_load"]
+
+    def test_crm_bulk(self, client):
+        amendments = {"IMIX.CT.1": {"Narrative2": "X"}}
+        resp = client.post("/crm/bulk", json={"amendments": amendments})
+        assert resp.json()["sql"] == crm_builder.build_bulk_update(amendments)
+
+    @pytest.mark.parametrize("body, message", [
+        ({"refs": ["R1'; DROP TABLE x;--"], "fields": {"Narrative2": "X"}}, "refs"),
+        ({"refs": ["R1"], "fields": {"Narrative2": "X'"}}, "fields"),
+        ({"refs": ["R1"], "fields": {"Narrative2 = 1;--": "X"}}, "field names"),
+        ({"refs": ["R1"], "fields": {"Narrative2": "X"}, "use_ref_table": "no"}, "use_ref_table"),
+        ({"refs": [" "], "fields": {"Narrative2": "X"}}, "reference"),
+    ])
+    def test_crm_bad_request(self, client, body, message):
+        resp = client.post("/crm", json=body)
+        assert resp.status_code == 400
+        assert message in resp.json()["error"]
+
+    @pytest.mark.parametrize("path, body", [
+        ("/mapping", {"source_id": "348'", "mapping_code": "CACR0"}),
+        ("/mapping", {"source_id": " ", "mapping_code": "CACR0"}),
+        ("/mapping/bulk", {"pairs": [["348", "CA'CR0"]]}),
+    ])
+    def test_mapping_bad_request(self, client, path, body):
+        assert client.post(path, json=body).status_code == 400
+
+    @pytest.mark.parametrize("amendments", [
+        {"R1": {"Narrative2": 5}},
+        {"R1": "Narrative2"},
+        ["R1"],
+    ])
+    def test_crm_bulk_bad_request(self, client, amendments):
+        resp = client.post("/crm/bulk", json={"amendments": amendments})
+        assert resp.status_code == 400
+        assert "amendments" in resp.json()["error"]
+
+    def test_health(self, client):
+        assert client.get("/health").json()["status"] == "ok"
+
+
+def test_concurrent_requests():
+    app = create_app(executor_factory=lambda: ThreadPoolExecutor(max_workers=4))
+
+    async def run() -> list[int]:
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+                requests = [
+                    c.post("/refresh", json={"codes": [f"C{i}"], "refresh_family": "IMIX"})
+                    for i in range(100)
+                ] + [
+                    c.post(
+                        "/refresh/upload",
+                        params={"filename": "c.csv", "refresh_family": "IMIX"},
+                        content=f"U{i}\n".encode(),
+                    )
+                    for i in range(100)
+                ]
+                responses = await asyncio.gather(*requests)
+        return [r.status_code for r in responses]
+
+    assert asyncio.run(run()) == [200] * 200
+
+
+def test_default_process_pool():
+    with TestClient(create_app()) as c:
+        resp = c.post(
+            "/refresh/upload",
+            params={"filename": "c.csv", "refresh_family": "IMIX"},
+            content=b"A1\n",
+        )
+    assert resp.status_code == 200
+    assert "'A1'" in resp.json()["sql"]
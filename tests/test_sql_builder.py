@@ -4,7 +4,12 @@ from __future__ import annotations
 
 import pytest
 
-from api_refresh_builder.sql_builder import build_sql
+from api_refresh_builder.sql_builder import (
+    build_sql,
+    build_sql_batches,
+    build_sql_script_batched,
+    build_sql_temp_table,
+)
 
 
 class TestBuildSQL:
@@ -62,3 +67,105 @@ class TestBuildSQL:
         for debug in (True, False):
             sql = build_sql(["A"], "IMIX", ["Contact"], debug=debug)
             assert sql.rstrip().endswith(";")
+
+
+class TestBuildSQLBatches:
+    CODES = ["A", "BB", "CCC", "D", "EE"]
+
+    def test_split_by_count(self):
+        stmts = build_sql_batches(self.CODES, "IMIX", ["Contact"], max_codes=2)
+        assert len(stmts) == 3
+        assert "@EntityCodes = 'A,BB'," in stmts[0]
+        assert "@EntityCodes = 'CCC,D'," in stmts[1]
+        assert "@EntityCodes = 'EE'," in stmts[2]
+
+    def test_split_by_bytes(self):
+        stmts = build_sql_batches(
+            self.CODES, "IMIX", ["Contact"], max_codes=None, max_bytes=5
+        )
+        literals = [s.split("'")[1] for s in stmts]
+        assert literals == ["A,BB", "CCC,D", "EE"]
+        assert all(len(lit) <= 5 for lit in literals)
+
+    def test_oversized_code_gets_own_batch(self):
+        stmts = build_sql_batches(
+            ["A", "LONGCODE", "B"], "IMIX", ["Contact"], max_codes=None, max_bytes=3
+        )
+        assert [s.split("'")[1] for s in stmts] == ["A", "LONGCODE", "B"]
+
+    def test_single_batch_matches_build_sql(self):
+        stmts = build_sql_batches(self.CODES, "Global Plus", ["Contact"], debug=True)
+        assert stmts == [build_sql(self.CODES, "Global Plus", ["Contact"], debug=True)]
+
+    def test_every_statement_keeps_options(self):
+        stmts = build_sql_batches(self.CODES, "IMIX", ["Contact"], debug=True, max_codes=1)
+        assert len(stmts) == 5
+        assert all(s.endswith("@debug = 1;") for s in stmts)
+
+    def test_batched_script_separated_by_go(self):
+        sql = build_sql_script_batched(self.CODES, "IMIX", ["Contact"], max_codes=2)
+        assert sql.count("\nGO") == 3
+        assert sql.endswith("GO")
+
+    def test_invalid_limit_raises(self):
+        with pytest.raises(ValueError, match="max_codes"):
+            build_sql_batches(["A"], "IMIX", ["Contact"], max_codes=0)
+
+    def test_validates_inputs(self):
+        with pytest.raises(ValueError, match="No codes"):
+            build_sql_batches([], "IMIX", ["Contact"])
+
+
+class TestBuildSQLTempTable:
+    def test_structure(self):
+        sql = build_sql_temp_table(["A", "B"], "IMIX", ["Contact", "Account"])
+        assert "CREATE TABLE #codes" in sql
+        assert "INSERT INTO #codes (code) VALUES\n    ('A'),\n    ('B');" in sql
+        assert "STRING_AGG" in sql and "ORDER BY id" in sql
+        assert "@EntityCodes = @EntityCodes," in sql
+        assert "@TargetTypes = 'Contact,Account';" in sql
+        assert sql.endswith("DROP TABLE #codes;")
+
+    def test_one_exec_per_batch_of_rows(self):
+        codes = [f"C{i}" for i in range(5)]
+        sql = build_sql_temp_table(codes, "IMIX", ["Contact"], max_codes=2)
+        assert sql.count("EXEC ") == 3
+        assert sql.count("DECLARE @EntityCodes") == 1
+        assert "WHERE id BETWEEN 1 AND 2;" in sql
+        assert "WHERE id BETWEEN 5 AND 5;" in sql
+        assert sql.endswith("DROP TABLE #codes;")
+
+    def test_single_exec_without_row_filter(self):
+        sql = build_sql_temp_table(["A", "B"], "IMIX", ["Contact"], max_codes=None)
+        assert sql.count("EXEC ") == 1
+        assert "WHERE id" not in sql
+
+    def test_inserts_capped_at_1000_rows(self):
+        codes = [f"C{i}" for i in range(2500)]
+        sql = build_sql_temp_table(codes, "Global Plus", ["Contact"])
+        assert sql.count("INSERT INTO #codes") == 3
+        assert sql.count("('C") == 2500
+
+    def test_code_column_fits_any_code_length(self):
+        code = "A" * 300
+        sql = build_sql_temp_table([code], "IMIX", ["Contact"])
+        assert "code NVARCHAR(MAX) NOT NULL" in sql
+        assert f"('{code}')" in sql
+
+    def test_custom_batch_size(self):
+        sql = build_sql_temp_table(["A", "B", "C"], "IMIX", ["Contact"], insert_batch_size=1)
+        assert sql.count("INSERT INTO #codes") == 3
+
+    def test_debug(self):
+        sql = build_sql_temp_table(["A"], "IMIX", ["Contact"], debug=True)
+        assert "@TargetTypes = 'Contact',\n    @debug = 1;" in sql
+
+    def test_batch_size_out_of_range_raises(self):
+        with pytest.raises(ValueError, match="insert_batch_size"):
+            build_sql_temp_table(["A"], "IMIX", ["Contact"], insert_batch_size=1001)
+        with pytest.raises(ValueError, match="max_codes"):
+            build_sql_temp_table(["A"], "IMIX", ["Contact"], max_codes=0)
+
+    def test_validates_inputs(self):
+        with pytest.raises(ValueError, match="Unknown refresh family"):
+            build_sql_temp_table(["A"], "Bad", ["Contact"])
@@ -0,0 +1,105 @@
+"""Tests for the streaming ``iter_*`` builders and api_refresh_builder.sql_writer."""
+
+from __future__ import annotations
+
+import gzip
+import io
+
+import pytest
+
+from api_refresh_builder import crm_builder, mapping_builder, sql_builder
+from api_refresh_builder.sql_writer import encode_sql, preview_sql, write_sql
+
+CODES = [f"C{i}" for i in range(2_345)]
+REFS = [f"IMIX.CT.{i}" for i in range(1_500)]
+
+
+class TestIterMatchesBuild:
+    @pytest.mark.parametrize("debug", [True, False])
+    def test_sql(self, debug):
+        args = (CODES, "IMIX", ["Contact", "Account"])
+        assert "".join(sql_builder.iter_sql(*args, debug=debug)) == sql_builder.build_sql(
+            *args, debug=debug
+        )
+
+    def test_sql_batched(self):
+        args = (CODES, "IMIX", ["Contact"])
+        streamed = "".join(sql_builder.iter_sql_batched(*args, max_codes=700))
+        assert streamed == sql_builder.build_sql_script_batched(*args, max_codes=700)
+
+    def test_sql_temp_table(self):
+        args = (CODES, "Global Plus", ["Contact"])
+        streamed = "".join(sql_builder.iter_sql_temp_table(*args, debug=True))
+        assert streamed == sql_builder.build_sql_temp_table(*args, debug=True)
+
+    def test_crm_full_flow(self):
+        fields = {"Narrative2": "x", "TransactionTypeExternal": "Y"}
+        streamed = "".join(crm_builder.iter_full_flow(REFS, fields))
+        assert streamed == crm_builder.build_full_flow(REFS, fields)
+
+    @pytest.mark.parametrize("existing", [None, "SCSH"])
+    def test_mapping_all_steps(self, existing):
+        streamed = "".join(mapping_builder.iter_all_steps("348", "CACR0", existing))
+        assert streamed == mapping_builder.build_all_steps("348", "CACR0", existing)
+
+
+class TestIterIsLazy:
+    def test_yields_many_fragments(self):
+        fragments = list(sql_builder.iter_sql(CODES, "IMIX", ["Contact"]))
+        assert len(fragments) > 3
+        assert max(len(f) for f in fragments) < len("".join(fragments))
+
+    def test_validation_is_eager(self):
+        with pytest.raises(ValueError, match="No codes"):
+            sql_builder.iter_sql([], "IMIX", ["Contact"])
+        with pytest.raises(ValueError, match="field/value"):
+            crm_builder.iter_full_flow(["A"], {})
+        with pytest.raises(ValueError, match="Source ID"):
+            mapping_builder.iter_all_steps("", "X")
+
+
+class TestWriteSQL:
+    def test_writes_all_fragments(self):
+        buf = io.StringIO()
+        n = write_sql(sql_builder.iter_sql(CODES, "IMIX", ["Contact"]), buf)
+        expected = sql_builder.build_sql(CODES, "IMIX", ["Contact"])
+        assert buf.getvalue() == expected
+        assert n == len(expected)
+
+
+class TestPreviewSQL:
+    SQL = "\n".join(f"line {i:04d}" for i in range(1_000))
+
+    def test_short_sql_unchanged(self):
+        assert preview_sql("SELECT 1;") == "SELECT 1;"
+
+    def test_bounded_head_and_tail(self):
+        preview = preview_sql(self.SQL, head_chars=100, tail_chars=50)
+        assert len(preview) < 250
+        assert preview.startswith("line 0000\n")
+        assert preview.endswith("line 0999")
+        assert "characters omitted" in preview
+
+    def test_cuts_on_line_boundaries(self):
+        preview = preview_sql(self.SQL, head_chars=100, tail_chars=50)
+        head, _, tail = preview.partition("\n\n-- ...")
+        lines = head.splitlines() + tail.partition("...\n\n")[2].splitlines()
+        assert all(len(line) == len("line 0000") for line in lines)
+
+    def test_long_single_line_keeps_budget(self):
+        sql = "EXEC p\n    @EntityCodes = '" + ",".join(CODES * 10) + "';"
+        preview = preview_sql(sql, head_chars=1_000, tail_chars=500)
+        assert 1_400 < len(preview) < 1_600
+        assert preview.endswith("';")
+
+
+class TestEncodeSQL:
+    def test_utf8(self):
+        assert encode_sql("N'é'") == "N'é'".encode("utf-8")
+
+    def test_gzip_roundtrip_and_deterministic(self):
+        sql = sql_builder.build_sql(CODES, "IMIX", ["Contact"])
+        data = encode_sql(sql, compress=True)
+        assert gzip.decompress(data).decode("utf-8") == sql
+        assert len(data) < len(sql)
+        assert encode_sql(sql, compress=True) == data